@@ -7,6 +7,31 @@ PID=0x0104
 SN=0123456789
 MFG="PiRate"
 PROD="PiRate HID + Serial"
+CFG="${PIRATE_CONFIG:-/config/pirate.cfg}"
+
+# Function to parse config attributes
+ini_get() {
+  [[ -f "$1" ]] || return 0
+  awk -v SEC="$2" -v KEY="$3" '
+  BEGIN { IGNORECASE=1; sec="["SEC"]" }
+  /^\s*\[/ { inside=(tolower($0)==tolower(sec)); next }
+  inside {
+    if ($0 ~ /^[[:space:]]*($|;|#)/) next
+    pos=index($0,"="); if (!pos) next
+    k=substr($0,1,pos-1); v=substr($0,pos+1)
+    gsub(/^[ \t]+|[ \t]+$/, "", k)
+    sub(/[;#].*$/, "", v); gsub(/^[ \t]+|[ \t]+$/, "", v)
+    if (tolower(k)==tolower(KEY)) { print v; exit }
+  }' "$1"
+}
+
+# Function to check boolean config attributes
+ini_true() {
+  case "$(ini_get "$CFG" "$1" "$2" | tr '[:upper:]' '[:lower:]')" in
+    1|true|yes|on) return 0 ;;
+    *)             return 1 ;;
+  esac
+}
 
 modprobe libcomposite
 mkdir -p "$G"
@@ -38,6 +63,46 @@ ln -sf functions/hid.usb0 configs/c.1/
 mkdir -p functions/acm.usb0
 ln -sf functions/acm.usb0 configs/c.1/
 
+# Mass storage (optional), backed by an image PiRate builds at execute time
+if ini_true mass_storage enabled; then
+  MS_IMG="$(ini_get "$CFG" mass_storage image)"; MS_IMG="${MS_IMG:-/var/lib/pirate/storage.img}"
+  install -d -m 2775 -g plugdev "$(dirname "$MS_IMG")"
+
+  mkdir -p functions/mass_storage.usb0
+  echo 1 > functions/mass_storage.usb0/stall
+  echo 1 > functions/mass_storage.usb0/lun.0/removable
+  echo 1 > functions/mass_storage.usb0/lun.0/ro
+  echo 0 > functions/mass_storage.usb0/lun.0/cdrom
+  [[ -f "$MS_IMG" ]] && echo "$MS_IMG" > functions/mass_storage.usb0/lun.0/file
+
+  # Let PiRate swap images without root
+  for attr in file forced_eject; do
+    [[ -e "functions/mass_storage.usb0/lun.0/$attr" ]] || continue
+    chgrp plugdev "functions/mass_storage.usb0/lun.0/$attr"
+    chmod g+w "functions/mass_storage.usb0/lun.0/$attr"
+  done
+  ln -sf functions/mass_storage.usb0 configs/c.1/
+fi
+
+# USB network (optional): NCM by default, ECM for hosts without NCM drivers
+NET_FN=""
+if ini_true network enabled; then
+  NET_FN="$(ini_get "$CFG" network function)"; NET_FN="${NET_FN:-ncm}"
+  NET_ADDR="$(ini_get "$CFG" network address)"; NET_ADDR="${NET_ADDR:-169.254.55.1}"
+
+  mkdir -p "functions/$NET_FN.usb0"
+  echo 02:50:49:52:54:01 > "functions/$NET_FN.usb0/dev_addr"   # Stable, locally administered MACs
+  echo 02:50:49:52:54:02 > "functions/$NET_FN.usb0/host_addr"
+  ln -sf "functions/$NET_FN.usb0" configs/c.1/
+fi
+
 # bind
 UDC=$(ls /sys/class/udc | head -n1)
-echo "$UDC" > UDC
\ No newline at end of file
+echo "$UDC" > UDC
+
+# Bring up the device side of the USB network link
+if [[ -n "$NET_FN" ]]; then
+  IFACE="$(cat "functions/$NET_FN.usb0/ifname")"
+  ip addr replace "$NET_ADDR/16" dev "$IFACE"
+  ip link set "$IFACE" up
+fi
\ No newline at end of file
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import importlib
+import signal
 import sys
 from collections.abc import Callable
 from types import ModuleType
@@ -9,6 +10,10 @@ from typing import cast
 from pirate import __version__
 from pirate.lib.config import Config
 from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+from pirate.lib.session_daemon import SessionDaemon, SessionDaemonError, attach
+from pirate.lib.stream_cache import StreamCache
+from pirate.lib.transfer import Transfer, TransferError, TransferReport
 
 Handler = Callable[[argparse.Namespace], int]
 
@@ -57,9 +62,41 @@ def _build_parser() -> argparse.ArgumentParser:
     p_exec.add_argument("payload", help="Under pirate.payloads, e.g. 'macos.serial_shell'")
     p_exec.set_defaults(handler=cmd_execute)
 
+    p_cache = sub.add_parser("cache", help="Manage the compiled keystroke cache")
+    p_cache.add_argument("action", choices=["clear", "stats"], help="Remove all entries or print usage")
+    p_cache.set_defaults(handler=cmd_cache)
+
+    p_daemon = sub.add_parser("daemon", help="Own the serial device and keep its session for `pirate attach`")
+    p_daemon.add_argument("--listen", metavar="ADDRESS", help="Also serve the session over TCP on this address")
+    p_daemon.set_defaults(handler=cmd_daemon)
+
+    p_attach = sub.add_parser("attach", help="Attach to the session kept by `pirate daemon` (Ctrl-] detaches)")
+    p_attach.add_argument("--connect", metavar="HOST[:PORT]", help="Attach over TCP instead of the local Unix socket")
+    p_attach.set_defaults(handler=cmd_attach)
+
+    p_push = sub.add_parser("push", help="Copy a file to the target through the shell on the serial link")
+    p_push.add_argument("local", help="File on the device")
+    p_push.add_argument("remote", help="Destination path on the target")
+    _add_transfer_options(p_push)
+    p_push.set_defaults(handler=cmd_push)
+
+    p_pull = sub.add_parser("pull", help="Copy a file from the target through the shell on the serial link")
+    p_pull.add_argument("remote", help="File on the target")
+    p_pull.add_argument("local", help="Destination path on the device")
+    _add_transfer_options(p_pull)
+    p_pull.set_defaults(handler=cmd_pull)
+
     return parser
 
 
+def _add_transfer_options(parser: argparse.ArgumentParser) -> None:
+    """Add the options shared by `push` and `pull`; unset ones fall back to config."""
+
+    parser.add_argument("--chunk", type=int, help="File bytes per chunk")
+    parser.add_argument("--window", type=int, help="Chunks in flight before waiting for the target")
+    parser.add_argument("--compress", action=argparse.BooleanOptionalAction, help="Gzip chunks on the wire")
+
+
 def cmd_version(_: argparse.Namespace) -> int:
     """
     Print the package version.
@@ -75,6 +112,167 @@ def cmd_version(_: argparse.Namespace) -> int:
     return 0
 
 
+def cmd_cache(ns: argparse.Namespace) -> int:
+    """
+    Clear the compiled keystroke cache or print its usage.
+
+    Args:
+        ns (argparse.Namespace): Parsed arguments with `action` ("clear" or "stats").
+
+    Returns:
+        int: Process exit code (0 on success).
+    """
+
+    cache = StreamCache()
+
+    if ns.action == "clear":
+        removed = cache.clear()
+        Logger.success(f"Removed {removed} cached stream(s) from '{cache.path}'.")
+        return 0
+
+    stats = cache.stats()
+    print(f"path:     {stats.path}")
+    print(f"entries:  {stats.entries}")
+    print(f"size:     {stats.size} bytes")
+    print(f"max_size: {stats.max_size} bytes")
+    return 0
+
+
+def cmd_daemon(ns: argparse.Namespace) -> int:
+    """
+    Run the session daemon until interrupted or terminated.
+
+    Args:
+        ns (argparse.Namespace): Parsed args with optional `listen`.
+
+    Returns:
+        int: Process exit code (0 on success).
+    """
+
+    daemon = SessionDaemon(listen=ns.listen)
+    signal.signal(signal.SIGTERM, lambda _sig, _frm: daemon.stop())
+
+    Logger.info(f"Starting session daemon on '{daemon.socket_path}'...")
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+
+    Logger.info("Session daemon stopped.")
+    return 0
+
+
+def cmd_attach(ns: argparse.Namespace) -> int:
+    """
+    Attach the terminal to the session kept by the daemon.
+
+    Args:
+        ns (argparse.Namespace): Parsed args with optional `connect` (HOST[:PORT]).
+
+    Returns:
+        int: Process exit code (0 on success, 1 if no daemon is running).
+    """
+
+    address = None
+    if ns.connect:
+        host, sep, port = ns.connect.rpartition(":")
+        if not sep:
+            host, port = ns.connect, ""
+        if port and not port.isdigit():
+            Logger.error(f"Invalid port in '{ns.connect}'. Expected HOST[:PORT].")
+            return 1
+        address = (host, int(port) if port else Config.get("daemon", "port", 7777))
+
+    Logger.info("Attaching to session. Press Ctrl-] to detach.")
+    try:
+        attach(address=address)
+    except SessionDaemonError as e:
+        Logger.error(str(e))
+        return 1
+
+    print("")
+    Logger.info("Detached.")
+    return 0
+
+
+def _run_transfer(ns: argparse.Namespace, action: str) -> int:
+    """
+    Open the serial link and push or pull one file.
+
+    Args:
+        ns (argparse.Namespace): Parsed args with `local`, `remote`, and transfer options.
+        action (str): "push" or "pull".
+
+    Returns:
+        int: Process exit code (0 on success).
+    """
+
+    console = SerialConsole()
+    if console.disable_serial:
+        Logger.error("Serial is disabled in config.")
+        return 1
+
+    try:
+        data = b""
+        if action == "push":
+            with open(ns.local, "rb") as f:
+                data = f.read()
+
+        console.open()
+        transfer = Transfer(console, chunk=ns.chunk, window=ns.window, compress=ns.compress)
+
+        report: TransferReport
+        if action == "push":
+            Logger.info(f"Pushing '{ns.local}' to '{ns.remote}'...")
+            report = transfer.push(data, ns.remote)
+        else:
+            Logger.info(f"Pulling '{ns.remote}' to '{ns.local}'...")
+            data, report = transfer.pull(ns.remote)
+            with open(ns.local, "wb") as f:
+                f.write(data)
+    except (TransferError, TimeoutError, OSError, ValueError) as e:
+        Logger.error(f"Unable to {action} '{ns.remote}': {e}")
+        return 1
+    finally:
+        console.close()
+
+    Logger.success(
+        f"{'Pushed' if action == 'push' else 'Pulled'} {report.size} bytes in {report.elapsed:.1f}s "
+        f"({report.rate / 1024:.1f} KiB/s, {report.wire} on the wire, {report.retransmits} chunks resent)."
+    )
+    return 0
+
+
+def cmd_push(ns: argparse.Namespace) -> int:
+    """
+    Copy a local file to the target.
+
+    Args:
+        ns (argparse.Namespace): Parsed args with `local`, `remote`, and transfer options.
+
+    Returns:
+        int: Process exit code (0 on success).
+    """
+
+    return _run_transfer(ns, "push")
+
+
+def cmd_pull(ns: argparse.Namespace) -> int:
+    """
+    Copy a file from the target to a local path.
+
+    Args:
+        ns (argparse.Namespace): Parsed args with `remote`, `local`, and transfer options.
+
+    Returns:
+        int: Process exit code (0 on success).
+    """
+
+    return _run_transfer(ns, "pull")
+
+
 def cmd_execute(ns: argparse.Namespace) -> int:
     try:
         Logger.info("Starting PiRate...")
@@ -0,0 +1,47 @@
+"""
+POSIX checksums for PiRate.
+
+This module provides `cksum()`, a pure-Python implementation of the POSIX
+``cksum`` CRC, which targets can compute with a stock tool to verify data
+that PiRate typed or sent to them.
+"""
+
+
+def _crc_table() -> list[int]:
+    """Build the MSB-first lookup table for the POSIX CRC-32 polynomial."""
+
+    table = []
+    for i in range(256):
+        crc = i << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else (crc << 1)
+        table.append(crc & 0xFFFFFFFF)
+
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def cksum(data: bytes) -> int:
+    """
+    Return the POSIX ``cksum`` CRC of data.
+
+    Args:
+        data (bytes): Data to checksum.
+
+    Returns:
+        int: The CRC as printed by ``cksum`` (first field).
+    """
+
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _CRC_TABLE[(crc >> 24) ^ byte]
+
+    # The length is appended least-significant byte first, without leading zero bytes
+    length = len(data)
+    while length:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _CRC_TABLE[(crc >> 24) ^ (length & 0xFF)]
+        length >>= 8
+
+    return ~crc & 0xFFFFFFFF
@@ -28,8 +28,50 @@ class Config:
             "wpm": 200,
             "path": "/dev/hidg0",
             "log_keystrokes": False,
+            "max_rate": False,
+            "min_interval": 0.0,
+            "compact_reports": False,
+        },
+        "serial": {"path": "/dev/ttyGS0", "baud": 115200, "newline": "crlf", "write_rate": 0},
+        "cache": {
+            "enabled": False,
+            "path": "/var/cache/pirate",
+            "max_size": 8 * 1024 * 1024,
+        },
+        "mass_storage": {
+            "enabled": False,
+            "image": "/var/lib/pirate/storage.img",
+            "label": "PIRATE",
+            "lun": "/sys/kernel/config/usb_gadget/pirate/functions/mass_storage.usb0/lun.0",
+        },
+        "network": {
+            "enabled": False,
+            "function": "ncm",
+            "address": "169.254.55.1",
+            "port": 4444,
+            "interface": "usb0",
+        },
+        "daemon": {
+            "socket": "/run/pirate/session.sock",
+            "scrollback": 64 * 1024,
+            "listen": None,
+            "port": 7777,
+            "tcp_access": "ro",
+            "client_buffer": 256 * 1024,
+            "slow_client": "drop",
+        },
+        "mux": {
+            "window": 64 * 1024,
+            "max_payload": 1024,
+            "python": "python3",
+        },
+        "transfer": {
+            "chunk": 4096,
+            "window": 8,
+            "compress": False,
+            "timeout": 10.0,
+            "retries": 5,
         },
-        "serial": {"path": "/dev/ttyGS0", "baud": 115200, "newline": "crlf"},
         "dev": {
             "stack_trace_errors": False,
             "log_level": "info",
@@ -105,6 +147,8 @@ class Config:
             return raw.lower() in ("1", "true", "yes", "on")
         if isinstance(default_value, int):
             return int(raw)
+        if isinstance(default_value, float):
+            return float(raw)
         if default_value is None:
             return None if raw == "" else raw
 
@@ -0,0 +1,154 @@
+"""
+Two-stage payload delivery for PiRate.
+
+This module provides the `Delivery` class, which types only a short bootstrap
+through the HID keyboard and then pushes the real script over the CDC-ACM
+serial link at USB speed, verifying the transfer on the target with the
+POSIX ``cksum`` CRC.
+"""
+
+from pirate.lib.checksum import cksum
+from pirate.lib.keyboard import Keyboard
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+
+
+class Delivery:
+    """
+    Deliver a script to the target in two stages.
+
+    Stage one types a bootstrap that opens the target's end of the serial
+    link, announces `READY_MARKER`, and reads a ``<length> <cksum>`` header
+    line followed by exactly that many bytes into a temp file. If the
+    target's ``cksum`` matches, it answers `OK_MARKER` and sources the file
+    with the link still open on fd 3 (the serial device path is in ``$p``);
+    otherwise it announces `READY_MARKER` again and the script is resent. If
+    no serial device can be opened, or the link closes, the typed shell exits.
+
+    Stage two is `push()`, which writes the header and script over the
+    pre-buffered `SerialConsole` and waits for the answer.
+    """
+
+    READY_MARKER = b"_PR_"
+    OK_MARKER = b"_PK_"
+
+    # Serial device glob and stty device flag on each target platform
+    PLATFORMS = {
+        "macos": ("/dev/tty.usb*", "-f"),
+        "linux": ("/dev/ttyACM*", "-F"),
+    }
+
+    def __init__(
+        self,
+        keyboard: Keyboard,
+        console: SerialConsole,
+        platform: str = "macos",
+        device: str | None = None,
+        baud: int | None = None,
+        timeout: float = 10.0,
+        retries: int = 3,
+    ):
+        """
+        Initialize a two-stage delivery.
+
+        Args:
+            keyboard (Keyboard): Keyboard used to type the bootstrap.
+            console (SerialConsole): Console opened with `SerialConsole.open()`.
+            platform (str): Target platform, a key of `PLATFORMS`. Defaults to "macos".
+            device (str, optional): Serial device path or glob on the target. Defaults to
+                the platform's CDC-ACM device.
+            baud (int, optional): Baud rate the bootstrap sets on the target's device. Defaults
+                to the console's baud.
+            timeout (float): Seconds to wait for each answer from the bootstrap. Defaults to 10.0.
+            retries (int): Number of times to resend a script that fails its checksum. Defaults to 3.
+
+        Raises:
+            ValueError: If the platform is not supported.
+        """
+
+        if platform not in self.PLATFORMS:
+            raise ValueError(f"Unsupported platform '{platform}'. Expected one of: {', '.join(self.PLATFORMS)}.")
+
+        default_device, self._stty_flag = self.PLATFORMS[platform]
+        self.keyboard = keyboard
+        self.console = console
+        self.device = device if device is not None else default_device
+        self.baud = baud if baud is not None else console.baud
+        self.timeout = timeout
+        self.retries = retries
+
+    def bootstrap(self) -> str:
+        """
+        Return the stage-one shell command to type on the target.
+
+        Returns:
+            str: A single-line POSIX shell command.
+        """
+
+        ready = self.READY_MARKER.decode("ascii")
+        ok = self.OK_MARKER.decode("ascii")
+
+        return (
+            f"p=$(ls {self.device}|head -1);exec 3<>$p||exit;"
+            f"stty {self._stty_flag} /dev/fd/3 {self.baud} raw -echo;f=$(mktemp);"
+            f'until echo {ready}>&3;read n c<&3||exit;head -c $n>$f<&3;[ "$(cksum<$f)" = "$c $n" ];do :;done;'
+            f"echo {ok}>&3;. $f;rm $f"
+        )
+
+    def deliver(self, script: str | bytes, suffix: str = "") -> None:
+        """
+        Type the bootstrap, then push the script over serial.
+
+        Args:
+            script (str | bytes): Shell script to run on the target.
+            suffix (str): Text typed after the bootstrap, before ENTER (e.g., "; exit").
+
+        Raises:
+            DeliveryError: If the bootstrap never answers or the script keeps failing its checksum.
+        """
+
+        self.keyboard.send(self.bootstrap() + suffix)
+        self.keyboard.send("{KEY:ENTER}")
+        self.push(script)
+
+    def push(self, script: str | bytes) -> None:
+        """
+        Send a script to a running bootstrap and wait until it is accepted.
+
+        Args:
+            script (str | bytes): Shell script to run on the target.
+
+        Raises:
+            DeliveryError: If the bootstrap never answers or the script keeps failing its checksum.
+        """
+
+        data = script.encode("utf-8") if isinstance(script, str) else script
+        frame = f"{len(data)} {cksum(data)}\n".encode("ascii") + data
+
+        # Don't wait on a target that can't answer if in dev mode
+        if self.keyboard.disable_keyboard or self.console.disable_serial:
+            return
+
+        if self.console.read_until(self.READY_MARKER, self.timeout) is None:
+            raise DeliveryError(f"Bootstrap did not announce itself within {self.timeout}s.")
+
+        for attempt in range(self.retries + 1):
+            Logger.debug(f"Pushing {len(data)}-byte script over serial (attempt {attempt + 1})...")
+            self.console.write(frame, timeout=self.timeout)
+
+            answer = self.console.read_until((self.OK_MARKER, self.READY_MARKER), self.timeout)
+            if answer is None:
+                raise DeliveryError(f"Bootstrap did not acknowledge the script within {self.timeout}s.")
+            if answer.endswith(self.OK_MARKER):
+                self.console.read_until(b"\n", self.timeout)  # Rest of the acknowledgement line
+                return
+
+            Logger.debug("Script failed its checksum on the target. Resending...")
+
+        raise DeliveryError(f"Script failed its checksum {self.retries + 1} times.")
+
+
+class DeliveryError(Exception):
+    """Custom exception for failed two-stage deliveries."""
+
+    pass
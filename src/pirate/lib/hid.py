@@ -0,0 +1,365 @@
+"""
+USB HID gadget device access for PiRate.
+
+This module provides the `HIDWriter` class, a persistent handle on the HID
+gadget character device (e.g., ``/dev/hidg0``) that is opened once and reused
+for every report instead of being reopened per keystroke, `LEDReader`, which
+watches the host's keyboard LED output reports, and `ReportStream`, a
+precompiled sequence of boot-protocol keyboard reports.
+"""
+
+import asyncio
+import errno
+import os
+import select
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import BinaryIO, cast
+
+from pirate.lib.logger import Logger
+
+# Errors raised by the gadget when the UDC is unbound/rebound underneath an open fd.
+_REBIND_ERRNOS = frozenset({errno.ENODEV, errno.ESHUTDOWN})
+
+REPORT_SIZE = 8
+LED_REPORT_SIZE = 1  # Boot keyboard output report: a single LED bitmask byte
+
+
+class HIDWriter:
+    """
+    A persistent, context-managed writer for a USB HID gadget device.
+
+    The device is opened lazily on the first write and kept open until `close()`
+    is called. If the gadget is rebound while open (ENODEV/ESHUTDOWN), the device
+    is transparently reopened and the write retried once.
+
+    In non-blocking mode the device is opened with O_NONBLOCK and each report is
+    written the moment the endpoint can take it, i.e. as soon as the host has
+    polled the previous report. `write_async()` always uses non-blocking mode.
+    """
+
+    WRITE_TIMEOUT = 5.0
+
+    def __init__(self, path: str, nonblocking: bool = False):
+        """
+        Initialize a HID writer.
+
+        Args:
+            path (str): HID gadget device path (e.g., "/dev/hidg0").
+            nonblocking (bool): Open with O_NONBLOCK and poll for writability. Defaults to False.
+        """
+
+        self.path = path
+        self.nonblocking = nonblocking
+        self._hid: BinaryIO | None = None
+        self._poll: select.poll | None = None
+
+    def __enter__(self) -> "HIDWriter":
+        """Open the device and return the writer."""
+
+        self.open()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        """Close the device."""
+
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the device is currently closed."""
+
+        return self._hid is None
+
+    def open(self) -> None:
+        """
+        Open the HID device if it is not already open.
+
+        Raises:
+            FileNotFoundError: If the device path does not exist.
+            PermissionError: If the device path cannot be opened for writing.
+        """
+
+        if self._hid is not None:
+            return
+
+        try:
+            if self.nonblocking:
+                self._hid = cast(BinaryIO, open(self.path, "rb+", buffering=0, opener=_nonblocking_opener))  # noqa: SIM115
+                self._poll = select.poll()
+                self._poll.register(self._hid.fileno(), select.POLLOUT)
+            else:
+                self._hid = cast(BinaryIO, open(self.path, "rb+", buffering=0))  # noqa: SIM115
+        except FileNotFoundError as err:
+            raise FileNotFoundError(f"Device path '{self.path}' not found.") from err
+        except PermissionError as err:
+            raise PermissionError(f"Permission denied for device path '{self.path}'.") from err
+
+    def close(self) -> None:
+        """Close the HID device. Safe to call more than once."""
+
+        hid, self._hid = self._hid, None
+        self._poll = None
+        if hid is not None:
+            hid.close()
+
+    def write(self, *reports: bytes | bytearray | memoryview) -> None:
+        """
+        Write one or more 8-byte HID reports to the device, in order.
+
+        Args:
+            *reports (bytes | bytearray | memoryview): Reports to write.
+        """
+
+        self.open()
+
+        for report in reports:
+            try:
+                self._write_one(report)
+            except OSError as err:
+                if err.errno not in _REBIND_ERRNOS:
+                    raise
+
+                # Resume from the report that failed once the gadget is back
+                Logger.debug(f"HID device '{self.path}' went away ({errno.errorcode[err.errno]}). Reopening...")
+                self.close()
+                self.open()
+                self._write_one(report)
+
+    def _write_one(self, report: bytes | bytearray | memoryview) -> None:
+        """Write a single report, waiting for the endpoint if the device is non-blocking."""
+
+        hid = cast(BinaryIO, self._hid)
+        written = hid.write(report)
+
+        # Unbuffered non-blocking writes return None while the previous report is unread
+        while written is None and self._poll is not None:
+            if not self._poll.poll(self.WRITE_TIMEOUT * 1000):
+                raise TimeoutError(f"HID device '{self.path}' was not polled by the host within {self.WRITE_TIMEOUT}s.")
+            written = hid.write(report)
+
+    async def write_async(self, *reports: bytes | bytearray | memoryview) -> None:
+        """
+        Write one or more reports without blocking the running event loop.
+
+        The device is switched to non-blocking mode if needed, and the loop's
+        writer callback on the device fd is used to wait for the endpoint.
+
+        Args:
+            *reports (bytes | bytearray | memoryview): Reports to write.
+        """
+
+        self.open()
+        self._make_nonblocking()
+
+        for report in reports:
+            while True:
+                try:
+                    if cast(BinaryIO, self._hid).write(report) is not None:
+                        break
+                except OSError as err:
+                    if err.errno not in _REBIND_ERRNOS:
+                        raise
+
+                    Logger.debug(f"HID device '{self.path}' went away ({errno.errorcode[err.errno]}). Reopening...")
+                    self.close()
+                    self.open()
+                    self._make_nonblocking()
+                    continue
+
+                await self._writable()
+
+    def _make_nonblocking(self) -> None:
+        """Switch an already open device to non-blocking mode."""
+
+        if self._poll is not None:
+            return
+
+        fd = cast(BinaryIO, self._hid).fileno()
+        os.set_blocking(fd, False)
+        self._poll = select.poll()
+        self._poll.register(fd, select.POLLOUT)
+
+    async def _writable(self) -> None:
+        """Wait on the event loop until the device fd is writable."""
+
+        loop = asyncio.get_running_loop()
+        fd = cast(BinaryIO, self._hid).fileno()
+        ready: asyncio.Future[None] = loop.create_future()
+
+        def on_writable() -> None:
+            if not ready.done():
+                ready.set_result(None)
+
+        loop.add_writer(fd, on_writable)
+        try:
+            await asyncio.wait_for(ready, self.WRITE_TIMEOUT)
+        except TimeoutError:
+            raise TimeoutError(f"HID device '{self.path}' was not polled by the host within {self.WRITE_TIMEOUT}s.") from None
+        finally:
+            loop.remove_writer(fd)
+
+
+class LEDReader:
+    """
+    Background reader of keyboard LED output reports from a HID gadget.
+
+    The host sends a 1-byte output report whenever its lock-key LED state
+    changes. Because the host only does that after processing every keystroke
+    sent before the lock key, the reports double as an exact "host has caught
+    up" signal. Each report bumps `sequence`, so callers can note the sequence
+    before typing and wait for the echoes that follow.
+    """
+
+    NUM_LOCK = 0x01
+    CAPS_LOCK = 0x02
+    SCROLL_LOCK = 0x04
+    COMPOSE = 0x08
+    KANA = 0x10
+
+    def __init__(self, path: str):
+        """
+        Initialize an LED reader.
+
+        Args:
+            path (str): HID gadget device path (e.g., "/dev/hidg0").
+        """
+
+        self.path = path
+        self.state: int | None = None
+        self.sequence = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background reader thread is running."""
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Open the device and start the background reader thread, if not already running.
+
+        Raises:
+            FileNotFoundError: If the device path does not exist.
+            PermissionError: If the device path cannot be opened for reading.
+        """
+
+        if self.running:
+            return
+
+        fd = self._open()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(fd,), name="pirate-hid-leds", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background reader thread."""
+
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def wait(self, since: int, count: int = 1, timeout: float | None = None) -> int | None:
+        """
+        Wait until `count` LED reports have arrived after sequence number `since`.
+
+        Args:
+            since (int): Value of `sequence` noted before the reports were triggered.
+            count (int): Number of reports to wait for. Defaults to 1.
+            timeout (float, optional): Seconds to wait. None waits indefinitely.
+
+        Returns:
+            int | None: The latest LED state, or None on timeout.
+        """
+
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.sequence - since >= count, timeout):
+                return None
+            return self.state
+
+    def _open(self) -> int:
+        """Open the device for non-blocking reads."""
+
+        try:
+            return os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        except FileNotFoundError as err:
+            raise FileNotFoundError(f"Device path '{self.path}' not found.") from err
+        except PermissionError as err:
+            raise PermissionError(f"Permission denied for device path '{self.path}'.") from err
+
+    def _run(self, fd: int) -> None:
+        """Background loop recording each LED report."""
+
+        try:
+            while not self._stop.is_set():
+                r, _, _ = select.select([fd], [], [], 0.1)
+                if not r:
+                    continue
+
+                try:
+                    report = os.read(fd, LED_REPORT_SIZE)
+                except BlockingIOError:
+                    continue
+                except OSError as err:
+                    if err.errno not in _REBIND_ERRNOS:
+                        raise
+
+                    Logger.debug(f"HID device '{self.path}' went away ({errno.errorcode[err.errno]}). Reopening...")
+                    os.close(fd)
+                    fd = self._reopen()
+                    continue
+
+                if not report:
+                    time.sleep(0.1)  # Writer side closed (e.g., FIFO stand-in); wait for more
+                    continue
+
+                with self._cond:
+                    self.state = report[0]
+                    self.sequence += 1
+                    self._cond.notify_all()
+        finally:
+            os.close(fd)
+
+    def _reopen(self) -> int:
+        """Reopen the device once the gadget is bound again."""
+
+        while not self._stop.is_set():
+            try:
+                return self._open()
+            except OSError:
+                time.sleep(0.1)
+
+        return os.open(os.devnull, os.O_RDONLY)
+
+
+def _nonblocking_opener(path: str, flags: int) -> int:
+    """Open a path with O_NONBLOCK added to the given flags."""
+
+    return os.open(path, flags | os.O_NONBLOCK)
+
+
+@dataclass(frozen=True)
+class ReportStream:
+    """
+    A precompiled sequence of 8-byte HID reports ready to be played.
+
+    Attributes:
+        data (bytes | memoryview): Concatenated reports, `REPORT_SIZE` bytes each.
+        delays (Sequence[float]): Seconds to wait after each report.
+        labels (Sequence[str]): Keys pressed by each report, or "" for releases.
+    """
+
+    data: bytes | memoryview
+    delays: Sequence[float]
+    labels: Sequence[str]
+
+    def __len__(self) -> int:
+        """Return the number of reports in the stream."""
+
+        return len(self.delays)
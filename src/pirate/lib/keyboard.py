@@ -2,19 +2,29 @@
 Keyboard HID emulation utilities for PiRate.
 
 This module provides the `Keyboard` class to send keystrokes via a USB HID device,
-with helpers for loading keymaps, building HID reports, and sending input.
+with helpers for loading keymaps, compiling text into HID report streams, and
+sending input.
 """
 
-import json
+import asyncio
+import os
 import re
 import time
-from importlib.resources import files
-from typing import cast
+from collections.abc import Iterator
+from contextlib import suppress
 
 from pirate.lib.config import Config
+from pirate.lib.hid import REPORT_SIZE, HIDWriter, LEDReader, ReportStream
+from pirate.lib.layout import CompiledLayout, Keymap
 from pirate.lib.logger import Logger
+from pirate.lib.pacing import Pacer, PaceReport
+from pirate.lib.serial_console import SerialConsole
+from pirate.lib.stream_cache import StreamCache
+from pirate.lib.upload import ENCODINGS, PLATFORMS, TERMINATOR, Encoding, UploadReport
 
-Keymap = dict[str, list[str]]
+_RELEASE = bytes(REPORT_SIZE)
+_KEY_ESCAPE = re.compile(r"\{KEY:(.*?)\}")
+_MAX_HELD_DELAY = 0.25  # Hosts start auto-repeating a held key after roughly 250-500 ms
 
 
 class Keyboard:
@@ -22,9 +32,24 @@ class Keyboard:
     A class to control a USB HID keyboard for emulating keystrokes.
 
     This class provides functionality for loading keymaps and
-    interacting with a USB HID device to send keyboard inputs.
+    interacting with a USB HID device to send keyboard inputs. The HID device
+    is opened on first use and held open until `close()` is called, or the
+    keyboard is used as a context manager.
+
+    Typing can optionally be verified against the target's echo on a serial
+    console; the chunk size and WPM that survive verification are kept in
+    `verify_chunk` and `verify_wpm` and reused by later verified sends.
     """
 
+    VERIFY_CHUNK = 16
+    VERIFY_MIN_CHUNK = 4
+    VERIFY_MAX_CHUNK = 256
+    VERIFY_MIN_WPM = 60
+    VERIFY_WPM_STEP = 25
+    VERIFY_RETRIES = 5
+    VERIFY_TIMEOUT = 0.5
+    UPLOAD_SAMPLE = 4096
+
     def __init__(
         self,
         layout: str | None = None,
@@ -32,6 +57,10 @@ class Keyboard:
         path: str | None = None,
         log_keystrokes: bool | None = None,
         disable_keyboard: bool | None = None,
+        cache: StreamCache | None = None,
+        max_rate: bool | None = None,
+        min_interval: float | None = None,
+        compact_reports: bool | None = None,
     ):
         """
         Initialize a Keyboard HID emulator.
@@ -43,39 +72,115 @@ class Keyboard:
             log_keystrokes (bool, optional): Whether to log keystrokes. Defaults to config value.
             disable_keyboard (bool, optional): Disable sending keystrokes for development/testing.
                 Defaults to config value.
+            cache (StreamCache, optional): Cache for compiled report streams. Defaults to a
+                `StreamCache` if enabled in config, otherwise no caching.
+            max_rate (bool, optional): Ignore WPM delays and send each report as soon as the host
+                has polled the previous one. Defaults to config value.
+            min_interval (float, optional): Minimum seconds between reports in max-rate mode.
+                Defaults to config value.
+            compact_reports (bool, optional): Elide release reports between keys that don't
+                need them. Defaults to config value.
         """
 
         self.device_path = path if path is not None else Config.get("keyboard", "path", "/dev/hidg0")
-        self.keymap = self._load_keymap(layout if layout is not None else Config.get("keyboard", "layout", "us"))
+        keymap = self._load_keymap(layout if layout is not None else Config.get("keyboard", "layout", "us"))
+        self.layout = keymap if isinstance(keymap, CompiledLayout) else CompiledLayout(keymap)
+        self.keymap = self.layout.keymap
         self.wpm = wpm if wpm is not None else Config.get("keyboard", "wpm", 400)
         self.log_keystrokes = log_keystrokes if log_keystrokes is not None else Config.get("keyboard", "log_keystrokes", True)
         self.disable_keyboard = disable_keyboard if disable_keyboard is not None else Config.get("dev", "disable_keyboard", False)
+        self.cache = cache
+        if self.cache is None and Config.get("cache", "enabled", False):
+            self.cache = StreamCache()
+        self.max_rate = max_rate if max_rate is not None else Config.get("keyboard", "max_rate", False)
+        self.min_interval = min_interval if min_interval is not None else Config.get("keyboard", "min_interval", 0.0)
+        self.compact_reports = (
+            compact_reports if compact_reports is not None else Config.get("keyboard", "compact_reports", False)
+        )
         self.keystroke_count = 0
+        self.last_pace: PaceReport | None = None
+        self.verify_chunk = self.VERIFY_CHUNK
+        self.verify_wpm = self.wpm
+        self._hid = HIDWriter(self.device_path, nonblocking=self.max_rate)
+        self._leds = LEDReader(self.device_path)
 
         if self.disable_keyboard:
             Logger.debug("Keyboard disabled in config. Skipping keystrokes...")
 
-    def _load_keymap(self, layout: str) -> Keymap:
-        """Load a keymap identifier into the controller."""
+    def __enter__(self) -> "Keyboard":
+        """Return the keyboard for use as a context manager."""
+
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        """Close the HID device."""
+
+        self.close()
+
+    def close(self) -> None:
+        """Close the HID device and stop the LED reader if they are open."""
+
+        self._hid.close()
+        self._leds.stop()
+
+    @property
+    def led_reader(self) -> LEDReader:
+        """The HID gadget's LED reader, shared by `sync()` and `Readiness.hid_output_report()`."""
 
-        data = files("pirate").joinpath(f"resources/layouts/{layout}.json").read_text(encoding="utf-8")
-        return cast(Keymap, json.loads(data))
+        return self._leds
 
-    def _write_report(self, report: list[int]) -> None:
-        """Write an 8-byte HID report to the device."""
+    def leds(self) -> int | None:
+        """
+        Return the host's last reported keyboard LED state.
+
+        The LED reader is started on first use; until the host sends an output
+        report the state is unknown.
+
+        Returns:
+            int | None: Bitmask of `LEDReader` LED flags, or None if not yet reported.
+        """
+
+        self._leds.start()
+        return self._leds.state
+
+    def sync(self, timeout: float = 1.0, key: str = "CAPS_LOCK") -> bool:
+        """
+        Block until the host has processed every keystroke sent so far.
+
+        Toggles a lock key twice and waits for both LED output reports. Hosts
+        only update the LEDs after handling the preceding input, so the echoes
+        mark the point where earlier keystrokes have landed. The LED state is
+        left as it was.
+
+        The key must be one whose LED the host tracks: macOS only echoes
+        CAPS_LOCK, while Linux and Windows hosts also echo NUM_LOCK and
+        SCR_LOCK.
+
+        Args:
+            timeout (float): Seconds to wait for the host's LED reports. Defaults to 1.0.
+            key (str): Lock key to toggle (e.g., "CAPS_LOCK", "NUM_LOCK", "SCR_LOCK"). Defaults to "CAPS_LOCK".
+
+        Returns:
+            bool: True once the host echoed both toggles, False on timeout or in dev mode.
+        """
 
-        # Dont execute if in dev mode
         if self.disable_keyboard:
-            return
+            return False
 
-        try:
-            with open(self.device_path, "rb+") as hid:
-                hid.write(bytearray(report))
-                hid.write(bytearray([0x00] * 8))
-        except FileNotFoundError as err:
-            raise FileNotFoundError(f"Device path '{self.device_path}' not found.") from err
-        except PermissionError as err:
-            raise PermissionError(f"Permission denied for device path '{self.device_path}'.") from err
+        self._leds.start()
+        since = self._leds.sequence
+        self.send(f"{{KEY:{key}}}{{KEY:{key}}}", wpm=1000)
+
+        if self._leds.wait(since, count=2, timeout=timeout) is None:
+            Logger.debug(f"Host did not echo {key} within {timeout}s.")
+            return False
+
+        return True
+
+    def _load_keymap(self, layout: str) -> CompiledLayout | Keymap:
+        """Load a keymap identifier into the controller."""
+
+        return CompiledLayout.load(layout)
 
     def _wpm_to_delay(self, wpm: int) -> float:
         """Convert typing speed in words-per-minute to an inter-keystroke delay."""
@@ -91,74 +196,474 @@ class Keyboard:
 
         return delay
 
-    def _process_keystroke(self, keystroke: str) -> None:
-        """Convert a keystroke into an HID report and sends it to the device."""
+    def _keystroke_report(self, keystroke: str) -> tuple[bytes, list[str]]:
+        """Return the HID press report for a keystroke and the keys it is made of."""
+
+        # Single keys and characters use the layout's prebuilt report
+        report = self.layout.reports.get(keystroke)
+        if report is not None:
+            return report, [keystroke]
 
-        self.keystroke_count += 1
-        report = [0x00] * 8  # Initialize an 8-byte HID report
         keys = keystroke.split("+")  # Split keystroke into single keys (e.g., "WIN+R")
+        return self._build_report(keys), keys
+
+    def _build_report(self, keys: list[str]) -> bytes:
+        """Combine the modifiers and keycodes of several keys into one HID report."""
+
+        report = bytearray(8)  # Initialize an 8-byte HID report
 
         # Process each key
         for key in keys:
             # Exit if key not found in keymap
-            if key not in self.keymap:
+            codes = self.layout.codes.get(key)
+            if codes is None:
                 raise KeymapError(f"Key '{key}' not found in keymap.")
 
             # Get modifier and keycode
-            modifier, keycode = self.keymap[key]
-            report[0] |= int(modifier, 16)  # Add modifier bits to byte 0
+            modifier, keycode = codes
+            report[0] |= modifier  # Add modifier bits to byte 0
 
             # Add keycode to the next available slot (bytes 2-7)
             for i in range(2, 8):
                 if report[i] == 0x00:  # Find an empty slot
-                    report[i] = int(keycode, 16)
+                    report[i] = keycode
                     break
             else:
                 raise HIDReportError("Too many keys in report. HID report full.")
 
-        # Log the keystrokes as hexdump
-        if self.log_keystrokes:
-            formatted_report = " ".join(f"{byte:02X}" for byte in report)
-            Logger.debug(f"{self.keystroke_count:05}  {formatted_report}  {' + '.join(keys)}")
+        return bytes(report)
+
+    def _tokenize(self, text: str) -> list[str]:
+        """Split text into keystrokes, keeping {KEY:...} escapes as single hotkeys."""
+
+        keystrokes: list[str] = []
+        pos = 0
+
+        # Add characters to keystrokes and hotkeys as single keystroke.
+        while pos < len(text):
+            match = _KEY_ESCAPE.search(text, pos)
+
+            if match:
+                escaped_key = match.group(1).replace(" ", "")
+
+                keystrokes.extend(text[pos : match.start()])  # Add all keys as keystroke before hotkey
+                keystrokes.append(escaped_key)  # Add hotkey as single keystroke
+
+                pos = match.end()  # Move position past the match
+            else:
+                keystrokes.extend(text[pos:])  # Add remaining text as regular characters
+                break
+
+        return keystrokes
+
+    def compile(self, text: str, wpm: int | None = None, compact: bool | None = None, cache: bool = True) -> ReportStream:
+        """
+        Compile text into a stream of HID reports without touching the device.
+
+        All parsing, keymap lookups, and report construction happen here, so
+        unknown keys and overfull chords fail before anything is typed.
+
+        In compact mode, a single key is held until the next keystroke's report
+        replaces it, and an all-zero release is only sent when the next report
+        repeats a held keycode or changes the modifiers (or after hotkeys and
+        at the end). Compact mode is skipped when the inter-key delay is long
+        enough to trigger host key repeat.
+
+        Args:
+            text (str): Text to compile, including any escape sequences.
+            wpm (Optional[int]): Words-per-minute for the stream's delays. Defaults to self.wpm.
+            compact (Optional[bool]): Elide redundant release reports. Defaults to self.compact_reports.
+            cache (bool): Use the stream cache, if any, for this text. Defaults to True.
+
+        Returns:
+            ReportStream: The press/release reports and their pacing.
+
+        Raises:
+            KeymapError: If a key is not found in the keymap.
+            HIDReportError: If a hotkey has more keys than fit in one report.
+        """
+
+        wpm = self.wpm if wpm is None else wpm
+        delay = self._wpm_to_delay(wpm)
+        compact = (self.compact_reports if compact is None else compact) and delay < _MAX_HELD_DELAY
+
+        # Reuse a previously compiled stream for long texts
+        key = None
+        if cache and self.cache is not None and len(text) >= StreamCache.MIN_TEXT_LENGTH:
+            key = self.cache.key(text, self.layout, wpm, compact)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        data = bytearray()
+        delays: list[float] = []
+        labels: list[str] = []
+        held: bytes | None = None  # Press report still down from the previous keystroke
+
+        for keystroke in self._tokenize(text):
+            report, keys = self._keystroke_report(keystroke)
+
+            if held is not None and _needs_release(held, report):
+                data += _RELEASE
+                delays.append(0.0)
+                labels.append("")
+
+            data += report
+
+            # Hold single keys in compact mode; always release hotkeys
+            if compact and len(keys) == 1:
+                delays.append(delay)
+                labels.append(keys[0])
+                held = report
+            else:
+                data += _RELEASE
+                delays += (0.0, delay)
+                labels += (" + ".join(keys), "")
+                held = None
+
+        if held is not None:
+            data += _RELEASE
+            delays.append(0.0)
+            labels.append("")
+
+        stream = ReportStream(bytes(data), tuple(delays), tuple(labels))
+        if self.cache is not None and key is not None:
+            self.cache.put(key, stream)
+
+        return stream
+
+    def play(self, stream: ReportStream) -> None:
+        """
+        Write a compiled report stream to the device, honoring its delays.
+
+        Delays are scheduled against absolute deadlines, so time spent writing
+        and logging does not slow the effective typing rate. In max-rate mode
+        the stream's delays are ignored and reports are clocked by the host's
+        polling of the endpoint, spaced by at least `min_interval`. The achieved
+        rate is stored in `last_pace`.
+
+        Args:
+            stream (ReportStream): Stream produced by `compile()`.
+        """
+
+        pacer = Pacer()
+        start_count = self.keystroke_count
+
+        for report, delay in self._reports(stream):
+            # Dont execute if in dev mode
+            if not self.disable_keyboard:
+                self._hid.write(report)
+
+            if delay:
+                pacer.wait(delay)
+
+        self.last_pace = pacer.report()
+        self._log_pace(self.last_pace, self.keystroke_count - start_count)
+
+    async def play_async(self, stream: ReportStream) -> None:
+        """
+        Write a compiled report stream to the device without blocking the event loop.
+
+        Reports are written through `loop.add_writer` on the HID device, and
+        pacing uses `asyncio.sleep` against the same deadlines as `play()`. If
+        the task is cancelled or fails mid-stream, all keys are released before
+        the exception propagates.
+
+        Args:
+            stream (ReportStream): Stream produced by `compile()`.
+        """
+
+        pacer = Pacer()
+        start_count = self.keystroke_count
+
+        try:
+            for report, delay in self._reports(stream):
+                # Dont execute if in dev mode
+                if not self.disable_keyboard:
+                    await self._hid.write_async(report)
+
+                if delay:
+                    await asyncio.sleep(pacer.advance(delay))
+        except BaseException:
+            if not self.disable_keyboard:
+                with suppress(OSError, TimeoutError):
+                    self._hid.write(_RELEASE)
+            raise
+
+        self.last_pace = pacer.report()
+        self._log_pace(self.last_pace, self.keystroke_count - start_count)
+
+    def _reports(self, stream: ReportStream) -> Iterator[tuple[memoryview, float]]:
+        """Yield each report of a stream with the pacing interval that follows it, logging keystrokes."""
+
+        view = memoryview(stream.data)
+
+        for i, (delay, label) in enumerate(zip(stream.delays, stream.labels, strict=True)):
+            report = view[i * REPORT_SIZE : (i + 1) * REPORT_SIZE]
 
-        self._write_report(report)
+            if label:
+                self.keystroke_count += 1
 
-    def send(self, text: str, wpm: int | None = None) -> None:
+                # Log the keystrokes as hexdump
+                if self.log_keystrokes:
+                    Logger.debug(f"{self.keystroke_count:05}  {report.hex(' ').upper()}  {label}")
+
+            yield report, (self.min_interval if self.max_rate else delay)
+
+    def _log_pace(self, pace: PaceReport, keystrokes: int) -> None:
+        """Log the achieved vs. requested typing rate of a played stream."""
+
+        if keystrokes < 2 or pace.elapsed <= 0 or pace.scheduled <= 0:
+            return
+
+        achieved = keystrokes * 12 / pace.elapsed  # 5 chars per word, 60 seconds per minute
+        requested = keystrokes * 12 / pace.scheduled
+        Logger.debug(
+            f"Typed {keystrokes} keystrokes in {pace.elapsed:.2f}s ({achieved:.0f} WPM achieved, {requested:.0f} WPM requested)."
+        )
+
+    def send(self, text: str, wpm: int | None = None, verify: SerialConsole | None = None) -> None:
         """
         Parse text and sends keystrokes to the device.
 
         This interprets escape sequences like {KEY:WIN+R} as single hotkeys
-        and processes plain text character-by-character.
+        and processes plain text character-by-character. The whole text is
+        compiled before the first keystroke is sent.
+
+        If a serial console is given for verification, plain text is instead
+        typed in chunks that are each checked against the target's echo (see
+        `_send_verified()`).
 
         Args:
             text (str): Text to send, including any escape sequences.
             wpm (Optional[int]): Per-call words-per-minute override. Defaults to self.wpm.
+            verify (SerialConsole, optional): Console, opened with prebuffering, on which the
+                target echoes typed input. Defaults to no verification.
+
+        Raises:
+            TypingVerificationError: If a chunk still mismatches its echo after `VERIFY_RETRIES` retypes.
         """
 
-        delay = self._wpm_to_delay(self.wpm if wpm is None else wpm)
-        pattern = re.compile(r"\{KEY:(.*?)\}")
-        keystrokes = []
-        pos = 0
+        if verify is not None and not (self.disable_keyboard or verify.disable_serial):
+            self._send_verified(text, self.wpm if wpm is None else wpm, verify)
+            return
 
-        # Add characters to keystrokes and hotkeys as single keystroke.
-        while pos < len(text):
-            match = pattern.search(text, pos)
+        self.play(self.compile(text, wpm))
 
-            if match:
-                escaped_key = match.group(1).replace(" ", "")
+    def _send_verified(self, text: str, wpm: int, console: SerialConsole) -> None:
+        """
+        Type text in chunks, retyping any chunk whose serial echo does not match.
+
+        Hotkeys (e.g., {KEY:ENTER}) and control characters (e.g., newlines and
+        tabs) cannot be undone, and what the target prints in response is no
+        echo, so they are sent unverified once the text before them has been
+        confirmed. A failed chunk is erased
+        with one BACKSPACE per echoed character, or CTRL+U at the start of a line,
+        then retyped.
+
+        The chunk size and WPM adapt additively-increase/multiplicatively-decrease:
+        each verified chunk grows the chunk and speeds up toward the requested WPM,
+        each mismatch halves the chunk and slows down by a quarter.
+        """
 
-                keystrokes.extend(list(text[pos : match.start()]))  # Add all keys as keystroke before hotkey
-                keystrokes.append(escaped_key)  # Add hotkey as single keystroke
+        if not console.buffering:
+            raise ValueError("Verification console must be opened with prebuffering (SerialConsole.open()).")
 
-                pos = match.end()  # Move position past the match
-            else:
-                keystrokes.extend(list(text[pos:]))  # Add remaining text as regular characters
+        # Resume at the last rate that verified, but never above the requested one
+        self.verify_wpm = min(wpm, self.verify_wpm)
+        line_start = True  # Nothing verified on the current input line yet
+        pending: list[str] = []
+
+        def flush() -> None:
+            nonlocal line_start
+            failures = 0
+
+            while pending:
+                chunk = "".join(pending[: self.verify_chunk])
+                echo = self._type_chunk(chunk, console)
+
+                if echo == chunk.encode("utf-8"):
+                    self._adapt_verified(True, wpm)
+                    del pending[: len(chunk)]
+                    line_start = False
+                    failures = 0
+                    continue
+
+                failures += 1
+                if failures > self.VERIFY_RETRIES:
+                    raise TypingVerificationError(f"Echo mismatch after {self.VERIFY_RETRIES} retries: {chunk!r}")
+
+                self._adapt_verified(False, wpm)
+                Logger.debug(f"Echo mismatch ({echo!r} != {chunk!r}). Retrying at {self.verify_wpm} WPM...")
+                self._erase_chunk(echo, console, line_start)
+
+        console.take_buffered()  # Discard output that is not an echo of this text
+
+        for keystroke in self._tokenize(text):
+            if len(keystroke) == 1 and keystroke.isprintable():
+                pending.append(keystroke)
+                continue
+
+            # Control characters (e.g., "\n", "\t") make the target act, just like hotkeys
+            flush()
+            self.play(self.compile(keystroke if len(keystroke) == 1 else f"{{KEY:{keystroke}}}", self.verify_wpm))
+            line_start = True
+
+            # Drop whatever the keystroke caused the target to print
+            while console.wait_for_data(0.1):
+                console.take_buffered()
+
+        flush()
+
+    def _type_chunk(self, chunk: str, console: SerialConsole) -> bytes:
+        """Type one chunk of plain text at the verified rate and return its echo."""
+
+        self.play(self.compile(chunk, self.verify_wpm))
+        return self._collect_echo(console, len(chunk.encode("utf-8")))
+
+    def _adapt_verified(self, ok: bool, wpm: int) -> None:
+        """Grow the chunk size and WPM (up to `wpm`) after a verified chunk, or back off after a mismatch."""
+
+        if ok:
+            self.verify_chunk = min(self.VERIFY_MAX_CHUNK, self.verify_chunk + self.VERIFY_MIN_CHUNK)
+            self.verify_wpm = min(wpm, self.verify_wpm + self.VERIFY_WPM_STEP)
+        else:
+            self.verify_chunk = max(self.VERIFY_MIN_CHUNK, self.verify_chunk // 2)
+            self.verify_wpm = max(self.VERIFY_MIN_WPM, self.verify_wpm * 3 // 4)
+
+    def _collect_echo(self, console: SerialConsole, size: int) -> bytes:
+        """Gather echoed bytes until `size` have arrived or the echo goes quiet."""
+
+        echo = bytearray()
+        deadline = time.monotonic() + self.VERIFY_TIMEOUT
+
+        while len(echo) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not console.wait_for_data(remaining):
                 break
+            echo += console.take_buffered().replace(b"\r", b"")
+
+        return bytes(echo)
+
+    def _erase_chunk(self, echo: bytes, console: SerialConsole, line_start: bool) -> None:
+        """Remove a mistyped chunk, as echoed by the target, from its input line."""
+
+        if line_start:
+            self.play(self.compile("{KEY:CTRL+u}", self.verify_wpm))
+        else:
+            erase = "{KEY:BACKSPACE}" * len(echo.decode("utf-8", "replace"))
+            self.play(self.compile(erase, self.verify_wpm))
+
+        # Let the erase echo settle, then drop it
+        time.sleep(self.VERIFY_TIMEOUT)
+        console.take_buffered()
+
+    def upload(
+        self,
+        path: str,
+        remote: str | None = None,
+        decoder: str = "auto",
+        wpm: int | None = None,
+        platform: str = "macos",
+    ) -> UploadReport:
+        """
+        Type a local file onto the target, with no channel but the keyboard.
+
+        The target must have a shell prompt focused. A receiver one-liner is
+        typed first, then the file as lines of encoded text, each carrying the
+        CRC of the line. The target decodes lines that verify with a stock
+        tool and only renames the file into place if every line and the whole
+        file verified, printing the outcome; nothing comes back to PiRate, so
+        the report covers the typing only.
+
+        With ``decoder="auto"``, of the encodings the platform can decode with
+        stock tools, the one whose compiled report stream is shortest for this
+        layout and report mode is used: unshifted alphabets and fewer repeated
+        keys mean fewer reports, so fewer chances for the host to drop one. A
+        named decoder is used as given, whether or not it is stock there.
+
+        Args:
+            path (str): File to upload.
+            remote (str, optional): Path on the target. Defaults to the file's name.
+            decoder (str): Encoding name in `ENCODINGS` (e.g., "base32"), or "auto". Defaults to "auto".
+            wpm (Optional[int]): Per-call words-per-minute override. Defaults to self.wpm.
+            platform (str): Target platform, one of `PLATFORMS`. Defaults to "macos".
+
+        Returns:
+            UploadReport: Encoding used, reports typed, and the achieved rate.
+
+        Raises:
+            ValueError: If the decoder is not "auto" or a known encoding, or the platform is not supported.
+            KeymapError: If the encoding cannot be typed on the layout.
+        """
+
+        with open(path, "rb") as f:
+            data = f.read()
+        remote = remote if remote is not None else os.path.basename(path)
+
+        encoding = self._upload_encoding(data, decoder, wpm, platform)
+        lines = encoding.lines(data)
+        streams = [self.compile(text, wpm, cache=False) for text in (encoding.receiver(data, remote), *lines, TERMINATOR)]
+
+        start = time.monotonic()
+        for stream in streams:
+            self.play(stream)
+
+        report = UploadReport(len(data), encoding.name, len(lines), sum(map(len, streams)), time.monotonic() - start)
+        Logger.info(
+            f"Typed {report.size} bytes of '{path}' as {report.encoding} in {report.elapsed:.1f}s "
+            f"({report.rate:.0f} B/s, {report.reports} reports)."
+        )
+        return report
+
+    def _upload_encoding(self, data: bytes, decoder: str, wpm: int | None, platform: str) -> Encoding:
+        """Return the named encoding, or the platform's one typing a sample of data in the fewest reports."""
+
+        if platform not in PLATFORMS:
+            raise ValueError(f"Unsupported platform '{platform}'. Expected one of: {', '.join(PLATFORMS)}.")
+
+        if decoder != "auto":
+            encoding = ENCODINGS.get(decoder)
+            if encoding is None:
+                raise ValueError(f"Unknown upload decoder '{decoder}'. Choose from: auto, {', '.join(ENCODINGS)}.")
+            return encoding
+
+        sample = data[: self.UPLOAD_SAMPLE]
+        costs: dict[str, int] = {}
+        for encoding in ENCODINGS.values():
+            if platform not in encoding.platforms:
+                continue
+            with suppress(KeymapError):
+                costs[encoding.name] = sum(len(self.compile(text, wpm, cache=False)) for text in encoding.lines(sample))
+
+        if not costs:
+            raise KeymapError(f"No upload encoding for {platform} can be typed on this layout.")
+
+        name = min(costs, key=costs.__getitem__)
+        Logger.debug(f"Upload reports per sample: {costs}. Using {name}.")
+        return ENCODINGS[name]
+
+    async def send_async(self, text: str, wpm: int | None = None) -> None:
+        """
+        Asynchronous counterpart of `send()`.
 
-        # Loop through key codes and send to HID
-        for key in keystrokes:
-            self._process_keystroke(key)
-            time.sleep(delay)
+        The text is compiled up front, then typed with `play_async()` so other
+        coroutines (e.g., serial I/O) keep running between keystrokes.
+
+        Args:
+            text (str): Text to send, including any escape sequences.
+            wpm (Optional[int]): Per-call words-per-minute override. Defaults to self.wpm.
+        """
+
+        await self.play_async(self.compile(text, wpm))
+
+
+def _needs_release(held: bytes, report: bytes) -> bool:
+    """Return whether a held report must be released before sending the next one."""
+
+    # Modifier changes must not apply to the held key, and a repeated keycode only
+    # registers as a new press after it has been seen released.
+    return held[0] != report[0] or any(code and code in held[2:] for code in report[2:])
 
 
 class KeymapError(Exception):
@@ -171,3 +676,9 @@ class HIDReportError(Exception):
     """Custom exception for HID report errors."""
 
     pass
+
+
+class TypingVerificationError(Exception):
+    """Custom exception for typed text that repeatedly failed echo verification."""
+
+    pass
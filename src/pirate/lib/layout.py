@@ -0,0 +1,74 @@
+"""
+Compiled keyboard layouts for PiRate.
+
+This module provides the `CompiledLayout` class, which parses a layout JSON
+file from ``resources/layouts`` once into integer `(modifier, keycode)` pairs
+and prebuilt 8-byte HID press reports. Compiled layouts are cached
+process-wide per layout name.
+"""
+
+import hashlib
+import json
+import threading
+from importlib.resources import files
+from typing import ClassVar, cast
+
+Keymap = dict[str, list[str]]
+
+
+class CompiledLayout:
+    """
+    A keyboard layout parsed into ready-to-use lookup tables.
+
+    Attributes:
+        keymap (Keymap): The raw layout mapping of key name to hex `[modifier, keycode]` strings.
+        codes (dict[str, tuple[int, int]]): Key name or character to `(modifier, keycode)`.
+        reports (dict[str, bytes]): Key name or character to its 8-byte HID press report.
+        digest (str): SHA-256 of the normalized keymap, identifying the layout's content.
+    """
+
+    _cache: ClassVar[dict[str, "CompiledLayout"]] = {}
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, keymap: Keymap):
+        """
+        Compile a raw keymap into lookup tables.
+
+        Args:
+            keymap (Keymap): Mapping of key name to hex `[modifier, keycode]` strings.
+        """
+
+        self.keymap = keymap
+        self.codes: dict[str, tuple[int, int]] = {}
+        self.reports: dict[str, bytes] = {}
+        self.digest = hashlib.sha256(json.dumps(keymap, sort_keys=True).encode("utf-8")).hexdigest()
+
+        for key, (modifier, keycode) in keymap.items():
+            mod, code = int(modifier, 16), int(keycode, 16)
+            self.codes[key] = (mod, code)
+            self.reports[key] = bytes([mod, 0x00, code, 0x00, 0x00, 0x00, 0x00, 0x00])
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether a key name or character is mapped by the layout."""
+
+        return key in self.codes
+
+    @classmethod
+    def load(cls, name: str) -> "CompiledLayout":
+        """
+        Return the compiled layout for a bundled layout name, compiling it on first use.
+
+        Args:
+            name (str): Layout name under ``resources/layouts`` (e.g., "us").
+
+        Returns:
+            CompiledLayout: The shared compiled layout.
+        """
+
+        with cls._lock:
+            layout = cls._cache.get(name)
+            if layout is None:
+                data = files("pirate").joinpath(f"resources/layouts/{name}.json").read_text(encoding="utf-8")
+                layout = cls._cache[name] = cls(cast(Keymap, json.loads(data)))
+
+        return layout
@@ -0,0 +1,441 @@
+"""
+USB mass-storage payload volumes for PiRate.
+
+This module provides `build_image()`, a pure-Python writer for small FAT12/16
+disk images holding a flat directory of files, and the `MassStorage` class,
+which builds such an image from a payload directory and attaches, ejects, or
+swaps it on the gadget's ``mass_storage.usb0`` function. Keyboard payloads can
+then type a short command that runs a script from the mounted volume.
+"""
+
+import math
+import os
+import re
+import shutil
+import struct
+import tempfile
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+
+SECTOR_SIZE = 512
+MIN_IMAGE_SIZE = 1024 * 1024
+
+_ROOT_ENTRIES = 512
+_ROOT_SECTORS = _ROOT_ENTRIES * 32 // SECTOR_SIZE
+_RESERVED_SECTORS = 1
+_NUM_FATS = 2
+_FAT12_MAX_CLUSTERS = 4084
+_FAT16_MAX_CLUSTERS = 65524
+_SHORT_CHARS = re.compile(r"[^A-Z0-9!#$%&'()@^_`{}~-]")
+
+
+@dataclass(frozen=True)
+class _Geometry:
+    """Sizes of the regions of a FAT12/16 volume."""
+
+    total_sectors: int
+    sectors_per_cluster: int
+    fat_sectors: int
+    clusters: int
+
+    @property
+    def fat_bits(self) -> int:
+        return 12 if self.clusters <= _FAT12_MAX_CLUSTERS else 16
+
+    @property
+    def cluster_size(self) -> int:
+        return self.sectors_per_cluster * SECTOR_SIZE
+
+    @property
+    def root_offset(self) -> int:
+        return (_RESERVED_SECTORS + _NUM_FATS * self.fat_sectors) * SECTOR_SIZE
+
+    @property
+    def data_offset(self) -> int:
+        return self.root_offset + _ROOT_SECTORS * SECTOR_SIZE
+
+
+def _geometry(size: int) -> _Geometry:
+    """Pick the smallest cluster size that gives a valid FAT12/16 volume of `size` bytes."""
+
+    total = size // SECTOR_SIZE
+
+    for spc in (1, 2, 4, 8, 16, 32, 64):
+        # FAT size depends on the cluster count, which depends on the FAT size; iterate to a fixed point
+        fat_sectors = 1
+        while True:
+            clusters = (total - _RESERVED_SECTORS - _ROOT_SECTORS - _NUM_FATS * fat_sectors) // spc
+            bits = 12 if clusters <= _FAT12_MAX_CLUSTERS else 16
+            needed = math.ceil((clusters + 2) * bits / 8 / SECTOR_SIZE)
+            if needed <= fat_sectors:
+                break
+            fat_sectors = needed
+
+        if 0 < clusters <= _FAT16_MAX_CLUSTERS:
+            return _Geometry(total, spc, fat_sectors, clusters)
+
+    raise ValueError(f"Image size {size} is outside the FAT12/16 range.")
+
+
+def _short_name(name: str, taken: set[bytes]) -> tuple[bytes, bool]:
+    """Return a unique 8.3 directory name for a file, and whether it needs a long name entry."""
+
+    base, dot, ext = name.rpartition(".")
+    if not dot:
+        base, ext = name, ""
+
+    # Names that already are plain upper-case 8.3 are stored as-is
+    if 0 < len(base) <= 8 and len(ext) <= 3 and name.count(".") <= 1 and not _SHORT_CHARS.search(base + ext):
+        short = base.encode("ascii").ljust(8) + ext.encode("ascii").ljust(3)
+        if short not in taken:
+            taken.add(short)
+            return short, False
+
+    stem = _SHORT_CHARS.sub("_", base.upper().replace(" ", "").lstrip(".")) or "_"
+    suffix = _SHORT_CHARS.sub("_", ext.upper().replace(" ", ""))[:3].encode("ascii").ljust(3)
+
+    for n in range(1, 1000000):
+        tail = f"~{n}"
+        short = (stem[: 8 - len(tail)] + tail).encode("ascii").ljust(8) + suffix
+        if short not in taken:
+            taken.add(short)
+            return short, True
+
+    raise ValueError(f"Unable to generate a short name for '{name}'.")
+
+
+def _lfn_entries(name: str, short: bytes) -> list[bytes]:
+    """Return the VFAT long file name entries for a name, in on-disk order."""
+
+    checksum = 0
+    for c in short:
+        checksum = (((checksum & 1) << 7) + (checksum >> 1) + c) & 0xFF
+
+    units = name.encode("utf-16-le")
+    units += b"\x00\x00" if len(units) % 26 else b""
+    units = units.ljust(math.ceil(len(units) / 26) * 26, b"\xff")
+    parts = [units[i : i + 26] for i in range(0, len(units), 26)]
+
+    entries = []
+    for i, part in enumerate(parts, start=1):
+        order = i | (0x40 if i == len(parts) else 0)
+        entries.append(struct.pack("<B10sBBB12sH4s", order, part[:10], 0x0F, 0, checksum, part[10:22], 0, part[22:]))
+
+    return entries[::-1]
+
+
+def _dos_datetime(timestamp: float) -> tuple[int, int]:
+    """Convert a timestamp to FAT (date, time) fields."""
+
+    t = time.localtime(max(timestamp, 315532800))  # FAT dates start at 1980
+    date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    clock = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    return date, clock
+
+
+def _file_size(source: Path | bytes) -> int:
+    """Return the size of an in-memory or on-disk file."""
+
+    return len(source) if isinstance(source, bytes) else source.stat().st_size
+
+
+def image_size(sizes: Iterable[int]) -> int:
+    """
+    Return the smallest image size, in whole 64 KiB steps, that holds files of the given sizes.
+
+    Args:
+        sizes (Iterable[int]): Size of each file in bytes.
+
+    Returns:
+        int: Image size in bytes, at least `MIN_IMAGE_SIZE`.
+    """
+
+    sizes = list(sizes)
+    size = MIN_IMAGE_SIZE
+
+    while True:
+        geo = _geometry(size)
+        if sum(math.ceil(s / geo.cluster_size) for s in sizes) <= geo.clusters:
+            return size
+        size = math.ceil(size * 1.25 / 65536) * 65536
+
+
+def build_image(path: str | Path, files: Mapping[str, Path | bytes], size: int | None = None, label: str = "PIRATE") -> int:
+    """
+    Write a FAT12/16 image holding a flat directory of files.
+
+    The FAT type follows from the cluster count, as hosts expect. Files are
+    stored contiguously; names that are not upper-case 8.3 get VFAT long name
+    entries. The image file is created sparse.
+
+    Args:
+        path (str | Path): Image file to (over)write.
+        files (Mapping[str, Path | bytes]): File name on the volume to a source path or contents.
+        size (int, optional): Image size in bytes. Defaults to `image_size()` of the files.
+        label (str): Volume label, up to 11 characters. Defaults to "PIRATE".
+
+    Returns:
+        int: The image size in bytes.
+
+    Raises:
+        ValueError: If a name is invalid, or the files don't fit the size or the root directory.
+    """
+
+    sizes = {name: _file_size(source) for name, source in files.items()}
+    size = size if size is not None else image_size(sizes.values())
+    geo = _geometry(size)
+    stamp = time.time()
+
+    # Directory entries and cluster chains
+    taken: set[bytes] = set()
+    entries = [label.upper().encode("ascii")[:11].ljust(11) + struct.pack("<B20x", 0x08)]
+    chains: list[tuple[str, int, int]] = []  # name, first cluster, cluster count
+    cluster = 2
+
+    for name, source in files.items():
+        if not name or "/" in name or "\\" in name or name in (".", ".."):
+            raise ValueError(f"Invalid file name '{name}'. Only a flat directory is supported.")
+
+        short, needs_lfn = _short_name(name, taken)
+        if needs_lfn:
+            entries += _lfn_entries(name, short)
+
+        count = math.ceil(sizes[name] / geo.cluster_size)
+        first = cluster if count else 0
+        date, clock = _dos_datetime(stamp if isinstance(source, bytes) else source.stat().st_mtime)
+        entries.append(short + struct.pack("<BBBHHHHHHHI", 0x20, 0, 0, clock, date, date, 0, clock, date, first, sizes[name]))
+        chains.append((name, first, count))
+        cluster += count
+
+    if cluster - 2 > geo.clusters:
+        raise ValueError(f"Files need {cluster - 2} clusters but a {size}-byte image only has {geo.clusters}.")
+    if len(entries) > _ROOT_ENTRIES:
+        raise ValueError(f"Files need {len(entries)} directory entries but the root directory only has {_ROOT_ENTRIES}.")
+
+    # File allocation table
+    fat = bytearray(geo.fat_sectors * SECTOR_SIZE)
+    eoc = 0xFFF if geo.fat_bits == 12 else 0xFFFF
+
+    def set_fat(n: int, value: int) -> None:
+        if geo.fat_bits == 16:
+            struct.pack_into("<H", fat, n * 2, value)
+            return
+
+        off = n * 3 // 2
+        if n % 2:
+            fat[off] = (fat[off] & 0x0F) | ((value << 4) & 0xF0)
+            fat[off + 1] = (value >> 4) & 0xFF
+        else:
+            fat[off] = value & 0xFF
+            fat[off + 1] = (fat[off + 1] & 0xF0) | ((value >> 8) & 0x0F)
+
+    set_fat(0, eoc & ~0xFF | 0xF8)  # Media descriptor
+    set_fat(1, eoc)
+    for _, first, count in chains:
+        for n in range(first, first + count):
+            set_fat(n, n + 1 if n < first + count - 1 else eoc)
+
+    # Boot sector with a DOS 4.0 extended BIOS parameter block
+    boot = bytearray(SECTOR_SIZE)
+    struct.pack_into(
+        "<3s8sHBHBHHBHHHIIBBBI11s8s",
+        boot,
+        0,
+        b"\xeb\x3c\x90",
+        b"MSWIN4.1",
+        SECTOR_SIZE,
+        geo.sectors_per_cluster,
+        _RESERVED_SECTORS,
+        _NUM_FATS,
+        _ROOT_ENTRIES,
+        geo.total_sectors if geo.total_sectors < 0x10000 else 0,
+        0xF8,
+        geo.fat_sectors,
+        32,
+        64,
+        0,
+        geo.total_sectors if geo.total_sectors >= 0x10000 else 0,
+        0x80,
+        0,
+        0x29,
+        int(stamp) & 0xFFFFFFFF,
+        label.upper().encode("ascii")[:11].ljust(11),
+        f"FAT{geo.fat_bits}".encode("ascii").ljust(8),
+    )
+    boot[510:512] = b"\x55\xaa"
+
+    with open(path, "wb") as f:
+        f.truncate(geo.total_sectors * SECTOR_SIZE)
+        f.write(boot)
+        f.seek(_RESERVED_SECTORS * SECTOR_SIZE)
+        f.write(bytes(fat) * _NUM_FATS)
+        f.seek(geo.root_offset)
+        f.write(b"".join(entries))
+
+        for name, first, count in chains:
+            if not count:
+                continue
+
+            f.seek(geo.data_offset + (first - 2) * geo.cluster_size)
+            source = files[name]
+            if isinstance(source, bytes):
+                f.write(source)
+            else:
+                with open(source, "rb") as src:
+                    shutil.copyfileobj(src, f, 1024 * 1024)
+
+    return geo.total_sectors * SECTOR_SIZE
+
+
+class MassStorage:
+    """
+    Manage the image behind the gadget's mass-storage LUN.
+
+    The gadget function itself is created by ``gadget.sh`` when enabled in
+    config. This class builds payload images and points the LUN's ``file``
+    attribute at them; an empty ``file`` means no medium is inserted.
+    """
+
+    # Where typed commands find the volume on each target platform
+    MOUNT_POINTS = {
+        "macos": "/Volumes/{label}",
+        "linux": '$(findmnt -nro TARGET -S LABEL="{label}")',
+    }
+
+    def __init__(self, image: str | None = None, lun: str | None = None, label: str | None = None):
+        """
+        Initialize a mass-storage manager.
+
+        Args:
+            image (str, optional): Image file path. Defaults to config value.
+            lun (str, optional): Gadget LUN directory in configfs. Defaults to config value.
+            label (str, optional): Volume label for built images. Defaults to config value.
+        """
+
+        self.image = Path(image if image is not None else Config.get("mass_storage", "image", "/var/lib/pirate/storage.img"))
+        self.lun = Path(
+            lun
+            if lun is not None
+            else Config.get("mass_storage", "lun", "/sys/kernel/config/usb_gadget/pirate/functions/mass_storage.usb0/lun.0")
+        )
+        self.label = label if label is not None else Config.get("mass_storage", "label", "PIRATE")
+
+    def build(self, source: str | Path, path: str | Path | None = None, size: int | None = None) -> Path:
+        """
+        Build an image from the regular files at the top of a payload directory.
+
+        Args:
+            source (str | Path): Payload directory. Subdirectories are skipped.
+            path (str | Path, optional): Image file to write. Defaults to `image`.
+            size (int, optional): Image size in bytes. Defaults to the smallest that fits.
+
+        Returns:
+            Path: The written image.
+        """
+
+        path = Path(path if path is not None else self.image)
+        files: dict[str, Path | bytes] = {}
+        for entry in sorted(Path(source).iterdir()):
+            if entry.is_file():
+                files[entry.name] = entry
+            else:
+                Logger.debug(f"Skipping '{entry}': only a flat directory of files is supported.")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        written = build_image(path, files, size=size, label=self.label)
+        Logger.debug(f"Built {written}-byte mass-storage image '{path}' with {len(files)} file(s).")
+        return path
+
+    @property
+    def attached(self) -> bool:
+        """Whether an image is currently inserted in the LUN."""
+
+        try:
+            return bool((self.lun / "file").read_text().strip())
+        except OSError:
+            return False
+
+    def attach(self, path: str | Path | None = None) -> None:
+        """
+        Insert an image into the LUN.
+
+        Args:
+            path (str | Path, optional): Image to insert. Defaults to `image`.
+
+        Raises:
+            FileNotFoundError: If the mass-storage function is not enabled in the gadget.
+        """
+
+        (self.lun / "file").write_text(str(Path(path if path is not None else self.image).resolve()))
+
+    def eject(self) -> None:
+        """
+        Remove the image from the LUN, even if the host still has it mounted.
+
+        Raises:
+            FileNotFoundError: If the mass-storage function is not enabled in the gadget.
+        """
+
+        forced = self.lun / "forced_eject"
+        if forced.exists():
+            forced.write_text("1")
+        else:
+            (self.lun / "file").write_text("")
+
+    def swap(self, source: str | Path, size: int | None = None) -> Path:
+        """
+        Build a new image from a payload directory and present it to the host as a media change.
+
+        The image is built beside the current one and moved into place, so an
+        attached image is never half-written.
+
+        Args:
+            source (str | Path): Payload directory.
+            size (int, optional): Image size in bytes. Defaults to the smallest that fits.
+
+        Returns:
+            Path: The attached image.
+        """
+
+        self.image.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.image.parent, suffix=".img")
+        os.close(fd)
+
+        try:
+            self.build(source, tmp, size)
+            if self.attached:
+                self.eject()
+            os.replace(tmp, self.image)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        self.attach()
+        return self.image
+
+    def run_command(self, name: str, platform: str = "macos", shell: str = "sh") -> str:
+        """
+        Return a one-line command that waits for the volume to mount, then runs a file from it.
+
+        Args:
+            name (str): File name on the volume.
+            platform (str): Target platform, a key of `MOUNT_POINTS`. Defaults to "macos".
+            shell (str): Interpreter to run the file with. Defaults to "sh".
+
+        Returns:
+            str: Command to type on the target.
+
+        Raises:
+            ValueError: If the platform is not supported.
+        """
+
+        if platform not in self.MOUNT_POINTS:
+            raise ValueError(f"Unsupported platform '{platform}'. Expected one of: {', '.join(self.MOUNT_POINTS)}.")
+
+        target = f'"{self.MOUNT_POINTS[platform].format(label=self.label)}/{name}"'
+        return f"until [ -f {target} ];do sleep .2;done;{shell} {target}"
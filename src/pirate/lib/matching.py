@@ -0,0 +1,172 @@
+"""
+Streaming byte-pattern matching for PiRate.
+
+This module provides the `MarkerMatcher` class, which finds any of several
+byte markers in a stream fed chunk by chunk. Only the new data and a
+``len(marker) - 1`` byte overlap from the previous chunk are searched, so the
+cost per byte stays constant however the stream is chunked.
+
+It also provides `PatternAutomaton`, an Aho-Corasick automaton that reports
+every occurrence of many patterns in a single pass, for stream hooks.
+"""
+
+from collections import deque
+from collections.abc import Sequence
+
+
+class MarkerMatcher:
+    """
+    Find the first occurrence of any of several byte markers in a chunked stream.
+
+    Markers that straddle chunk boundaries are found by keeping the last
+    ``longest - 1`` bytes of the stream and searching them together with the
+    start of the next chunk. After a match the stream state is cleared, so
+    each marker occurrence is reported once.
+    """
+
+    def __init__(self, *markers: bytes):
+        """
+        Initialize a matcher.
+
+        Args:
+            *markers (bytes): Non-empty markers to look for.
+
+        Raises:
+            ValueError: If no markers are given or a marker is empty.
+        """
+
+        if not markers or not all(markers):
+            raise ValueError("MarkerMatcher needs at least one non-empty marker.")
+
+        self.markers = markers
+        self._overlap = max(len(m) for m in markers) - 1
+        self._tail = b""
+
+    def reset(self) -> None:
+        """Forget any partial marker carried over from previous chunks."""
+
+        self._tail = b""
+
+    def feed(self, data: bytes | bytearray, end: int | None = None) -> tuple[bytes, int] | None:
+        """
+        Search the next chunk of the stream.
+
+        Args:
+            data (bytes | bytearray): Next chunk of the stream.
+            end (int, optional): Use only ``data[:end]``, so a reused read buffer can be
+                searched in place. Defaults to all of `data`.
+
+        Returns:
+            tuple[bytes, int] | None: The marker that completes earliest in the stream and the
+                offset in `data` just past its last byte, or None if no marker completes.
+        """
+
+        tail = self._tail
+        window = tail + (data if end is None else data[:end])
+        best: tuple[bytes, int] | None = None
+
+        # The tail holds no whole marker (it was searched last time), so any hit ends in this chunk
+        for marker in self.markers:
+            i = window.find(marker)
+            if i >= 0 and (best is None or i + len(marker) < best[1]):
+                best = (marker, i + len(marker))
+
+        if best is None:
+            self._tail = window[-self._overlap :] if self._overlap else b""
+            return None
+
+        self._tail = b""
+        return best[0], best[1] - len(tail)
+
+
+class PatternAutomaton:
+    """
+    Aho-Corasick automaton reporting every occurrence of many byte patterns in a stream.
+
+    The automaton is compiled to a full transition table, so each input byte
+    costs one table lookup regardless of how many patterns are registered.
+    The automaton state carries across `feed()` calls, so occurrences that
+    straddle chunk boundaries are found.
+    """
+
+    def __init__(self, patterns: Sequence[bytes]):
+        """
+        Compile an automaton.
+
+        Args:
+            patterns (Sequence[bytes]): Non-empty patterns to look for. Duplicates are allowed
+                and reported separately.
+
+        Raises:
+            ValueError: If a pattern is empty.
+        """
+
+        if not all(patterns):
+            raise ValueError("PatternAutomaton patterns must be non-empty.")
+
+        self.patterns = tuple(patterns)
+        self.longest = max((len(p) for p in self.patterns), default=0)
+
+        # Trie of the patterns
+        goto: list[dict[int, int]] = [{}]
+        out: list[list[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for byte in pattern:
+                if byte not in goto[state]:
+                    goto.append({})
+                    out.append([])
+                    goto[state][byte] = len(goto) - 1
+                state = goto[state][byte]
+            out[state].append(index)
+
+        # Breadth-first, fill in every transition via the failure links
+        delta = [[0] * 256 for _ in goto]
+        for byte, child in goto[0].items():
+            delta[0][byte] = child
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            out[state].extend(out[fail[state]])
+
+            row = delta[state]
+            row[:] = delta[fail[state]]
+            for byte, child in goto[state].items():
+                fail[child] = delta[fail[state]][byte]
+                row[byte] = child
+                queue.append(child)
+
+        self._delta = delta
+        self._out = [tuple(o) for o in out]
+        self.state = 0
+
+    def reset(self) -> None:
+        """Return to the start state, forgetting any partial match."""
+
+        self.state = 0
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[tuple[int, int]]:
+        """
+        Advance the automaton over the next chunk of the stream.
+
+        Args:
+            data (bytes | bytearray | memoryview): Next chunk of the stream.
+
+        Returns:
+            list[tuple[int, int]]: ``(pattern index, offset in data just past the match)`` for
+                every occurrence completed in `data`, in stream order.
+        """
+
+        delta, out = self._delta, self._out
+        state = self.state
+        hits: list[tuple[int, int]] = []
+
+        for i, byte in enumerate(data):
+            state = delta[state][byte]
+            if out[state]:
+                hits.extend((index, i + 1) for index in out[state])
+
+        self.state = state
+        return hits
@@ -0,0 +1,603 @@
+"""
+Multiplexed channels over the serial link for PiRate.
+
+This module provides the `Mux` class, which runs several concurrent logical
+channels (an interactive shell, commands, file transfers) over the single
+CDC-ACM link, and `Channel`, one end of such a channel. Bytes travel in
+frames of ``magic, channel, type, length, payload, CRC-32``; each channel
+has its own flow-control window, so a bulk transfer cannot starve a shell
+and a slow reader cannot stall the link. `Mux.script()` returns the shell
+script that starts the target-side shim, to push with `Delivery`.
+"""
+
+import os
+import select
+import struct
+import threading
+import time
+import zlib
+from contextlib import suppress
+from dataclasses import dataclass
+from importlib.resources import files
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole, SerialLike
+
+MAGIC = b"PX"
+HEADER = struct.Struct(">2sBBH")
+
+# Frame types
+OPEN = 1
+DATA = 2
+WINDOW = 3
+EOF = 4
+CLOSE = 5
+
+
+@dataclass(frozen=True)
+class Frame:
+    """
+    One decoded frame.
+
+    Attributes:
+        channel (int): Channel id, 1-255; 0 addresses the link itself.
+        kind (int): Frame type (`OPEN`, `DATA`, `WINDOW`, `EOF`, or `CLOSE`).
+        payload (bytes): Frame payload.
+    """
+
+    channel: int
+    kind: int
+    payload: bytes = b""
+
+    def encode(self) -> bytes:
+        """
+        Return the frame as sent on the link.
+
+        Returns:
+            bytes: Header, payload, and big-endian CRC-32 of both.
+        """
+
+        header = HEADER.pack(MAGIC, self.channel, self.kind, len(self.payload))
+        return header + self.payload + zlib.crc32(header + self.payload).to_bytes(4, "big")
+
+
+class FrameDecoder:
+    """
+    Split a byte stream into frames.
+
+    Bytes before a frame's magic (e.g., shell echo before the shim starts)
+    are skipped, and a frame whose header is implausible or whose CRC does
+    not match is skipped by resynchronizing on the next magic.
+
+    Attributes:
+        errors (int): Frames discarded for a bad CRC.
+    """
+
+    def __init__(self, max_payload: int):
+        """
+        Initialize a decoder.
+
+        Args:
+            max_payload (int): Largest payload accepted; longer lengths are treated as noise.
+        """
+
+        self.max_payload = max_payload
+        self.errors = 0
+        self._buf = bytearray()
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[Frame]:
+        """
+        Decode the next chunk of the stream.
+
+        Args:
+            data (bytes | bytearray | memoryview): Next chunk of the stream.
+
+        Returns:
+            list[Frame]: Frames completed by `data`, in stream order.
+        """
+
+        buf = self._buf
+        buf += data
+        frames = []
+        pos = 0
+
+        while True:
+            i = buf.find(MAGIC, pos)
+            if i < 0:
+                pos = max(pos, len(buf) - len(MAGIC) + 1)
+                break
+            if len(buf) - i < HEADER.size:
+                pos = i
+                break
+
+            _, channel, kind, length = HEADER.unpack_from(buf, i)
+            end = i + HEADER.size + length + 4
+            if not OPEN <= kind <= CLOSE or length > self.max_payload:
+                pos = i + 1
+                continue
+            if len(buf) < end:
+                pos = i
+                break
+            if int.from_bytes(buf[end - 4 : end], "big") != zlib.crc32(buf[i : end - 4]):
+                self.errors += 1
+                pos = i + 1
+                continue
+
+            frames.append(Frame(channel, kind, bytes(buf[i + HEADER.size : end - 4])))
+            pos = end
+
+        del buf[:pos]
+        return frames
+
+
+class Channel:
+    """
+    One logical channel of a `Mux`, with blocking, timeout-aware reads and writes.
+
+    Writes wait for window granted by the target, and reading grants the
+    target more window, so neither side buffers more than `Mux.window` bytes
+    per channel.
+
+    Attributes:
+        id (int): Channel id.
+        request (str): Service the channel was opened with (e.g., "shell").
+        status (int | None): Exit status once the target closed the channel, else None.
+    """
+
+    def __init__(self, mux: "Mux", channel_id: int, request: str):
+        """
+        Initialize a channel; use `Mux.open()`.
+
+        Args:
+            mux (Mux): Owning multiplexer.
+            channel_id (int): Channel id.
+            request (str): Service request sent in the OPEN frame.
+        """
+
+        self.mux = mux
+        self.id = channel_id
+        self.request = request
+        self.status: int | None = None
+
+        self._cond = threading.Condition()
+        self._buf = bytearray()
+        self._credit = mux.window
+        self._consumed = 0
+        self._ended = False
+
+    @property
+    def closed(self) -> bool:
+        """Whether the channel has ended (closed by either side, or the link went away)."""
+
+        return self._ended
+
+    def read(self, size: int = 65536, timeout: float | None = None) -> bytes:
+        """
+        Read up to `size` bytes, waiting for at least one.
+
+        Args:
+            size (int): Most bytes to return. Defaults to 65536.
+            timeout (float, optional): Seconds to wait. None waits indefinitely.
+
+        Returns:
+            bytes: Output, or ``b""`` once the channel has ended and everything was read.
+
+        Raises:
+            TimeoutError: If nothing arrived within `timeout`.
+        """
+
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._buf or self._ended, timeout):
+                raise TimeoutError(f"No output on channel {self.id} within {timeout}s.")
+
+            data = bytes(self._buf[:size])
+            del self._buf[:size]
+
+            # Grant the target more window once half of it has been consumed
+            self._consumed += len(data)
+            grant = self._consumed if self._consumed >= self.mux.window // 2 and not self._ended else 0
+            if grant:
+                self._consumed = 0
+
+        if grant:
+            self.mux._send(Frame(self.id, WINDOW, grant.to_bytes(4, "big")))
+
+        return data
+
+    def read_all(self, timeout: float | None = None) -> bytes:
+        """
+        Read until the channel ends.
+
+        Args:
+            timeout (float, optional): Seconds to wait in total. None waits indefinitely.
+
+        Returns:
+            bytes: Everything output on the channel.
+
+        Raises:
+            TimeoutError: If the channel did not end within `timeout`.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        out = bytearray()
+
+        while chunk := self.read(timeout=None if deadline is None else max(deadline - time.monotonic(), 0.0)):
+            out += chunk
+
+        return bytes(out)
+
+    def write(self, data: bytes, timeout: float | None = None) -> None:
+        """
+        Send bytes, waiting for window as needed.
+
+        Args:
+            data (bytes): Bytes for the channel's process.
+            timeout (float, optional): Seconds to wait for window. None waits indefinitely.
+
+        Raises:
+            TimeoutError: If the target did not grant enough window within `timeout`.
+            MuxError: If the channel has ended, or the link stayed full for `Mux.WRITE_TIMEOUT` seconds.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        view = memoryview(data)
+
+        while view:
+            with self._cond:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+                if not self._cond.wait_for(lambda: self._credit > 0 or self._ended, remaining):
+                    raise TimeoutError(f"Channel {self.id} window stayed closed for {timeout}s.")
+                if self._ended:
+                    raise MuxError(f"Channel {self.id} has ended.")
+
+                n = min(len(view), self._credit, self.mux.max_payload)
+                self._credit -= n
+
+            self.mux._send(Frame(self.id, DATA, bytes(view[:n])))
+            view = view[n:]
+
+    def send_eof(self) -> None:
+        """Tell the target no more input follows (closes the process's stdin, or sends Ctrl-D to a shell)."""
+
+        if not self._ended:
+            self.mux._send(Frame(self.id, EOF))
+
+    def wait(self, timeout: float | None = None) -> int | None:
+        """
+        Wait for the channel to end.
+
+        Args:
+            timeout (float, optional): Seconds to wait. None waits indefinitely.
+
+        Returns:
+            int | None: Exit status, or None on timeout or if the link went away.
+        """
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._ended, timeout)
+            return self.status
+
+    def close(self) -> None:
+        """Hang up the channel's process; the channel ends when the target confirms."""
+
+        if not self._ended:
+            self.mux._send(Frame(self.id, CLOSE))
+
+    def _on_frame(self, frame: Frame) -> None:
+        """Apply a frame received from the target."""
+
+        with self._cond:
+            if frame.kind == DATA:
+                self._buf += frame.payload
+            elif frame.kind == WINDOW:
+                self._credit += int.from_bytes(frame.payload, "big")
+            elif frame.kind == CLOSE:
+                with suppress(ValueError):
+                    self.status = int(frame.payload)
+                self._ended = True
+            self._cond.notify_all()
+
+    def _on_lost(self) -> None:
+        """End the channel because the link went away."""
+
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+
+
+class Mux:
+    """
+    Run concurrent logical channels over one serial link to the target shim.
+
+    A reader thread decodes frames from the link and hands them to their
+    channels; writers from any thread send whole frames under a lock, each at
+    most `max_payload` bytes, so channels interleave on the link. Channels
+    are opened only by the host; channel 0 is reserved, and closing it ends
+    the shim.
+
+    Attributes:
+        window (int): Bytes each side may send on a channel before the other grants more.
+        max_payload (int): Largest frame payload.
+        error (MuxError | None): Why the shim could not start, once the target said so.
+    """
+
+    SERVICES = ("shell", "exec")
+    NO_PYTHON_MARKER = b"_PXNP_"
+    WRITE_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        ser: SerialLike,
+        window: int | None = None,
+        max_payload: int | None = None,
+        buffered: bytes = b"",
+    ):
+        """
+        Initialize a multiplexer over an open link.
+
+        Args:
+            ser (SerialLike): Open serial port (or serial-like stream) to the target shim.
+            window (int, optional): Per-channel flow-control window. Defaults to config value.
+            max_payload (int, optional): Largest frame payload, at most 65535. Defaults to config value.
+            buffered (bytes): Output already read from the link (e.g., from `SerialConsole.take_port()`),
+                decoded before anything new.
+
+        Raises:
+            ValueError: If `max_payload` does not fit the frame header.
+        """
+
+        self.ser = ser
+        self.window = window if window is not None else Config.get("mux", "window", 64 * 1024)
+        self.max_payload = max_payload if max_payload is not None else Config.get("mux", "max_payload", 1024)
+
+        if not 0 < self.max_payload <= 0xFFFF:
+            raise ValueError("max_payload must be between 1 and 65535.")
+
+        self.decoder = FrameDecoder(self.max_payload)
+        self._buffered = buffered
+        self._channels: dict[int, Channel] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._write = SerialConsole.writer(ser)
+        self._thread: threading.Thread | None = None
+        self._wake_r, self._wake_w = os.pipe()
+        self._stopping = False
+        self._framed = False  # Whether the shim has sent a frame yet
+        self._tail = b""
+        self.error: MuxError | None = None
+
+    @classmethod
+    def script(cls, window: int | None = None, max_payload: int | None = None, python: str | None = None) -> str:
+        """
+        Return a shell script that runs the target shim on the serial link (fd 3).
+
+        Push it with `Delivery`, whose bootstrap leaves the link open on fd 3.
+        If the target has no usable interpreter, the script announces
+        `NO_PYTHON_MARKER` instead of starting the shim, and the `Mux` fails
+        fast. On macOS, ``/usr/bin/python3`` only counts once the Command
+        Line Tools are installed; until then it is a stub that opens an
+        installer dialog.
+
+        Args:
+            window (int, optional): Per-channel window; must match the `Mux`. Defaults to config value.
+            max_payload (int, optional): Largest frame payload; must match the `Mux`. Defaults to config value.
+            python (str, optional): Python 3 interpreter on the target. Defaults to config value.
+
+        Returns:
+            str: Shell script.
+        """
+
+        window = window if window is not None else Config.get("mux", "window", 64 * 1024)
+        max_payload = max_payload if max_payload is not None else Config.get("mux", "max_payload", 1024)
+        python = python if python is not None else Config.get("mux", "python", "python3")
+        shim = files("pirate").joinpath("resources/shims/mux.py").read_text(encoding="utf-8")
+
+        done = SerialConsole.DONE_MARKER.decode("ascii")
+        no_python = cls.NO_PYTHON_MARKER.decode("ascii")
+        usable = (
+            f"_px=$(command -v {python}) && "
+            '{ [ "$(uname)" != Darwin ] || [ "$_px" != /usr/bin/python3 ] || xcode-select -p >/dev/null 2>&1; }'
+        )
+        return (
+            f"if {usable}; then\n"
+            f"{python} - 3 {window} {max_payload} <<'__PIRATE_MUX__'\n{shim}__PIRATE_MUX__\n"
+            f"else printf '{no_python}\\r\\n' >&3; fi\n"
+            f"printf '{done}\\r\\n' >&3\n"
+        )
+
+    def start(self) -> None:
+        """Start the reader thread."""
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._read_loop, name="pirate-mux", daemon=True)
+            self._thread.start()
+
+    def open(self, service: str, arg: str = "") -> Channel:
+        """
+        Open a channel to a service of the target shim.
+
+        Args:
+            service (str): "shell" (an interactive shell on a pty; `arg` picks the shell) or
+                "exec" (`arg` run by ``sh -c`` with stdin and stdout on the channel).
+            arg (str): Service argument.
+
+        Returns:
+            Channel: The new channel.
+
+        Raises:
+            ValueError: If the service is unknown.
+            MuxError: If the shim could not start, or all 255 channels are open.
+        """
+
+        if service not in self.SERVICES:
+            raise ValueError(f"Unsupported service '{service}'. Expected one of: {', '.join(self.SERVICES)}.")
+        if self.error is not None:
+            raise self.error
+
+        request = f"{service} {arg}".rstrip()
+        with self._lock:
+            free = next((i for i in range(1, 256) if i not in self._channels), None)
+            if free is None:
+                raise MuxError("All 255 channels are open.")
+            channel = Channel(self, free, request)
+            self._channels[free] = channel
+
+        self._send(Frame(free, OPEN, request.encode("utf-8")))
+        Logger.debug(f"Opened mux channel {free}: {request}")
+        return channel
+
+    def run(self, cmd: str, data: bytes = b"", timeout: float | None = None) -> tuple[int | None, bytes]:
+        """
+        Run a command on its own channel, feeding it `data` as stdin.
+
+        Args:
+            cmd (str): Shell command for the target.
+            data (bytes): Bytes for the command's stdin.
+            timeout (float, optional): Seconds to allow in total. None waits indefinitely.
+
+        Returns:
+            tuple[int | None, bytes]: Exit status and combined stdout/stderr.
+
+        Raises:
+            TimeoutError: If the command did not finish within `timeout`.
+            MuxError: If the shim could not start.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        channel = self.open("exec", cmd)
+        try:
+            # Feed stdin from another thread so output is consumed (and window granted) meanwhile
+            writer = threading.Thread(target=self._feed, args=(channel, data, timeout), daemon=True)
+            writer.start()
+            output = channel.read_all(timeout)
+            writer.join(None if deadline is None else max(deadline - time.monotonic(), 0.0))
+            status = channel.wait(None if deadline is None else max(deadline - time.monotonic(), 0.0))
+            if self.error is not None:
+                raise self.error
+            return status, output
+        finally:
+            channel.close()
+
+    def close(self) -> None:
+        """End the target shim and stop the reader thread. Closing again does nothing."""
+
+        if self._stopping:
+            return
+
+        self._stopping = True
+        with suppress(OSError, MuxError):
+            self._send(Frame(0, CLOSE))
+
+        os.write(self._wake_w, b"\0")
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        for fd in (self._wake_r, self._wake_w):
+            with suppress(OSError):
+                os.close(fd)
+
+    @staticmethod
+    def _feed(channel: Channel, data: bytes, timeout: float | None) -> None:
+        """Write stdin to a channel, then signal EOF."""
+
+        with suppress(TimeoutError, MuxError, OSError):
+            channel.write(data, timeout)
+            channel.send_eof()
+
+    def _send(self, frame: Frame) -> None:
+        """
+        Write one whole frame to the link, waiting while it is full.
+
+        Raises:
+            MuxError: If the link stayed full for `WRITE_TIMEOUT` seconds.
+        """
+
+        data = frame.encode()
+        with self._write_lock:
+            while data:
+                n = self._write(data)
+                if not isinstance(n, int):
+                    break
+                if n == 0:
+                    _, w, _ = select.select([], [self.ser.fileno()], [], self.WRITE_TIMEOUT)
+                    if not w:
+                        raise MuxError(f"Mux link did not drain within {self.WRITE_TIMEOUT}s.")
+                data = data[n:]
+
+    def _forget(self, channel: Channel) -> None:
+        """Stop tracking a channel."""
+
+        with self._lock:
+            if self._channels.get(channel.id) is channel:
+                del self._channels[channel.id]
+
+    def _refused(self, data: bytes | memoryview) -> bool:
+        """Return whether the target announced, before any frame, that the shim cannot start."""
+
+        if self._framed:
+            return False
+
+        # Keep enough of the previous read to find a marker split across reads
+        seen = self._tail + bytes(data)
+        self._tail = seen[-len(self.NO_PYTHON_MARKER) + 1 :]
+        if self.NO_PYTHON_MARKER not in seen:
+            return False
+
+        self.error = MuxError("The target has no usable Python 3 interpreter for the mux shim.")
+        Logger.error(str(self.error))
+        return True
+
+    def _dispatch(self, data: bytes | memoryview) -> None:
+        """Decode link output and hand each frame to its channel."""
+
+        for frame in self.decoder.feed(data):
+            self._framed = True
+            with self._lock:
+                channel = self._channels.get(frame.channel)
+            if channel is not None:
+                channel._on_frame(frame)
+                if frame.kind == CLOSE:
+                    self._forget(channel)
+
+    def _read_loop(self) -> None:
+        """Decode frames from the link and dispatch them until stopped or the link closes."""
+
+        fd = self.ser.fileno()
+        read = SerialConsole.reader(self.ser, bytearray(SerialConsole.RELAY_BUFFER))
+
+        try:
+            if self._refused(self._buffered):
+                return
+            self._dispatch(self._buffered)
+            self._buffered = b""
+
+            while not self._stopping:
+                r, _, _ = select.select([fd, self._wake_r], [], [])
+                if fd not in r:
+                    continue
+
+                try:
+                    chunk, n = read()
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    n = 0
+                if n == 0:
+                    Logger.debug("Mux link closed.")
+                    break
+
+                if self._refused(memoryview(chunk)[:n]):
+                    break
+                self._dispatch(memoryview(chunk)[:n])
+        finally:
+            with self._lock:
+                channels = list(self._channels.values())
+                self._channels.clear()
+            for channel in channels:
+                channel._on_lost()
+
+
+class MuxError(Exception):
+    """Custom exception for multiplexed channel errors."""
+
+    pass
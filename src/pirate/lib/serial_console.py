@@ -6,19 +6,248 @@ between local stdin/stdout and a serial device. It handles keystroke forwarding,
 escape sequences (e.g., detach, EOF), and log/diagnostic integration.
 """
 
+import fcntl
 import os
+import re
+import secrets
 import select
 import signal
 import sys
 import termios
+import threading
+import time
 import tty
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from contextlib import suppress
+from typing import Protocol
 
-from serial import Serial
+from serial import Serial, SerialBase
 
 from pirate.lib.config import Config
 from pirate.lib.logger import Logger
+from pirate.lib.matching import MarkerMatcher, PatternAutomaton
+from pirate.lib.write_queue import WriteQueue
+
+
+class SerialLike(Protocol):
+    """Interface `SerialConsole.stdio()` needs from a port (e.g., `serial.Serial` or a socket wrapper)."""
+
+    def fileno(self) -> int:
+        """Return the file descriptor to `select()` on."""
+        ...
+
+    def read(self, size: int = 1, /) -> bytes:
+        """Read up to `size` available bytes; empty once the link is closed."""
+        ...
+
+    def write(self, data: bytes, /) -> int | None:
+        """Write bytes to the link."""
+        ...
+
+    def close(self) -> None:
+        """Close the link."""
+        ...
+
+
+def _waiting(fd: int) -> int:
+    """Return how many bytes are waiting to be read on fd, or 0 if it cannot tell."""
+
+    try:
+        return int.from_bytes(fcntl.ioctl(fd, termios.FIONREAD, bytes(4)), sys.byteorder)
+    except OSError:
+        return 0
+
+
+class StreamHook:
+    """
+    A pattern in the incoming serial stream and the callback fired when it appears.
+
+    Attributes:
+        pattern (bytes | re.Pattern[bytes]): Literal bytes, or a compiled bytes regex.
+        callback (Callable[[HookEvent], None]): Called with a `HookEvent` for each match.
+        once (bool): Remove the hook after its first match.
+    """
+
+    def __init__(self, pattern: bytes | re.Pattern[bytes], callback: Callable[["HookEvent"], None], once: bool = False):
+        """
+        Initialize a hook.
+
+        Args:
+            pattern (bytes | re.Pattern[bytes]): Literal bytes, or a compiled bytes regex.
+            callback (Callable[[HookEvent], None]): Called with a `HookEvent` for each match.
+            once (bool): Remove the hook after its first match. Defaults to False.
+
+        Raises:
+            ValueError: If a literal pattern is empty.
+        """
+
+        if isinstance(pattern, bytes) and not pattern:
+            raise ValueError("Hook pattern must be non-empty.")
+
+        self.pattern = pattern
+        self.callback = callback
+        self.once = once
+        self.active = True
+
+
+class HookEvent:
+    """
+    A hook match passed to its callback.
+
+    Attributes:
+        hook (StreamHook): The hook that matched.
+        match (bytes): The matched bytes.
+        groups (tuple[bytes | None, ...]): Regex capture groups; empty for literal patterns.
+        detached (bool): Whether the callback asked the relay to end.
+    """
+
+    def __init__(
+        self,
+        hook: StreamHook,
+        match: bytes,
+        write: Callable[[bytes], object],
+        groups: tuple[bytes | None, ...] = (),
+    ):
+        """
+        Initialize an event.
+
+        Args:
+            hook (StreamHook): The hook that matched.
+            match (bytes): The matched bytes.
+            write (Callable[[bytes], object]): Sends bytes to the target.
+            groups (tuple[bytes | None, ...]): Regex capture groups. Defaults to none.
+        """
+
+        self.hook = hook
+        self.match = match
+        self.groups = groups
+        self.detached = False
+        self._write = write
+
+    def write(self, data: bytes) -> None:
+        """Send bytes to the target, e.g., a password or the next queued command."""
+
+        self._write(data)
+
+    def detach(self) -> None:
+        """End the relay once the current chunk has been handled."""
+
+        self.detached = True
+
+
+class _HookDispatcher:
+    """
+    Match registered hooks against the relay stream in a single pass.
+
+    Literal hooks share one `PatternAutomaton`, so per-byte cost does not grow
+    with the number of hooks. Regex hooks are searched in a bounded window of
+    recent output instead. The automaton is only rebuilt when hooks are added;
+    the last `REPLAY` bytes are fed back through the new automaton so a match
+    already in progress is not lost.
+    """
+
+    REPLAY = 256
+
+    def __init__(self, console: "SerialConsole"):
+        self.console = console
+        self.version = -1
+        self.literals: list[StreamHook] = []
+        self.regexes: list[StreamHook] = []
+        self.automaton = PatternAutomaton([])
+        self.tail = b""
+        self.window = bytearray()
+
+    def _refresh(self) -> None:
+        """Pick up hooks added or removed since the last chunk."""
+
+        with self.console._hooks_lock:
+            if self.version == self.console._hooks_version:
+                return
+            self.version = self.console._hooks_version
+            hooks = list(self.console._hooks)
+
+        literals = [h for h in hooks if isinstance(h.pattern, bytes)]
+        self.regexes = [h for h in hooks if not isinstance(h.pattern, bytes)]
+
+        # Removals keep the automaton; inactive hooks are skipped on dispatch
+        if any(h not in self.literals for h in literals):
+            self.automaton = PatternAutomaton([h.pattern for h in literals if isinstance(h.pattern, bytes)])
+            self.automaton.feed(self.tail)
+            self.literals = literals
+
+        if not self.regexes:
+            self.window.clear()
+
+    def feed(self, data: bytes | bytearray | memoryview, write: Callable[[bytes], object]) -> bool:
+        """
+        Fire hooks matching the next chunk of output.
+
+        Args:
+            data (bytes | bytearray | memoryview): Next chunk of serial output.
+            write (Callable[[bytes], object]): Sends bytes to the target.
+
+        Returns:
+            bool: True if a callback asked to detach.
+        """
+
+        self._refresh()
+
+        # Fast path; nothing registered
+        if not self.literals and not self.regexes:
+            self.tail = b""
+            return False
+
+        events: list[HookEvent] = []
+
+        if self.literals:
+            for index, _ in self.automaton.feed(data):
+                hook = self.literals[index]
+                if hook.active:
+                    events.append(self._fire(hook, self.automaton.patterns[index], write))
+            self.tail = (self.tail + data)[-self.REPLAY :]
+
+        if self.regexes:
+            self.window.extend(data)
+            if len(self.window) > self.console.HOOK_WINDOW:
+                del self.window[: len(self.window) - self.console.HOOK_WINDOW]
+
+            while match := self._earliest_regex():
+                hook, found = match
+                matched, groups = bytes(found.group(0)), tuple(found.groups())
+                del self.window[: found.end()]
+                events.append(self._fire(hook, matched, write, groups))
+
+        return any(e.detached for e in events)
+
+    def _earliest_regex(self) -> tuple[StreamHook, re.Match[bytes]] | None:
+        """Return the active regex hook whose non-empty match ends first in the window."""
+
+        best: tuple[StreamHook, re.Match[bytes]] | None = None
+        for hook in self.regexes:
+            pattern = hook.pattern
+            if not hook.active or isinstance(pattern, bytes):
+                continue
+            found = next((m for m in pattern.finditer(self.window) if m.end() > m.start()), None)
+            if found and (best is None or found.end() < best[1].end()):
+                best = (hook, found)
+        return best
+
+    def _fire(
+        self,
+        hook: StreamHook,
+        match: bytes,
+        write: Callable[[bytes], object],
+        groups: tuple[bytes | None, ...] = (),
+    ) -> HookEvent:
+        """Run one hook callback, removing `once` hooks first."""
+
+        if hook.once:
+            self.console.remove_hook(hook)
+
+        event = HookEvent(hook, match, write, groups)
+        Logger.debug(f"Serial hook matched {match!r}.")
+        hook.callback(event)
+        return event
 
 
 class SerialConsole:
@@ -31,9 +260,27 @@ class SerialConsole:
     sends a remote EOF on `Ctrl-D` (0x04), and exits automatically when the
     sentinel `DONE_MARKER` (default: ``b"__PIRATE_DONE__"``) is observed in the
     incoming serial stream.
+
+    The port can be opened ahead of time with `open()`, which starts draining
+    incoming bytes into a bounded buffer on a background thread. `stdio()` then
+    replays that buffer first, so output sent before the operator attaches is
+    not lost. When the buffer is full the drain pauses, leaving further bytes
+    queued on the link rather than dropping them.
+
+    Payloads can react to the target as output arrives by registering pattern
+    hooks with `add_hook()` (e.g., answer a password prompt, or send the next
+    command when the shell prompt returns) instead of polling or sleeping.
+    With no operator attached, they can script the target over a port opened
+    with `open()` using `send()`, `expect()`, and `run()`/`run_many()`.
     """
 
     DONE_MARKER = b"__PIRATE_DONE__"
+    PREBUFFER_SIZE = 64 * 1024
+    HOOK_WINDOW = 4096
+    RELAY_BUFFER = 64 * 1024
+    WRITE_QUEUE_LIMIT = 64 * 1024
+    WRITE_CHUNK = 1024
+    DRAIN_TIMEOUT = 1.0
 
     def __init__(
         self,
@@ -58,16 +305,482 @@ class SerialConsole:
         self.baud = baud if baud is not None else Config.get("serial", "baud", 115200)
         self.newline = newline if newline is not None else Config.get("serial", "newline", "crlf")
         self.disable_serial = disable_serial if disable_serial is not None else Config.get("dev", "disable_serial", False)
+        self.write_rate = Config.get("serial", "write_rate", 0)
 
         self.on_ready = on_ready
 
+        self._ser: Serial | None = None
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._drainer: threading.Thread | None = None
+
+        # Outbound queue of the current or last `stdio()` session, for its counters
+        self.outbound: WriteQueue | None = None
+
+        self._run_token = secrets.token_hex(3)
+        self._run_seq = 0
+
+        self._hooks: list[StreamHook] = []
+        self._hooks_lock = threading.Lock()
+        self._hooks_version = 0
+
         if self.disable_serial:
             Logger.debug("Serial disabled in config. Skipping connection...")
 
+    def add_hook(
+        self,
+        pattern: bytes | re.Pattern[bytes],
+        callback: Callable[[HookEvent], None],
+        once: bool = False,
+    ) -> StreamHook:
+        """
+        Call `callback` whenever `pattern` appears in the output relayed by `stdio()`.
+
+        Callbacks run on the relay loop as soon as the chunk completing the match
+        arrives, after it has been written to stdout. They can answer the target
+        with `HookEvent.write()` or end the relay with `HookEvent.detach()`.
+        Literal patterns are matched in one pass however many are registered;
+        regexes are searched within the last `HOOK_WINDOW` bytes of output.
+
+        Hooks may be added or removed at any time, including from callbacks or
+        other threads.
+
+        Args:
+            pattern (bytes | re.Pattern[bytes]): Literal bytes, or a compiled bytes regex.
+            callback (Callable[[HookEvent], None]): Called with a `HookEvent` for each match.
+            once (bool): Remove the hook after its first match. Defaults to False.
+
+        Returns:
+            StreamHook: The registered hook, for `remove_hook()`.
+        """
+
+        hook = StreamHook(pattern, callback, once)
+        with self._hooks_lock:
+            self._hooks.append(hook)
+            self._hooks_version += 1
+
+        return hook
+
+    def remove_hook(self, hook: StreamHook) -> None:
+        """
+        Unregister a hook; it will not fire again.
+
+        Args:
+            hook (StreamHook): Hook returned by `add_hook()`.
+        """
+
+        with self._hooks_lock:
+            hook.active = False
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+                self._hooks_version += 1
+
+    def open_serial(self, baud: int) -> Serial:
+        """
+        Open a new non-blocking handle on the serial device.
+
+        Unlike `open()`, the handle is not kept by the console; the caller owns
+        and closes it (e.g., a `SessionDaemon` reopening a vanished device).
+
+        Args:
+            baud (int): Baud rate to open the port at.
+
+        Returns:
+            Serial: The open port, with zero read and write timeouts.
+        """
+
+        return Serial(
+            self.device_path,
+            baudrate=baud,
+            timeout=0,
+            write_timeout=0,
+            rtscts=False,
+            dsrdtr=False,
+            xonxoff=False,
+        )
+
+    def open(self, baud: int | None = None, prebuffer: bool = True) -> None:
+        """
+        Open the serial port ahead of `stdio()`, optionally buffering incoming output.
+
+        Args:
+            baud (int, optional): Override baud for the port.
+            prebuffer (bool): If True, drain incoming bytes into a bounded buffer on a
+                background thread until `stdio()` attaches. Defaults to True.
+        """
+
+        if self.disable_serial or self._ser is not None:
+            return
+
+        self._ser = self.open_serial(self.baud if baud is None else baud)
+
+        if prebuffer:
+            self._stop.clear()
+            self._drainer = threading.Thread(target=self._drain, args=(self._ser,), name="pirate-serial-drain", daemon=True)
+            self._drainer.start()
+
+    def close(self) -> None:
+        """Stop buffering and close a port opened with `open()`."""
+
+        self._stop_drain()
+
+        ser, self._ser = self._ser, None
+        if ser is not None:
+            with suppress(Exception):
+                ser.close()
+
+    def take_port(self) -> tuple[Serial, bytes] | None:
+        """
+        Hand over the port opened with `open()`, along with anything it buffered.
+
+        Buffering stops and the console no longer owns the port; the caller closes it.
+
+        Returns:
+            tuple[Serial, bytes] | None: The open port and its buffered output, or None if no port is open.
+        """
+
+        self._stop_drain()
+
+        ser, self._ser = self._ser, None
+        if ser is None:
+            return None
+
+        return ser, self.take_buffered()
+
+    @property
+    def buffering(self) -> bool:
+        """Whether a port opened with `open()` is draining into the pre-buffer."""
+
+        return self._drainer is not None
+
+    def wait_for_data(self, timeout: float | None = None) -> bool:
+        """
+        Block until buffered output is available from a port opened with `open()`.
+
+        Args:
+            timeout (float, optional): Seconds to wait. None waits indefinitely.
+
+        Returns:
+            bool: True if data is buffered, False on timeout.
+        """
+
+        with self._cond:
+            return self._cond.wait_for(lambda: bool(self._buffer), timeout)
+
+    def take_buffered(self) -> bytes:
+        """
+        Remove and return everything buffered so far.
+
+        Returns:
+            bytes: Buffered serial output, oldest first.
+        """
+
+        with self._cond:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._cond.notify_all()
+
+        return data
+
+    def read_until(self, markers: bytes | Sequence[bytes], timeout: float | None = None) -> bytes | None:
+        """
+        Remove and return buffered output up to and including the first marker.
+
+        Output after the marker stays buffered for later reads or `stdio()`.
+
+        Args:
+            markers (bytes | Sequence[bytes]): Marker, or markers, to wait for.
+            timeout (float, optional): Seconds to wait. None waits indefinitely.
+
+        Returns:
+            bytes | None: Output through the earliest marker found, or None on timeout.
+        """
+
+        found = self.expect(markers, timeout)
+        return None if found is None else found[1]
+
+    def expect(
+        self,
+        patterns: bytes | re.Pattern[bytes] | Sequence[bytes | re.Pattern[bytes]],
+        timeout: float | None = None,
+    ) -> tuple[int, bytes] | None:
+        """
+        Wait for the first of several patterns in output from a port opened with `open()`.
+
+        Output is consumed from the pre-buffer as it arrives, so waiting on more
+        than `PREBUFFER_SIZE` bytes never stalls the link. Literal patterns are
+        matched incrementally; regexes are searched in all output collected so far.
+        Output after the match stays buffered; on timeout nothing is consumed.
+
+        Args:
+            patterns (bytes | re.Pattern[bytes] | Sequence[bytes | re.Pattern[bytes]]): Literal
+                bytes or compiled bytes regexes to wait for.
+            timeout (float, optional): Seconds to wait. None waits indefinitely.
+
+        Returns:
+            tuple[int, bytes] | None: Index of the pattern that matched first (earliest end) and
+                the output through its match, or None on timeout.
+        """
+
+        patterns = (patterns,) if isinstance(patterns, bytes | re.Pattern) else tuple(patterns)
+        literals = [p for p in patterns if isinstance(p, bytes)]
+        matcher = MarkerMatcher(*literals) if literals else None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        output = bytearray()
+
+        while True:
+            chunk = self.take_buffered()
+            if chunk:
+                start = len(output)
+                output += chunk
+
+                hits = []
+                if matcher is not None and (hit := matcher.feed(chunk)) is not None:
+                    hits.append((patterns.index(hit[0]), start + hit[1]))
+                for index, pattern in enumerate(patterns):
+                    if not isinstance(pattern, bytes) and (m := pattern.search(output)) is not None:
+                        hits.append((index, m.end()))
+
+                if hits:
+                    index, end = min(hits, key=lambda h: h[1])
+                    self._unread(output[end:])
+                    return index, bytes(output[:end])
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or not self.wait_for_data(remaining):
+                self._unread(output)
+                return None
+
+    def _unread(self, data: bytes | bytearray) -> None:
+        """Put output back at the front of the pre-buffer."""
+
+        if data:
+            with self._cond:
+                self._buffer[:0] = data
+                self._cond.notify_all()
+
+    def send(self, cmd: str | bytes, timeout: float | None = None) -> None:
+        """
+        Send a command line to the target's shell over a port opened with `open()`.
+
+        Args:
+            cmd (str | bytes): Command line, without the trailing newline.
+            timeout (float, optional): Seconds to wait for the link to accept it. None waits indefinitely.
+        """
+
+        line = cmd.encode("utf-8") if isinstance(cmd, str) else cmd
+        self.write(line + b"\n", timeout)
+
+    def run(self, cmd: str, timeout: float | None = None) -> bytes:
+        """
+        Run a command in the target's shell and return its output.
+
+        Args:
+            cmd (str): Command to run. See `run_many()`.
+            timeout (float, optional): Seconds to wait for the output. None waits indefinitely.
+
+        Returns:
+            bytes: Everything the command printed.
+
+        Raises:
+            TimeoutError: If the output is not complete within `timeout`.
+        """
+
+        return self.run_many([cmd], timeout)[0]
+
+    def run_many(self, cmds: Sequence[str], timeout: float | None = None) -> list[bytes]:
+        """
+        Run several commands in the target's shell, pipelined, and return each one's output.
+
+        All command lines are written before any output is awaited, so many
+        commands cost one round-trip. Each is framed by begin/end sentinel
+        lines printed by the target; the sentinels are split across ``printf``
+        arguments so echoed input never matches them. Output outside the
+        frames (prompts, echo) is discarded.
+
+        Each command must be a single line that can be followed by ``;``, and
+        must not read stdin (it would consume the commands queued behind it).
+        Pipelining assumes the target tty does not echo typeahead (``-echo``).
+
+        Args:
+            cmds (Sequence[str]): Commands to run, in order.
+            timeout (float, optional): Seconds to wait for all output. None waits indefinitely.
+
+        Returns:
+            list[bytes]: Each command's output, in order.
+
+        Raises:
+            TimeoutError: If the output is not complete within `timeout`.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining() -> float | None:
+            return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+        frames = []
+        lines = b""
+        for cmd in cmds:
+            self._run_seq += 1
+            token = f"{self._run_token}{self._run_seq}"
+            frames.append((f"__PIRATE_B{token}_".encode("ascii"), f"__PIRATE_E{token}_".encode("ascii")))
+            lines += f"printf '%s_B%s_\\n' __PIRATE {token};{cmd};printf '%s_E%s_\\n' __PIRATE {token}\n".encode()
+
+        self.write(lines, remaining())
+
+        outputs = []
+        for begin, end in frames:
+            if (
+                self.read_until(begin, remaining()) is None
+                or self.read_until(b"\n", remaining()) is None
+                or (output := self.read_until(end, remaining())) is None
+                or self.read_until(b"\n", remaining()) is None
+            ):
+                raise TimeoutError(f"Command output did not complete on '{self.device_path}'.")
+
+            outputs.append(output[: -len(end)])
+
+        return outputs
+
+    def write(self, data: bytes, timeout: float | None = None) -> None:
+        """
+        Write bytes in full to a port opened with `open()`.
+
+        The port is non-blocking, so data is written as the link accepts it.
+
+        Args:
+            data (bytes): Bytes to send to the target.
+            timeout (float, optional): Seconds to wait for the link to accept everything.
+                None waits indefinitely.
+
+        Raises:
+            RuntimeError: If the port has not been opened with `open()`.
+            TimeoutError: If the link stops accepting data for longer than `timeout`.
+        """
+
+        if self._ser is None:
+            raise RuntimeError("Serial port is not open. Call open() first.")
+
+        fd = self._ser.fileno()
+        view = memoryview(data)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while view:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            _, w, _ = select.select([], [fd], [], remaining)
+            if not w:
+                raise TimeoutError(f"Serial device '{self.device_path}' stopped accepting data.")
+
+            try:
+                view = view[os.write(fd, view) :]
+            except BlockingIOError:
+                continue
+
+    def _drain(self, ser: Serial) -> None:
+        """Background loop moving incoming serial bytes into the bounded buffer."""
+
+        fd = ser.fileno()
+
+        while not self._stop.is_set():
+            with self._cond:
+                # Buffer full; pause and let the link hold the rest
+                if len(self._buffer) >= self.PREBUFFER_SIZE:
+                    self._cond.wait(0.05)
+                    continue
+
+            r, _, _ = select.select([fd], [], [], 0.05)
+            if not r:
+                continue
+
+            try:
+                data = ser.read(min(4096, self.PREBUFFER_SIZE - len(self._buffer)))
+            except Exception as err:
+                Logger.debug(f"Serial pre-buffer stopped: {err}")
+                return
+
+            if data:
+                with self._cond:
+                    self._buffer.extend(data)
+                    self._cond.notify_all()
+
+    def _stop_drain(self) -> None:
+        """Stop the background drain thread, if running."""
+
+        drainer, self._drainer = self._drainer, None
+        if drainer is not None:
+            self._stop.set()
+            with self._cond:
+                self._cond.notify_all()
+            drainer.join()
+
+    @staticmethod
+    def reader(ser: SerialLike, buf: bytearray) -> Callable[[], tuple[bytes | bytearray, int]]:
+        """
+        Return a function reading the next chunk of output from `ser` as ``(chunk, length)``.
+
+        Serial ports are read straight from their fd into `buf`, and ports with a
+        ``readinto()`` (e.g., sockets) into it too, so the relay reuses one buffer
+        instead of allocating a new ``bytes`` per read. Other ports fall back to
+        ``read()``, sized to what the fd reports as waiting. Only the first
+        ``length`` bytes of ``chunk`` are valid, and only until the next call.
+
+        Args:
+            ser (SerialLike): Non-blocking port to read from.
+            buf (bytearray): Buffer reused for every read; its size caps each chunk.
+
+        Returns:
+            Callable[[], tuple[bytes | bytearray, int]]: Reads once when `ser` is readable.
+        """
+
+        view = memoryview(buf)
+
+        if isinstance(ser, SerialBase):
+            fd = ser.fileno()
+            return lambda: (buf, os.readv(fd, [buf]))
+
+        readinto = getattr(type(ser), "readinto", None)
+        if readinto is not None:
+            return lambda: (buf, readinto(ser, view))
+
+        def read() -> tuple[bytes | bytearray, int]:
+            data = ser.read(min(max(_waiting(ser.fileno()), 4096), len(buf)))
+            return data, len(data)
+
+        return read
+
+    @staticmethod
+    def writer(ser: SerialLike) -> Callable[[bytes], object]:
+        """
+        Return a non-blocking write to `ser` that reports how many bytes the link accepted.
+
+        Serial ports are written straight to their fd, since pyserial's zero-timeout
+        write spins while the link is full. The result suits a `WriteQueue`.
+
+        Args:
+            ser (SerialLike): Non-blocking port to write to.
+
+        Returns:
+            Callable[[bytes], object]: Writes as much as the link accepts right away.
+        """
+
+        if isinstance(ser, SerialBase):
+            fd = ser.fileno()
+
+            def write(data: bytes) -> int:
+                try:
+                    return os.write(fd, data)
+                except BlockingIOError:
+                    return 0
+
+            return write
+
+        return ser.write
+
     def stdio(
         self,
         baud: int | None = None,
-        ser: Serial | None = None,
+        ser: SerialLike | None = None,
         in_fd: int | None = None,
         out_fd: int | None = None,
         manage_tty: bool | None = True,
@@ -80,6 +793,11 @@ class SerialConsole:
         - Ctrl-] (0x1D) detaches locally.
         - Ctrl-D (0x04) sends EOF to remote.
         - Exits when '__PIRATE_DONE__' is observed.
+        - Fires hooks registered with `add_hook()`; a hook may also detach.
+        - Queues input (and hook replies) for the link, writing it in order as the
+          link accepts it, paced at ``serial.write_rate`` bytes/s if set. Stdin is
+          not read while `WRITE_QUEUE_LIMIT` bytes are pending. Counters are kept
+          on `outbound`.
 
         Args:
             baud (int, optional): Override baud for this call.
@@ -95,16 +813,15 @@ class SerialConsole:
             return
 
         baud = self.baud if baud is None else baud
+
         created_ser = ser is None
-        ser = ser or Serial(
-            self.device_path,
-            baudrate=baud,
-            timeout=0,
-            write_timeout=0,
-            rtscts=False,
-            dsrdtr=False,
-            xonxoff=False,
-        )
+
+        # Take over a port opened ahead of time, along with anything it buffered
+        pending = b""
+        if ser is None and (taken := self.take_port()) is not None:
+            ser, pending = taken
+
+        ser = ser or self.open_serial(baud)
 
         ready_fired = False
         fd_in = in_fd if in_fd is not None else sys.stdin.fileno()
@@ -124,31 +841,65 @@ class SerialConsole:
             prev_sig = signal.getsignal(signal.SIGINT)
             signal.signal(signal.SIGINT, on_sigint)
 
-        buf = bytearray()
-        max_buf = len(self.DONE_MARKER) + 1024
+        # Carries only a marker-length overlap between reads, so detection cost is per new byte
+        matcher = MarkerMatcher(self.DONE_MARKER)
+        hooks = _HookDispatcher(self)
+        read_serial = self.reader(ser, bytearray(self.RELAY_BUFFER))
+        outbound = self.outbound = WriteQueue(
+            self.writer(ser), limit=self.WRITE_QUEUE_LIMIT, chunk=self.WRITE_CHUNK, rate=self.write_rate
+        )
+
+        def on_serial(chunk: bytes | bytearray, n: int) -> bool:
+            """Relay the first `n` bytes of serial output to stdout; return True once the marker is seen."""
+
+            nonlocal ready_fired
+
+            # Fire on_ready call
+            if not ready_fired and self.on_ready:
+                self.on_ready()
+                ready_fired = True
+
+            data = chunk if n == len(chunk) else memoryview(chunk)[:n]
+            os.write(fd_out, data)
+
+            if hooks.feed(data, outbound.put):
+                return True
+
+            if matcher.feed(chunk, n) is not None:
+                os.write(fd_out, b"\r\n")
+                return True
+
+            return False
 
         try:
+            # Replay output buffered before attaching
+            if pending and on_serial(pending, len(pending)):
+                return
+
             while True:
-                r, _, _ = select.select([fd_in, ser.fileno()], [], [])
+                # Stop reading stdin while the queue is full, pushing back on the local terminal
+                readers = [ser.fileno()] if outbound.full else [fd_in, ser.fileno()]
+                delay = outbound.delay()
+                writers = [ser.fileno()] if delay == 0 else []
+                r, w, _ = select.select(readers, writers, [], delay or None)
+
+                # Queued input -> serial, as the link accepts it
+                if ser.fileno() in w:
+                    outbound.flush()
 
                 # Serial -> stdout (and marker detection)
                 if ser.fileno() in r:
-                    data = ser.read(4096)
-                    if data:
-                        # Fire on_ready call
-                        if not ready_fired and self.on_ready:
-                            self.on_ready()
-                            ready_fired = True
-
-                        buf.extend(data)
-                        if len(buf) > max_buf:
-                            del buf[: len(buf) - max_buf]
+                    try:
+                        chunk, n = read_serial()
+                    except BlockingIOError:
+                        continue
 
-                        os.write(fd_out, data)
+                    # Readable but empty; the remote closed the link (e.g., socket EOF)
+                    if not n:
+                        break
 
-                        if self.DONE_MARKER in buf:
-                            os.write(fd_out, b"\r\n")
-                            break
+                    if on_serial(chunk, n):
+                        break
 
                 # Stdin -> serial
                 if fd_in in r:
@@ -156,7 +907,8 @@ class SerialConsole:
 
                     # stdin closed; send EOF to remote and detach
                     if not data:
-                        ser.write(b"\x04")
+                        outbound.put(b"\x04")
+                        outbound.drain(ser.fileno(), self.DRAIN_TIMEOUT)
                         break
 
                     # Local detach on Ctrl-]
@@ -165,11 +917,17 @@ class SerialConsole:
 
                     # Treat a lone Ctrl-D as EOF for remote
                     if data == b"\x04":
-                        ser.write(b"\x04")
+                        outbound.put(b"\x04")
                         continue
 
-                    ser.write(data)
+                    outbound.put(data)
         finally:
+            if outbound.queued:
+                Logger.debug(
+                    f"Serial input: {outbound.queued} bytes queued, {outbound.written} written, "
+                    f"{outbound.stalled} stalled, {len(outbound)} unsent."
+                )
+
             if manage_tty and old_tty is not None:
                 with suppress(Exception):
                     termios.tcsetattr(fd_in, termios.TCSADRAIN, old_tty)
@@ -0,0 +1,487 @@
+"""
+Persistent serial sessions for PiRate.
+
+This module provides the `SessionDaemon` class, which owns the serial device
+for as long as it runs, reading target output into a bounded `Scrollback`
+ring, and fans it out to any number of clients on a Unix socket and,
+optionally, a TCP port reachable over Wi-Fi. Reattaching replays recent
+output and takes milliseconds, without typing anything on the target again.
+`attach()` connects the local terminal to a running daemon.
+"""
+
+import os
+import select
+import socket
+import stat
+import threading
+import time
+from contextlib import suppress
+from pathlib import Path
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.network_session import SocketStream
+from pirate.lib.serial_console import SerialConsole
+from pirate.lib.write_queue import WriteQueue
+
+
+class Scrollback:
+    """
+    A fixed-size ring of the most recent bytes of a stream.
+
+    Appending copies into a preallocated buffer, so memory use is constant
+    however long the session runs.
+    """
+
+    def __init__(self, size: int):
+        """
+        Initialize an empty ring.
+
+        Args:
+            size (int): Most bytes to keep.
+
+        Raises:
+            ValueError: If size is not positive.
+        """
+
+        if size <= 0:
+            raise ValueError("Scrollback size must be positive.")
+
+        self.size = size
+        self._buf = bytearray(size)
+        self._pos = 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        """Return the number of bytes kept."""
+
+        return self._len
+
+    def append(self, data: bytes | bytearray | memoryview) -> None:
+        """
+        Add bytes, overwriting the oldest once the ring is full.
+
+        Args:
+            data (bytes | bytearray | memoryview): Bytes to add.
+        """
+
+        view = memoryview(data)[-self.size :]
+        n = len(view)
+        first = min(n, self.size - self._pos)
+
+        self._buf[self._pos : self._pos + first] = view[:first]
+        self._buf[: n - first] = view[first:]
+
+        self._pos = (self._pos + n) % self.size
+        self._len = min(self._len + n, self.size)
+
+    def snapshot(self) -> bytes:
+        """
+        Return the kept bytes, oldest first.
+
+        Returns:
+            bytes: Up to `size` most recent bytes.
+        """
+
+        if self._len < self.size:
+            return bytes(self._buf[: self._len])
+
+        return bytes(self._buf[self._pos :] + self._buf[: self._pos])
+
+    def clear(self) -> None:
+        """Forget everything kept."""
+
+        self._pos = self._len = 0
+
+
+class _Client:
+    """An attached client: its socket, whether it may type, and its queue of output not yet sent."""
+
+    def __init__(self, sock: socket.socket, writable: bool, limit: int, name: str):
+        sock.setblocking(False)
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self.sock = sock
+        self.writable = writable
+        self.name = name
+        self.queue = WriteQueue(self._send, limit=limit, chunk=64 * 1024)
+        self.dropped = 0
+
+    def _send(self, data: bytes) -> int:
+        try:
+            return self.sock.send(data)
+        except BlockingIOError:
+            return 0
+
+
+class SessionDaemon:
+    """
+    Own the serial device and fan its session out to clients on local sockets.
+
+    Target output is read continuously into the scrollback ring, whether or
+    not a client is attached. Each client that connects is sent the
+    scrollback, then live output, through its own bounded queue, so a slow
+    viewer (e.g., over Wi-Fi) never stalls the device or the other clients.
+    When a client's queue is full, new output for it is dropped (and a notice
+    sent once it catches up) or the client is disconnected, per `slow_client`.
+
+    Clients of the Unix socket may type; clients of the optional TCP listener
+    are read-only unless `tcp_access` is "rw". Input from every client that
+    may type is queued for the target. If the device goes away (e.g., the host
+    unplugs), it is reopened once it returns.
+    """
+
+    REOPEN_INTERVAL = 1.0
+    SLOW_CLIENT_POLICIES = ("drop", "disconnect")
+
+    def __init__(
+        self,
+        socket_path: str | None = None,
+        scrollback: int | None = None,
+        console: SerialConsole | None = None,
+        listen: str | None = None,
+        port: int | None = None,
+        tcp_access: str | None = None,
+        client_buffer: int | None = None,
+        slow_client: str | None = None,
+    ):
+        """
+        Initialize a session daemon.
+
+        Args:
+            socket_path (str, optional): Unix socket clients attach to. Defaults to config value.
+            scrollback (int, optional): Bytes of recent output replayed on attach. Defaults to config value.
+            console (SerialConsole, optional): Console whose device, baud, and write rate to use.
+                Defaults to one built from config.
+            listen (str, optional): Address to also accept TCP clients on. Defaults to config value;
+                None disables the TCP listener.
+            port (int, optional): TCP port; 0 picks a free one. Defaults to config value.
+            tcp_access (str, optional): "ro" (view only) or "rw" (may type) for TCP clients.
+                Defaults to config value.
+            client_buffer (int, optional): Bytes of output queued per client before
+                `slow_client` applies. Defaults to config value.
+            slow_client (str, optional): "drop" output for, or "disconnect", a client whose
+                queue is full. Defaults to config value.
+
+        Raises:
+            ValueError: If `tcp_access` or `slow_client` is not a known option.
+        """
+
+        self.socket_path = Path(
+            socket_path if socket_path is not None else Config.get("daemon", "socket", "/run/pirate/session.sock")
+        )
+        self.scrollback = Scrollback(scrollback if scrollback is not None else Config.get("daemon", "scrollback", 64 * 1024))
+        self.console = console if console is not None else SerialConsole(disable_serial=False)
+
+        self.listen = listen if listen is not None else Config.get("daemon", "listen", None)
+        self.port = port if port is not None else Config.get("daemon", "port", 7777)
+        self.tcp_access = tcp_access if tcp_access is not None else Config.get("daemon", "tcp_access", "ro")
+        self.client_buffer = client_buffer if client_buffer is not None else Config.get("daemon", "client_buffer", 256 * 1024)
+        self.slow_client = slow_client if slow_client is not None else Config.get("daemon", "slow_client", "drop")
+
+        if self.tcp_access not in ("ro", "rw"):
+            raise ValueError(f"Unsupported tcp_access '{self.tcp_access}'. Expected one of: ro, rw.")
+        if self.slow_client not in self.SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unsupported slow_client '{self.slow_client}'. Expected one of: drop, disconnect.")
+
+        self.clients: list[_Client] = []
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+
+    def stop(self) -> None:
+        """Ask `serve()` to return; safe to call from another thread or a signal handler."""
+
+        self._stop.set()
+        with suppress(OSError):
+            os.write(self._wake_w, b"\0")
+
+    def serve(self, ready: threading.Event | None = None) -> None:
+        """
+        Run the daemon until `stop()` is called.
+
+        Args:
+            ready (threading.Event, optional): Set once the sockets are listening and the
+                device has been opened (or found unavailable).
+        """
+
+        servers = [self._listen()]
+        try:
+            if self.listen is not None:
+                servers.append(self._listen_tcp())
+        except OSError:
+            servers[0].close()
+            raise
+
+        console = self.console
+        ser = None
+        read = None
+        outbound = None
+        next_open = 0.0
+
+        try:
+            while not self._stop.is_set():
+                # (Re)open the device; it disappears while the host is unplugged
+                if ser is None and time.monotonic() >= next_open:
+                    try:
+                        ser = console.open_serial(console.baud)
+                    except Exception as err:
+                        Logger.debug(f"Serial device '{console.device_path}' unavailable: {err}")
+                        next_open = time.monotonic() + self.REOPEN_INTERVAL
+                    else:
+                        Logger.info(f"Session daemon owns '{console.device_path}'.")
+                        read = console.reader(ser, bytearray(console.RELAY_BUFFER))
+                        outbound = WriteQueue(
+                            console.writer(ser),
+                            limit=console.WRITE_QUEUE_LIMIT,
+                            chunk=console.WRITE_CHUNK,
+                            rate=console.write_rate,
+                        )
+
+                if ready is not None and not ready.is_set():
+                    ready.set()
+
+                readers: list[int | socket.socket] = [self._wake_r, *servers]
+                writers: list[int | socket.socket] = []
+                timeout = None if ser is not None else self.REOPEN_INTERVAL
+                if ser is not None and outbound is not None:
+                    readers.append(ser.fileno())
+                    delay = outbound.delay()
+                    if delay == 0:
+                        writers.append(ser.fileno())
+                    elif delay:
+                        timeout = delay
+
+                # Stop reading typing clients while the target catches up; keep reading
+                # view-only ones, whose input is discarded, to notice when they leave
+                paused = outbound is not None and outbound.full
+                for client in self.clients:
+                    if not (client.writable and paused):
+                        readers.append(client.sock)
+                    if client.queue.delay() == 0:
+                        writers.append(client.sock)
+
+                r, w, _ = select.select(readers, writers, [], timeout)
+
+                if self._wake_r in r:
+                    os.read(self._wake_r, 64)
+
+                # Queued client input -> serial
+                if ser is not None and outbound is not None and ser.fileno() in w:
+                    outbound.flush()
+
+                # Queued output -> clients that can take more
+                for client in [c for c in self.clients if c.sock in w]:
+                    try:
+                        client.queue.flush()
+                    except OSError:
+                        self._detach(client, "connection lost")
+
+                # Serial -> scrollback and every client
+                if ser is not None and read is not None and ser.fileno() in r:
+                    try:
+                        chunk, n = read()
+                    except BlockingIOError:
+                        n = -1
+                    except OSError as err:
+                        Logger.warning(f"Lost serial device '{console.device_path}': {err}")
+                        n = 0
+
+                    if n == 0:
+                        with suppress(Exception):
+                            ser.close()
+                        ser = read = outbound = None
+                        next_open = time.monotonic() + self.REOPEN_INTERVAL
+                    elif n > 0:
+                        output = bytes(memoryview(chunk)[:n])
+                        self.scrollback.append(output)
+                        for client in list(self.clients):
+                            self._deliver(client, output)
+
+                # New clients
+                for server in servers:
+                    if server in r:
+                        self._accept(server)
+
+                # Client input -> queue
+                for client in [c for c in self.clients if c.sock in r]:
+                    try:
+                        data = client.sock.recv(4096)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        data = b""
+
+                    if not data:
+                        self._detach(client, "detached")
+                    elif not client.writable:
+                        Logger.debug(f"Ignored {len(data)} input bytes from view-only client {client.name}.")
+                    elif outbound is not None:
+                        outbound.put(data)
+                    else:
+                        Logger.debug(f"Serial device not open; dropped {len(data)} input bytes.")
+        finally:
+            for client in list(self.clients):
+                self._detach(client, "daemon stopped")
+            if ser is not None:
+                with suppress(Exception):
+                    ser.close()
+            for server in servers:
+                server.close()
+            with suppress(OSError):
+                self.socket_path.unlink()
+
+    def close(self) -> None:
+        """Release the wake-up pipe; call once `serve()` has returned."""
+
+        for fd in (self._wake_r, self._wake_w):
+            with suppress(OSError):
+                os.close(fd)
+
+    def _listen(self) -> socket.socket:
+        """Bind the Unix socket, replacing a stale one, readable only by this user."""
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        with suppress(FileNotFoundError):
+            if stat.S_ISSOCK(self.socket_path.stat().st_mode):
+                self.socket_path.unlink()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(str(self.socket_path))
+            os.chmod(self.socket_path, 0o600)
+            server.listen(4)
+        except OSError:
+            server.close()
+            raise
+
+        Logger.debug(f"Session daemon listening on '{self.socket_path}'.")
+        return server
+
+    def _listen_tcp(self) -> socket.socket:
+        """Bind the TCP listener for viewers on the Wi-Fi network."""
+
+        server = socket.socket(socket.AF_INET6 if ":" in str(self.listen) else socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server.bind((self.listen, self.port))
+            server.listen(8)
+        except OSError:
+            server.close()
+            raise
+
+        self.port = server.getsockname()[1]
+        Logger.info(f"Session daemon accepting {self.tcp_access} clients on {self.listen}:{self.port}.")
+        return server
+
+    def _accept(self, server: socket.socket) -> None:
+        """Accept a client and queue the scrollback for it."""
+
+        try:
+            conn, peer = server.accept()
+        except OSError:
+            return
+
+        if server.family == socket.AF_UNIX:
+            client = _Client(conn, True, self.client_buffer, "local")
+        else:
+            client = _Client(conn, self.tcp_access == "rw", self.client_buffer, f"{peer[0]}:{peer[1]}")
+
+        self.clients.append(client)
+        Logger.info(f"Client {client.name} attached ({'rw' if client.writable else 'ro'}, {len(self.clients)} attached).")
+
+        # A done marker from an earlier session would end the new attach at once; replay only what follows it
+        replay = self.scrollback.snapshot()
+        done = replay.rfind(SerialConsole.DONE_MARKER)
+        if done >= 0:
+            replay = replay[done + len(SerialConsole.DONE_MARKER) :]
+
+        # The replay may exceed the client buffer; it is bounded by the scrollback size anyway
+        try:
+            client.queue.put(replay)
+        except OSError:
+            self._detach(client, "connection lost")
+
+    def _deliver(self, client: _Client, data: bytes) -> None:
+        """Queue output for a client, applying the slow client policy if its queue is full."""
+
+        if client.queue.full:
+            if self.slow_client == "disconnect":
+                self._detach(client, f"too slow, {len(client.queue)} bytes behind")
+            else:
+                client.dropped += len(data)
+            return
+
+        try:
+            if client.dropped:
+                Logger.debug(f"Dropped {client.dropped} output bytes for slow client {client.name}.")
+                client.queue.put(f"\r\n[pirate: {client.dropped} bytes dropped]\r\n".encode())
+                client.dropped = 0
+            client.queue.put(data)
+        except OSError:
+            self._detach(client, "connection lost")
+
+    def _detach(self, client: _Client, reason: str) -> None:
+        """Close a client connection and forget it."""
+
+        with suppress(ValueError):
+            self.clients.remove(client)
+        with suppress(OSError):
+            client.sock.close()
+
+        Logger.info(f"Client {client.name} {reason}.")
+
+
+def attach(
+    socket_path: str | None = None,
+    in_fd: int | None = None,
+    out_fd: int | None = None,
+    manage_tty: bool = True,
+    address: tuple[str, int] | None = None,
+) -> None:
+    """
+    Attach the local terminal to a running `SessionDaemon` until detach (Ctrl-]), EOF, or the done marker.
+
+    Args:
+        socket_path (str, optional): Daemon's Unix socket. Defaults to config value.
+        in_fd (int, optional): FD to read as stdin (defaults to sys.stdin).
+        out_fd (int, optional): FD to write as stdout (defaults to sys.stdout).
+        manage_tty (bool): If True, set cbreak and restore TTY on exit.
+        address (tuple[str, int], optional): Daemon's TCP host and port, used instead of the Unix socket.
+
+    Raises:
+        SessionDaemonError: If no daemon is listening on the socket.
+    """
+
+    if address is not None:
+        where = f"{address[0]}:{address[1]}"
+        try:
+            sock = socket.create_connection(address, timeout=5)
+        except OSError as err:
+            raise SessionDaemonError(f"No session daemon at {where}: {err.strerror or err}") from None
+    else:
+        path = socket_path if socket_path is not None else Config.get("daemon", "socket", "/run/pirate/session.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+        except OSError as err:
+            sock.close()
+            raise SessionDaemonError(f"No session daemon at '{path}': {err.strerror or err}") from None
+
+    stream = SocketStream(sock)
+    try:
+        SerialConsole(disable_serial=False).stdio(
+            ser=stream,
+            in_fd=in_fd,
+            out_fd=out_fd,
+            manage_tty=manage_tty,
+            install_sigint_handler=manage_tty,
+        )
+    finally:
+        stream.close()
+
+
+class SessionDaemonError(Exception):
+    """Custom exception for session daemon connection errors."""
+
+    pass
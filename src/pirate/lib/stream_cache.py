@@ -0,0 +1,230 @@
+"""
+On-disk cache of compiled HID report streams for PiRate.
+
+This module provides the `StreamCache` class, which stores `ReportStream`
+objects compiled by `Keyboard` so repeat payload runs can memory-map the
+reports and start typing without parsing the text again. Entries are keyed by
+the input text, layout content, WPM, and package version, and evicted
+least-recently-used first once the cache grows past its size limit.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+
+from pirate import __version__
+from pirate.lib.config import Config
+from pirate.lib.hid import REPORT_SIZE, ReportStream
+from pirate.lib.layout import CompiledLayout
+from pirate.lib.logger import Logger
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    Summary of the cache directory contents.
+
+    Attributes:
+        path (str): Cache directory.
+        entries (int): Number of cached streams.
+        size (int): Total size of cached streams in bytes.
+        max_size (int): Size limit in bytes before eviction.
+    """
+
+    path: str
+    entries: int
+    size: int
+    max_size: int
+
+
+class StreamCache:
+    """
+    A size-bounded, LRU-evicted directory of compiled report streams.
+
+    Each entry is a single file laid out as a fixed header, the per-report
+    delays as native doubles, the NUL-joined labels, then the raw reports, so
+    it can be memory-mapped and played without decoding the report data.
+    """
+
+    SUFFIX = ".prs"
+    MIN_TEXT_LENGTH = 64
+    _MAGIC = b"PRS1"
+    _HEADER = struct.Struct("<4sIII")  # magic, report count, labels length, reserved (keeps delays 8-byte aligned)
+
+    def __init__(self, path: str | None = None, max_size: int | None = None):
+        """
+        Initialize a stream cache.
+
+        Args:
+            path (str, optional): Cache directory. Defaults to config value.
+            max_size (int, optional): Total size limit in bytes. Defaults to config value.
+        """
+
+        self.path = Path(path if path is not None else Config.get("cache", "path", "/var/cache/pirate"))
+        self.max_size = max_size if max_size is not None else Config.get("cache", "max_size", 8 * 1024 * 1024)
+
+    @staticmethod
+    def key(text: str, layout: CompiledLayout, wpm: int, compact: bool = False) -> str:
+        """
+        Return the cache key for a compiled text.
+
+        Args:
+            text (str): Text as passed to `Keyboard.compile()`.
+            layout (CompiledLayout): Layout the text is compiled against.
+            wpm (int): Typing speed the stream's delays were computed for.
+            compact (bool): Whether the stream was compiled with release elision.
+
+        Returns:
+            str: Hex digest identifying the compiled stream.
+        """
+
+        h = hashlib.sha256()
+        for part in (__version__, layout.digest, str(wpm), str(compact), text):
+            h.update(part.encode("utf-8"))
+            h.update(b"\x00")
+
+        return h.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        """Return the file path for a cache key."""
+
+        return self.path / f"{key}{self.SUFFIX}"
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        """Return the path and stat result of every cached stream."""
+
+        if not self.path.is_dir():
+            return []
+
+        entries = []
+        for entry in self.path.iterdir():
+            if entry.suffix == self.SUFFIX:
+                try:
+                    entries.append((entry, entry.stat()))
+                except FileNotFoundError:
+                    continue
+
+        return entries
+
+    def get(self, key: str) -> ReportStream | None:
+        """
+        Return a memory-mapped cached stream, or None on a miss.
+
+        Args:
+            key (str): Key from `key()`.
+
+        Returns:
+            ReportStream | None: The cached stream if present and valid.
+        """
+
+        entry = self._entry(key)
+
+        try:
+            with open(entry, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(entry)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+
+        view = memoryview(mm)
+        try:
+            magic, count, labels_len, _ = self._HEADER.unpack_from(view)
+            delays_end = self._HEADER.size + count * 8
+            labels_end = delays_end + labels_len
+
+            if magic != self._MAGIC or len(view) != labels_end + count * REPORT_SIZE:
+                raise ValueError("corrupt cache entry")
+        except (struct.error, ValueError):
+            Logger.debug(f"Discarding invalid cache entry '{entry}'.")
+            view.release()
+            mm.close()
+            entry.unlink(missing_ok=True)
+            return None
+
+        labels = bytes(view[delays_end:labels_end]).decode("utf-8").split("\x00") if count else []
+        return ReportStream(view[labels_end:], view[self._HEADER.size : delays_end].cast("d"), labels)
+
+    def put(self, key: str, stream: ReportStream) -> None:
+        """
+        Store a stream in the cache, then evict old entries if over the size limit.
+
+        Failures to write (e.g., read-only or missing directory) are logged and ignored.
+
+        Args:
+            key (str): Key from `key()`.
+            stream (ReportStream): Stream to store.
+        """
+
+        labels = "\x00".join(stream.labels).encode("utf-8")
+        delays = struct.pack(f"={len(stream)}d", *stream.delays)
+
+        tmp = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._HEADER.pack(self._MAGIC, len(stream), len(labels), 0))
+                f.write(delays)
+                f.write(labels)
+                f.write(stream.data)
+            os.replace(tmp, self._entry(key))
+        except OSError as err:
+            Logger.debug(f"Unable to write stream cache '{self.path}': {err}")
+            if tmp is not None:
+                with suppress(OSError):
+                    os.remove(tmp)
+            return
+
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove least-recently-used entries until the cache fits within `max_size`.
+
+        Returns:
+            int: Number of entries removed.
+        """
+
+        entries = sorted(self._entries(), key=lambda e: e[1].st_mtime_ns)
+        total = sum(st.st_size for _, st in entries)
+        removed = 0
+
+        for entry, st in entries:
+            if total <= self.max_size:
+                break
+
+            entry.unlink(missing_ok=True)
+            total -= st.st_size
+            removed += 1
+
+        return removed
+
+    def clear(self) -> int:
+        """
+        Remove every cached stream.
+
+        Returns:
+            int: Number of entries removed.
+        """
+
+        entries = self._entries()
+        for entry, _ in entries:
+            entry.unlink(missing_ok=True)
+
+        return len(entries)
+
+    def stats(self) -> CacheStats:
+        """
+        Summarize the cache contents.
+
+        Returns:
+            CacheStats: Entry count and sizes.
+        """
+
+        entries = self._entries()
+        return CacheStats(str(self.path), len(entries), sum(st.st_size for _, st in entries), self.max_size)
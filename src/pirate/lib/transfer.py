@@ -0,0 +1,344 @@
+"""
+File transfer over the serial link for PiRate.
+
+This module provides the `Transfer` class, which pushes files to and pulls
+files from the shell on the other end of a `SerialConsole`, needing only
+POSIX tools plus ``base64`` (and ``gzip`` for compression) on the target.
+Files move in numbered base64 lines, one per chunk, each checked against its
+``cksum`` CRC-32. A window of chunks is kept in flight, and only chunks that
+fail their check or go unanswered are sent again.
+"""
+
+import base64
+import re
+import shlex
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+
+from pirate.lib.checksum import cksum
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+
+# Decodes base64 on stdin with whichever of -d (GNU, newer macOS) or -D (older macOS) the target takes
+BASE64_DECODER = (
+    "_pt_b64() { if [ -z \"$_pt_d\" ]; then _pt_d=-d; printf '' | base64 -d >/dev/null 2>&1 || _pt_d=-D; fi; base64 $_pt_d; }"
+)
+
+# Target-side helpers; sent with every transfer, one short line at a time so no tty line limit applies
+_HELPERS = (
+    BASE64_DECODER
+    + r"""
+_pt_unz() { if [ "$1" = 1 ]; then gzip -dc; else cat; fi; }
+_pt_z() { if [ "$1" = 1 ]; then gzip -c; else cat; fi; }
+_pp() {
+(: >"$1.part") 2>/dev/null || { printf '%s_F\n' _PT; return 1; }
+_pt_s=$(stty -g); stty raw -echo; _pt_t=$(mktemp)
+printf '%s_R\n' _PT
+while read -r k i c n b; do
+case $k in
+C) if printf %s "$b" | _pt_b64 | _pt_unz "$3" >"$_pt_t" 2>/dev/null && [ "$(cksum <"$_pt_t")" = "$c $n" ]; then
+dd if="$_pt_t" of="$1.part" bs="$2" seek="$i" conv=notrunc 2>/dev/null; echo "A $i"
+else echo "N $i"; fi;;
+E) if [ "$(cksum <"$1.part")" = "$c $n" ]; then mv "$1.part" "$1"; echo "D 0"; else echo "D 1"; fi; break;;
+Q) rm -f "$1.part"; break;;
+esac
+done
+rm -f "$_pt_t"; stty "$_pt_s"
+}
+_pg() {
+[ -f "$1" ] && [ -r "$1" ] || { printf '%s_F\n' _PT; return 1; }
+_pt_s=$(stty -g); stty raw -echo; _pt_t=$(mktemp)
+printf '%s_R %s\n' _PT $(wc -c <"$1")
+while read -r k i; do
+case $k in
+G) dd if="$1" of="$_pt_t" bs="$2" skip="$i" count=1 2>/dev/null
+printf 'C %s %s ' "$i" "$(cksum <"$_pt_t")"; _pt_z "$3" <"$_pt_t" | base64 | tr -d '\n'; echo;;
+Q) break;;
+esac
+done
+rm -f "$_pt_t"; stty "$_pt_s"
+}
+"""
+)
+
+_ACK = re.compile(rb"([AND]) (\d+)")
+_CHUNK = re.compile(rb"C (\d+) (\d+) (\d+) ([A-Za-z0-9+/=]*)")
+
+
+@dataclass(frozen=True)
+class TransferReport:
+    """
+    Outcome of a completed transfer.
+
+    Attributes:
+        size (int): File bytes transferred.
+        wire (int): Chunk bytes sent or received on the link, retransmits included.
+        chunks (int): Number of chunks in the file.
+        retransmits (int): Chunks sent (or requested) again after a failed check or no answer.
+        elapsed (float): Wall-clock seconds from helper start to completion.
+    """
+
+    size: int
+    wire: int
+    chunks: int
+    retransmits: int
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        """File bytes per second."""
+
+        return self.size / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class Transfer:
+    """
+    Push and pull files through the target's shell on a `SerialConsole`.
+
+    The console must be opened with `open()` and have a shell (e.g., a
+    serial shell payload's, after detaching) at the other end. Each transfer
+    types a small helper that switches the tty to raw mode for its duration
+    and answers every chunk: on push, an ack or nak per chunk written in
+    place with ``dd``; on pull, each requested chunk with its CRC.
+    """
+
+    READY_MARKER = b"_PT_R"
+    FAIL_MARKER = b"_PT_F"
+    DONE_MARKER = b"_PT_Z"
+
+    def __init__(
+        self,
+        console: SerialConsole,
+        chunk: int | None = None,
+        window: int | None = None,
+        compress: bool | None = None,
+        timeout: float | None = None,
+        retries: int | None = None,
+    ):
+        """
+        Initialize a transfer.
+
+        Args:
+            console (SerialConsole): Console opened with `SerialConsole.open()`.
+            chunk (int, optional): File bytes per chunk. Defaults to config value.
+            window (int, optional): Chunks in flight before waiting for an answer. Defaults to config value.
+            compress (bool, optional): Gzip each chunk on the wire. Defaults to config value.
+            timeout (float, optional): Seconds to wait for each answer. Defaults to config value.
+            retries (int, optional): Times a chunk is resent before giving up. Defaults to config value.
+
+        Raises:
+            ValueError: If chunk or window is not positive.
+        """
+
+        self.console = console
+        self.chunk = chunk if chunk is not None else Config.get("transfer", "chunk", 4096)
+        self.window = window if window is not None else Config.get("transfer", "window", 8)
+        self.compress = compress if compress is not None else Config.get("transfer", "compress", False)
+        self.timeout = timeout if timeout is not None else Config.get("transfer", "timeout", 10.0)
+        self.retries = retries if retries is not None else Config.get("transfer", "retries", 5)
+
+        if self.chunk <= 0 or self.window <= 0:
+            raise ValueError("Transfer chunk and window must be positive.")
+
+    def push(self, data: bytes, remote: str) -> TransferReport:
+        """
+        Write data to a file on the target.
+
+        The file is assembled as ``<remote>.part`` and renamed once its whole
+        CRC matches, so an interrupted push never leaves a partial file.
+
+        Args:
+            data (bytes): File contents.
+            remote (str): Path on the target.
+
+        Returns:
+            TransferReport: Transfer statistics.
+
+        Raises:
+            TransferError: If the helper cannot write the file, or a chunk keeps failing.
+        """
+
+        chunks = [data[i : i + self.chunk] for i in range(0, len(data), self.chunk)]
+        start = self._start("_pp", remote)
+
+        queue = deque(range(len(chunks)))
+        tries: dict[int, int] = {}
+        wire = retransmits = 0
+
+        def send(i: int) -> None:
+            nonlocal wire
+            line = self._encode(i, chunks[i])
+            self.console.write(line, self.timeout)
+            wire += len(line)
+
+        while queue or tries:
+            while queue and len(tries) < self.window:
+                i = queue.popleft()
+                tries[i] = 0
+                send(i)
+
+            line = self.console.read_until(b"\n", self.timeout)
+            if line is None:
+                # Nothing answered; resend whatever is still unacknowledged
+                for i in list(tries):
+                    self._retry(tries, i, remote)
+                    retransmits += 1
+                    send(i)
+                continue
+
+            if (m := _ACK.fullmatch(line.strip())) is None or (i := int(m.group(2))) not in tries:
+                continue
+            if m.group(1) == b"A":
+                del tries[i]
+            else:
+                Logger.debug(f"Chunk {i} of '{remote}' failed its check on the target. Resending...")
+                self._retry(tries, i, remote)
+                retransmits += 1
+                send(i)
+
+        # Whole-file check, then the helper renames the file into place
+        self.console.write(f"E 0 {cksum(data)} {len(data)}\n".encode("ascii"), self.timeout)
+        verified = False
+        while (line := self.console.read_until(b"\n", self.timeout)) is not None:
+            if (m := _ACK.fullmatch(line.strip())) is not None and m.group(1) == b"D":
+                verified = m.group(2) == b"0"
+                break
+        self._finish()
+
+        if not verified:
+            raise TransferError(f"'{remote}' did not verify on the target.")
+
+        return TransferReport(len(data), wire, len(chunks), retransmits, time.monotonic() - start)
+
+    def pull(self, remote: str) -> tuple[bytes, TransferReport]:
+        """
+        Read a file from the target.
+
+        Args:
+            remote (str): Path on the target.
+
+        Returns:
+            tuple[bytes, TransferReport]: File contents and transfer statistics.
+
+        Raises:
+            TransferError: If the helper cannot read the file, or a chunk keeps failing.
+        """
+
+        start = self._start("_pg", remote)
+        header = self.console.read_until(b"\n", self.timeout)
+        if header is None or not header.strip().isdigit():
+            self._abort(remote)
+            raise TransferError(f"Transfer helper did not report the size of '{remote}'.")
+
+        size = int(header.strip())
+        count = -(-size // self.chunk)
+        received: dict[int, bytes] = {}
+
+        queue = deque(range(count))
+        tries: dict[int, int] = {}
+        wire = retransmits = 0
+
+        def request(i: int) -> None:
+            self.console.write(f"G {i}\n".encode("ascii"), self.timeout)
+
+        while queue or tries:
+            while queue and len(tries) < self.window:
+                i = queue.popleft()
+                tries[i] = 0
+                request(i)
+
+            line = self.console.read_until(b"\n", self.timeout)
+            if line is None:
+                for i in list(tries):
+                    self._retry(tries, i, remote)
+                    retransmits += 1
+                    request(i)
+                continue
+
+            if (m := _CHUNK.fullmatch(line.strip())) is None or (i := int(m.group(1))) not in tries:
+                continue
+            wire += len(line)
+
+            raw = self._decode(m.group(4))
+            if raw is not None and len(raw) == int(m.group(3)) and cksum(raw) == int(m.group(2)):
+                received[i] = raw
+                del tries[i]
+            else:
+                Logger.debug(f"Chunk {i} of '{remote}' failed its check. Requesting it again...")
+                self._retry(tries, i, remote)
+                retransmits += 1
+                request(i)
+
+        self.console.write(b"Q\n", self.timeout)
+        self._finish()
+
+        data = b"".join(received[i] for i in range(count))
+        return data, TransferReport(len(data), wire, count, retransmits, time.monotonic() - start)
+
+    def _start(self, helper: str, remote: str) -> float:
+        """Type the helpers and start one on a remote path; return the start time."""
+
+        start = time.monotonic()
+        cmd = f"{helper} {shlex.quote(remote)} {self.chunk} {int(bool(self.compress))}; printf '%s_Z\\n' _PT"
+        self.console.write(_HELPERS.encode("ascii") + cmd.encode("utf-8") + b"\n", self.timeout)
+
+        found = self.console.expect((self.READY_MARKER, self.FAIL_MARKER), self.timeout)
+        if found is None:
+            raise TransferError(f"Transfer helper did not start within {self.timeout}s.")
+        if found[0] == 1:
+            self._finish()
+            raise TransferError(f"Cannot {'write' if helper == '_pp' else 'read'} '{remote}' on the target.")
+
+        return start
+
+    def _finish(self) -> None:
+        """Wait for the helper to return to the shell."""
+
+        if self.console.read_until(self.DONE_MARKER, self.timeout) is not None:
+            self.console.read_until(b"\n", self.timeout)
+
+    def _abort(self, remote: str) -> None:
+        """Stop the helper mid-transfer."""
+
+        Logger.debug(f"Aborting transfer of '{remote}'.")
+        self.console.write(b"Q\n", self.timeout)
+        self._finish()
+
+    def _retry(self, tries: dict[int, int], i: int, remote: str) -> None:
+        """Count another attempt at a chunk, giving up once it has used all retries."""
+
+        tries[i] += 1
+        if tries[i] > self.retries:
+            self._abort(remote)
+            raise TransferError(f"Chunk {i} of '{remote}' failed {tries[i]} times.")
+
+    def _encode(self, i: int, raw: bytes) -> bytes:
+        """Return the line carrying chunk i."""
+
+        payload = self._gzip(raw) if self.compress else raw
+        return f"C {i} {cksum(raw)} {len(raw)} ".encode("ascii") + base64.b64encode(payload) + b"\n"
+
+    def _decode(self, text: bytes) -> bytes | None:
+        """Return the chunk carried by a base64 field, or None if it does not decode."""
+
+        try:
+            payload = base64.b64decode(text, validate=True)
+            return zlib.decompress(payload, wbits=31) if self.compress else payload
+        except (ValueError, zlib.error):
+            return None
+
+    @staticmethod
+    def _gzip(raw: bytes) -> bytes:
+        """Compress a chunk as a standalone gzip member."""
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        return compressor.compress(raw) + compressor.flush()
+
+
+class TransferError(Exception):
+    """Custom exception for failed file transfers."""
+
+    pass
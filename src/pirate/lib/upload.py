@@ -0,0 +1,154 @@
+"""
+Keyboard-only file upload for PiRate.
+
+This module provides the `Encoding` class, a text encoding of file data that
+the target can decode with a stock tool, the `ENCODINGS` that
+`Keyboard.upload()` chooses from, and `UploadReport`. A file is typed into a
+shell as lines of encoded text, each followed by the ``cksum`` CRC of the
+line, after a receiver one-liner that checks every line and only renames the
+file into place once all of them and the whole file verify.
+"""
+
+import base64
+import shlex
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from pirate.lib.checksum import cksum
+from pirate.lib.transfer import BASE64_DECODER
+
+# Typed once per upload; lines are read with echo off until a lone "."
+_RECEIVER = (
+    '_pu() {{ s=$(stty -g 2>/dev/null); stty -echo 2>/dev/null; o="$1.part"; (: >"$o") 2>/dev/null || o=/dev/null; '
+    'n=0; b=; while read -r d c; do [ "$d" = . ] && break; '
+    'if [ "$(printf %s "$d" | cksum)" = "$c ${{#d}}" ]; then printf %s "$d" | {decode} >>"$o"; else b="$b $n"; fi; '
+    'n=$((n+1)); done; stty "$s" 2>/dev/null; '
+    'if [ "$o" != /dev/null ] && [ -z "$b" ] && [ "$(cksum <"$o")" = "$2" ]; then mv "$o" "$1" && echo "pirate: uploaded $1"; '
+    'else rm -f "$1.part"; echo "pirate: upload of $1 failed, bad lines:$b"; fi; }}; _pu {remote} {check}\n'
+)
+TERMINATOR = ".\n"  # Ends the lines read by the receiver
+LINE_LIMIT = 1024  # macOS caps a canonical tty input line at MAX_CANON = 1024 bytes; Linux at 4096
+_CRC_FIELD = 11  # " " and up to 10 digits
+
+
+@dataclass(frozen=True)
+class Encoding:
+    """
+    A text encoding for typing binary data.
+
+    Attributes:
+        name (str): Name passed as `Keyboard.upload()`'s decoder.
+        block (int): Raw bytes that encode without padding; lines hold a multiple of it.
+        encode (Callable[[bytes], str]): Encode raw bytes to text.
+        decode (str): Shell pipeline on the target that turns the text back into bytes.
+        platforms (frozenset[str]): Target platforms whose stock tools can run `decode`.
+        setup (str): Shell definitions `decode` relies on, typed before the receiver.
+    """
+
+    name: str
+    block: int
+    encode: Callable[[bytes], str]
+    decode: str
+    platforms: frozenset[str]
+    setup: str = ""
+
+    def chunk(self, limit: int = LINE_LIMIT) -> int:
+        """
+        Return the most raw bytes a line can carry and stay shorter than limit.
+
+        Args:
+            limit (int): Tty input line limit, newline included. Defaults to `LINE_LIMIT`.
+
+        Returns:
+            int: Raw bytes per line, a multiple of `block`.
+        """
+
+        per_block = len(self.encode(bytes(self.block)))
+        return max((limit - 1 - _CRC_FIELD - 1) // per_block, 1) * self.block
+
+    def lines(self, data: bytes, limit: int = LINE_LIMIT) -> list[str]:
+        """
+        Split data into the lines typed for it.
+
+        Args:
+            data (bytes): File contents.
+            limit (int): Tty input line limit, newline included. Defaults to `LINE_LIMIT`.
+
+        Returns:
+            list[str]: One newline-terminated ``<text> <crc>`` line per `chunk()` of data.
+        """
+
+        size = self.chunk(limit)
+        lines = []
+
+        for i in range(0, len(data), size):
+            text = self.encode(data[i : i + size])
+            lines.append(f"{text} {cksum(text.encode('ascii'))}\n")
+
+        return lines
+
+    def receiver(self, data: bytes, remote: str) -> str:
+        """
+        Return the one-liner that receives data's lines into a file on the target.
+
+        Args:
+            data (bytes): File contents, for the whole-file check.
+            remote (str): Path on the target.
+
+        Returns:
+            str: Shell command line, ending in a newline.
+        """
+
+        receiver = _RECEIVER.format(decode=self.decode, remote=shlex.quote(remote), check=f"'{cksum(data)} {len(data)}'")
+        return f"{self.setup}; {receiver}" if self.setup else receiver
+
+
+def _base32(data: bytes) -> str:
+    """Encode as lowercase base32, which needs no shift on most layouts."""
+
+    return base64.b32encode(data).decode("ascii").lower()
+
+
+def _base64(data: bytes) -> str:
+    """Encode as standard base64."""
+
+    return base64.b64encode(data).decode("ascii")
+
+
+PLATFORMS = ("macos", "linux")
+
+# macOS has no base32; xxd ships with macOS but not with every Linux
+ENCODINGS = {
+    encoding.name: encoding
+    for encoding in (
+        Encoding("base32", 5, _base32, "tr a-z A-Z | base32 -d", frozenset({"linux"})),
+        Encoding("base64", 3, _base64, "_pt_b64", frozenset({"macos", "linux"}), BASE64_DECODER),
+        Encoding("hex", 1, bytes.hex, "xxd -r -p", frozenset({"macos"})),
+    )
+}
+
+
+@dataclass(frozen=True)
+class UploadReport:
+    """
+    Outcome of a typed upload.
+
+    Attributes:
+        size (int): File bytes uploaded.
+        encoding (str): Name of the encoding used.
+        lines (int): Checksummed lines typed.
+        reports (int): HID reports written, receiver and terminator included.
+        elapsed (float): Wall-clock seconds spent typing.
+    """
+
+    size: int
+    encoding: str
+    lines: int
+    reports: int
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        """File bytes per second."""
+
+        return self.size / self.elapsed if self.elapsed > 0 else 0.0
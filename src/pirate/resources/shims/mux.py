@@ -0,0 +1,284 @@
+"""
+Target-side shim for PiRate's multiplexed serial link.
+
+Pushed and started by `pirate.lib.mux.Mux.script()`; standard library only.
+Speaks the framing of `pirate.lib.mux` over the serial link on the file
+descriptor given as the first argument, running a shell or command per
+channel and honoring each channel's flow-control window.
+
+Usage: python3 - <link fd> <window> <max payload>
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import pty
+import select
+import signal
+import struct
+import subprocess
+import sys
+import zlib
+
+MAGIC = b"PX"
+HEADER = struct.Struct(">2sBBH")
+OPEN, DATA, WINDOW, EOF, CLOSE = range(1, 6)
+
+
+def frame(channel: int, kind: int, payload: bytes = b"") -> bytes:
+    """Encode one frame."""
+
+    header = HEADER.pack(MAGIC, channel, kind, len(payload))
+    return header + payload + struct.pack(">I", zlib.crc32(header + payload))
+
+
+class Decoder:
+    """Split the link's byte stream into frames, skipping noise and corrupt frames."""
+
+    def __init__(self, max_payload: int) -> None:
+        """Initialize a decoder rejecting frames longer than max_payload."""
+
+        self.max_payload = max_payload
+        self.buf = bytearray()
+
+    def feed(self, data: bytes) -> list[tuple[int, int, bytes]]:
+        """Return the frames completed by data as (channel, kind, payload) tuples."""
+
+        buf = self.buf
+        buf += data
+        frames = []
+        pos = 0
+
+        while True:
+            i = buf.find(MAGIC, pos)
+            if i < 0:
+                pos = max(pos, len(buf) - len(MAGIC) + 1)
+                break
+            if len(buf) - i < HEADER.size:
+                pos = i
+                break
+
+            _, channel, kind, length = HEADER.unpack_from(buf, i)
+            end = i + HEADER.size + length + 4
+            if not OPEN <= kind <= CLOSE or length > self.max_payload:
+                pos = i + 1
+                continue
+            if len(buf) < end:
+                pos = i
+                break
+            if struct.unpack_from(">I", buf, end - 4)[0] != zlib.crc32(buf[i : end - 4]):
+                pos = i + 1
+                continue
+
+            frames.append((channel, kind, bytes(buf[i + HEADER.size : end - 4])))
+            pos = end
+
+        del buf[:pos]
+        return frames
+
+
+class Channel:
+    """A process attached to a channel."""
+
+    def __init__(
+        self,
+        pid: int,
+        out_fd: int,
+        in_fd: int,
+        window: int,
+        proc: subprocess.Popen[bytes] | None = None,
+        tty: bool = False,
+    ) -> None:
+        """Track a process's descriptors and its channel's window."""
+
+        self.pid = pid
+        self.out_fd = out_fd
+        self.in_fd: int | None = in_fd
+        self.proc = proc
+        self.tty = tty
+        self.credit = window
+        self.pending = bytearray()
+        self.consumed = 0
+        self.eof = False
+
+        for fd in {out_fd, in_fd}:
+            os.set_blocking(fd, False)
+
+
+def spawn(request: bytes, window: int) -> Channel:
+    """Start the service named by an OPEN request."""
+
+    service, _, arg = request.decode("utf-8", "replace").partition(" ")
+
+    if service == "shell":
+        pid, fd = pty.fork()
+        if pid == 0:
+            shell = arg or os.environ.get("SHELL") or "/bin/sh"
+            try:
+                os.execvp(shell, [shell, "-i"])  # noqa: S606
+            finally:
+                os._exit(127)
+        return Channel(pid, fd, fd, window, tty=True)
+
+    if service == "exec":
+        proc = subprocess.Popen(  # noqa: S602
+            arg,
+            shell=True,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+        if proc.stdout is None or proc.stdin is None:
+            raise OSError("no pipes to '" + arg + "'")
+        return Channel(proc.pid, proc.stdout.fileno(), proc.stdin.fileno(), window, proc=proc)
+
+    raise ValueError("unknown service '" + service + "'")
+
+
+def hangup(ch: Channel) -> None:
+    """Hang up the channel's process group."""
+
+    with contextlib.suppress(OSError):
+        os.killpg(ch.pid, signal.SIGHUP)
+
+
+def close_input(ch: Channel) -> None:
+    """Signal end of input to the channel's process."""
+
+    if ch.tty:
+        ch.pending += b"\x04"
+    elif ch.proc is not None and ch.proc.stdin is not None:
+        ch.proc.stdin.close()
+        ch.in_fd = None
+
+
+def finish(ch: Channel) -> int:
+    """Close the channel's descriptors and return its exit status."""
+
+    if ch.proc is not None:
+        for f in (ch.proc.stdin, ch.proc.stdout):
+            if f is not None:
+                f.close()
+        return ch.proc.wait()
+
+    os.close(ch.out_fd)
+    _, status = os.waitpid(ch.pid, 0)
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return 128 + os.WTERMSIG(status)
+
+
+def main() -> None:
+    """Serve channels until the host closes channel 0 or the link."""
+
+    link, window, max_payload = (int(a) for a in sys.argv[1:4])
+    os.set_blocking(link, False)
+
+    decoder = Decoder(max_payload)
+    channels: dict[int, Channel] = {}
+    outbox = bytearray()
+    running = True
+
+    def send(channel: int, kind: int, payload: bytes = b"") -> None:
+        outbox.extend(frame(channel, kind, payload))
+
+    def end(cid: int, ch: Channel) -> None:
+        status = finish(ch)
+        del channels[cid]
+        send(cid, CLOSE, str(status).encode("ascii"))
+
+    while running or outbox:
+        readers = [link] if running else []
+        writers = [link] if outbox else []
+        for c in channels.values():
+            if c.credit > 0:
+                readers.append(c.out_fd)
+            if c.pending and c.in_fd is not None:
+                writers.append(c.in_fd)
+
+        r, w, _ = select.select(readers, writers, [])
+
+        if link in w:
+            with contextlib.suppress(BlockingIOError):
+                del outbox[: os.write(link, outbox)]
+
+        if link in r:
+            try:
+                data = os.read(link, 65536)
+            except BlockingIOError:
+                data = None
+            except OSError:
+                data = b""
+            if data == b"":
+                break
+
+            for cid, kind, payload in decoder.feed(data or b""):
+                ch = channels.get(cid)
+                if kind == OPEN:
+                    if ch is not None:
+                        hangup(ch)
+                        end(cid, ch)
+                    try:
+                        channels[cid] = spawn(payload, window)
+                    except (OSError, ValueError) as err:
+                        send(cid, DATA, (str(err) + "\r\n").encode("utf-8")[:max_payload])
+                        send(cid, CLOSE, b"127")
+                elif kind == CLOSE and cid == 0:
+                    running = False
+                elif ch is None:
+                    continue
+                elif kind == DATA:
+                    ch.pending += payload
+                elif kind == WINDOW:
+                    ch.credit += int.from_bytes(payload, "big")
+                elif kind == EOF:
+                    if ch.pending:
+                        ch.eof = True
+                    else:
+                        close_input(ch)
+                elif kind == CLOSE:
+                    hangup(ch)
+
+        for cid, ch in list(channels.items()):
+            # Host input -> process, granting the host more window as it is consumed
+            if ch.in_fd in w:
+                try:
+                    n = os.write(ch.in_fd, ch.pending[:65536])
+                except BlockingIOError:
+                    n = 0
+                except OSError:
+                    n = len(ch.pending)
+                del ch.pending[:n]
+                ch.consumed += n
+                if ch.consumed and (ch.consumed >= window // 2 or not ch.pending):
+                    send(cid, WINDOW, ch.consumed.to_bytes(4, "big"))
+                    ch.consumed = 0
+                if ch.eof and not ch.pending:
+                    close_input(ch)
+                    ch.eof = False
+
+            # Process output -> host, within the window the host granted
+            if ch.out_fd in r:
+                try:
+                    data = os.read(ch.out_fd, min(ch.credit, max_payload))
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b""
+                if data:
+                    ch.credit -= len(data)
+                    send(cid, DATA, data)
+                else:
+                    end(cid, ch)
+
+        if not running:
+            for cid, ch in list(channels.items()):
+                hangup(ch)
+                end(cid, ch)
+            os.set_blocking(link, True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+import shutil
+import subprocess
+import unittest
+
+from pirate.lib.checksum import cksum
+
+
+class TestCksum(unittest.TestCase):
+    def test_known_values(self):
+        self.assertEqual(cksum(b""), 4294967295)
+        self.assertEqual(cksum(b"123456789"), 930766865)
+
+    @unittest.skipUnless(shutil.which("cksum"), "cksum not installed")
+    def test_matches_system_cksum(self):
+        data = os.urandom(70000)
+        out = subprocess.run(["cksum"], input=data, capture_output=True, check=True).stdout  # noqa: S607
+
+        self.assertEqual(out.split()[:2], [str(cksum(data)).encode(), str(len(data)).encode()])
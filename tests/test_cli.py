@@ -86,6 +86,74 @@ class TestCLI(unittest.TestCase):
         self.assertEqual(rc, 1)
         self.assertTrue(any("missing callable execute()" in line for line in cm.output))
 
+    def test_cache_stats_and_clear(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            open(os.path.join(tmp, "entry.prs"), "wb").close()  # noqa: SIM115
+
+            parser = cli._build_parser()
+            with patch("pirate.cli.StreamCache", return_value=cli.StreamCache(path=tmp)):
+                ns = parser.parse_args(["cache", "stats"])
+                with patch("builtins.print") as mock_print:
+                    rc = ns.handler(ns)
+                self.assertEqual(rc, 0)
+                self.assertIn("entries:  1", [c.args[0] for c in mock_print.call_args_list])
+
+                ns = parser.parse_args(["cache", "clear"])
+                rc = ns.handler(ns)
+                self.assertEqual(rc, 0)
+                self.assertEqual(os.listdir(tmp), [])
+
+    def test_attach_without_daemon(self):
+        with (
+            self.assertLogs(Logger._logger.name, level="ERROR") as cm,
+            patch("pirate.cli.attach", side_effect=cli.SessionDaemonError("No session daemon at '/run/pirate/session.sock'")),
+        ):
+            parser = cli._build_parser()
+            ns = parser.parse_args(["attach"])
+            rc = ns.handler(ns)
+
+        self.assertEqual(rc, 1)
+        self.assertTrue(any("No session daemon" in line for line in cm.output))
+
+    def test_push_with_serial_disabled(self):
+        with self.assertLogs(Logger._logger.name, level="ERROR") as cm:
+            parser = cli._build_parser()
+            ns = parser.parse_args(["push", "local.bin", "remote.bin"])
+            rc = ns.handler(ns)
+
+        self.assertEqual(rc, 1)
+        self.assertTrue(any("Serial is disabled" in line for line in cm.output))
+
+    def test_pull_writes_local_file(self):
+        report = cli.TransferReport(size=5, wire=20, chunks=1, retransmits=0, elapsed=0.5)
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch("pirate.cli.SerialConsole") as console_cls,
+            patch("pirate.cli.Transfer") as transfer_cls,
+        ):
+            console_cls.return_value.disable_serial = False
+            transfer_cls.return_value.pull.return_value = (b"hello", report)
+
+            parser = cli._build_parser()
+            ns = parser.parse_args(["pull", "/etc/hosts", os.path.join(tmp, "hosts"), "--window", "4", "--compress"])
+            rc = ns.handler(ns)
+
+            self.assertEqual(rc, 0)
+            with open(os.path.join(tmp, "hosts"), "rb") as f:
+                self.assertEqual(f.read(), b"hello")
+
+        transfer_cls.assert_called_once_with(console_cls.return_value, chunk=None, window=4, compress=True)
+        transfer_cls.return_value.pull.assert_called_once_with("/etc/hosts")
+        console_cls.return_value.close.assert_called_once()
+
+    def test_compress_flags(self):
+        parser = cli._build_parser()
+
+        self.assertIsNone(parser.parse_args(["push", "a", "b"]).compress)  # Falls back to config
+        self.assertTrue(parser.parse_args(["push", "a", "b", "--compress"]).compress)
+        self.assertFalse(parser.parse_args(["push", "a", "b", "--no-compress"]).compress)
+
     def test_main_runs_version(self):
         with patch("sys.argv", ["pirate", "version"]), patch("builtins.print") as mock_print:
             rc = cli.main()
@@ -18,6 +18,7 @@ class TestConfig(unittest.TestCase):
                     [keyboard]
                     wpm = 300
                     log_keystrokes = false
+                    min_interval = 0.004
 
                     [serial]
                     baud = 9600
@@ -42,6 +43,7 @@ class TestConfig(unittest.TestCase):
     def test_loaded(self):
         self.assertEqual(Config.get("keyboard", "wpm"), 300)
         self.assertEqual(Config.get("keyboard", "log_keystrokes"), False)
+        self.assertEqual(Config.get("keyboard", "min_interval"), 0.004)
         self.assertEqual(Config.get("serial", "baud"), 9600)
         self.assertEqual(Config.get("serial", "newline"), "lf")
         self.assertEqual(Config.get("dev", "log_level"), Logger.DEBUG)
@@ -0,0 +1,127 @@
+import os
+import select
+import shutil
+import subprocess
+import threading
+import tty
+import unittest
+
+from pirate.lib.checksum import cksum
+from pirate.lib.config import Config
+from pirate.lib.delivery import Delivery, DeliveryError
+from pirate.lib.keyboard import Keyboard
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+
+
+class TestDelivery(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        # A pty pair stands in for /dev/ttyGS0; the master side plays the target
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.console = SerialConsole(path=os.ttyname(self.slave), disable_serial=False)
+        self.console.open()
+        self.keyboard = Keyboard(disable_keyboard=False)
+
+    def tearDown(self):
+        self.console.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _read_frame(self):
+        """Read one header and script from the master side, as the bootstrap would."""
+
+        data = b""
+        while b"\n" not in data:
+            data += os.read(self.master, 4096)
+
+        header, data = data.split(b"\n", 1)
+        length, crc = map(int, header.split())
+        while len(data) < length:
+            data += os.read(self.master, 4096)
+
+        return data, crc
+
+    def test_bootstrap_shape(self):
+        delivery = Delivery(self.keyboard, self.console, platform="linux", baud=9600)
+        bootstrap = delivery.bootstrap()
+
+        self.assertIn("ls /dev/ttyACM*", bootstrap)
+        self.assertIn("stty -F /dev/fd/3 9600 raw -echo", bootstrap)
+        self.assertLess(len(bootstrap), 220)
+
+        with self.assertRaises(ValueError):
+            Delivery(self.keyboard, self.console, platform="windows")
+
+    def test_push_resends_on_checksum_failure(self):
+        script = b"echo hello\n" * 500
+        frames = []
+
+        def target():
+            os.write(self.master, b"noise\r\n_PR_\n")
+            frames.append(self._read_frame())
+            os.write(self.master, b"_PR_\n")  # Checksum "failed"; ask again
+            frames.append(self._read_frame())
+            os.write(self.master, b"_PK_\nhello\n")
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        Delivery(self.keyboard, self.console, timeout=2.0).push(script)
+        thread.join()
+
+        self.assertEqual(frames, [(script, cksum(script))] * 2)
+        self.assertTrue(self.console.wait_for_data(timeout=2))
+        self.assertEqual(self.console.take_buffered(), b"hello\n")  # Script output is left for stdio()
+
+    def test_push_gives_up(self):
+        def target():
+            os.write(self.master, b"_PR_\n")
+            for _ in range(2):
+                self._read_frame()
+                os.write(self.master, b"_PR_\n")
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        with self.assertRaises(DeliveryError):
+            Delivery(self.keyboard, self.console, timeout=2.0, retries=1).push(b"true\n")
+        thread.join()
+
+    def test_push_times_out_without_bootstrap(self):
+        with self.assertRaises(DeliveryError):
+            Delivery(self.keyboard, self.console, timeout=0.05).push(b"true\n")
+
+    @unittest.skipUnless(shutil.which("sh") and shutil.which("cksum"), "POSIX shell tools not installed")
+    def test_bootstrap_runs_pushed_script(self):
+        # Run the real bootstrap on a second pty, bridged to the console's pty like a USB link
+        target_master, target_slave = os.openpty()
+        stop = threading.Event()
+
+        def bridge():
+            while not stop.is_set():
+                r, _, _ = select.select([self.master, target_master], [], [], 0.05)
+                for src in r:
+                    dst = target_master if src == self.master else self.master
+                    os.write(dst, os.read(src, 4096))
+
+        relay = threading.Thread(target=bridge)
+        relay.start()
+
+        delivery = Delivery(self.keyboard, self.console, platform="linux", device=os.ttyname(target_slave), timeout=5.0)
+        shell = subprocess.Popen(["sh", "-c", delivery.bootstrap()], stdin=subprocess.DEVNULL)  # noqa: S603, S607
+
+        try:
+            script = "echo pushed $(( 6 * 7 )) >&3\n" + "# padding\n" * 1000
+            delivery.push(script)
+
+            self.assertEqual(self.console.read_until(b"\n", timeout=5), b"pushed 42\n")
+            self.assertEqual(shell.wait(timeout=5), 0)
+        finally:
+            shell.kill()
+            stop.set()
+            relay.join()
+            os.close(target_master)
+            os.close(target_slave)
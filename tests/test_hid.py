@@ -0,0 +1,180 @@
+import asyncio
+import errno
+import os
+import select
+import tempfile
+import unittest
+from unittest.mock import MagicMock, mock_open, patch
+
+from pirate.lib.hid import HIDWriter, LEDReader
+from pirate.lib.logger import Logger
+
+
+class TestHIDWriter(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+
+    def test_opens_once_and_reuses_handle(self):
+        with patch("builtins.open", mock_open()) as mopen:
+            hid = HIDWriter("/tmp/fakehid")  # noqa: S108
+            hid.write(b"\x00" * 8)
+            hid.write(b"\x01" * 8, b"\x00" * 8)
+
+            mopen.assert_called_once_with("/tmp/fakehid", "rb+", buffering=0)  # noqa: S108
+            writes = [args[0] for (args, _) in mopen().write.call_args_list]
+            self.assertEqual(writes, [b"\x00" * 8, b"\x01" * 8, b"\x00" * 8])
+
+    def test_context_manager_closes(self):
+        with patch("builtins.open", mock_open()) as mopen:
+            with HIDWriter("/tmp/fakehid") as hid:  # noqa: S108
+                self.assertFalse(hid.closed)
+
+            self.assertTrue(hid.closed)
+            mopen().close.assert_called_once()
+
+    def test_reopens_on_rebind(self):
+        first, second = MagicMock(), MagicMock()
+        first.write.side_effect = OSError(errno.ESHUTDOWN, "Cannot send after transport endpoint shutdown")
+
+        with patch("builtins.open", side_effect=[first, second]) as mopen:
+            hid = HIDWriter("/tmp/fakehid")  # noqa: S108
+            hid.write(b"\x01" * 8, b"\x00" * 8)
+
+        self.assertEqual(mopen.call_count, 2)
+        first.close.assert_called_once()
+        writes = [args[0] for (args, _) in second.write.call_args_list]
+        self.assertEqual(writes, [b"\x01" * 8, b"\x00" * 8])
+
+    def test_other_os_errors_propagate(self):
+        handle = MagicMock()
+        handle.write.side_effect = OSError(errno.EIO, "I/O error")
+
+        with patch("builtins.open", return_value=handle):
+            hid = HIDWriter("/tmp/fakehid")  # noqa: S108
+
+            with self.assertRaises(OSError):
+                hid.write(b"\x00" * 8)
+
+    def test_nonblocking_writes_to_fifo(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hidg0")
+            os.mkfifo(path)
+            reader = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+
+            try:
+                with HIDWriter(path, nonblocking=True) as hid:
+                    hid.write(b"\x02" * 8, b"\x00" * 8)
+
+                self.assertEqual(os.read(reader, 64), b"\x02" * 8 + b"\x00" * 8)
+            finally:
+                os.close(reader)
+
+    def test_nonblocking_waits_for_endpoint(self):
+        handle = MagicMock()
+        handle.write.side_effect = [None, 8]
+        poller = MagicMock()
+        poller.poll.return_value = [(3, select.POLLOUT)]
+
+        with (
+            patch("builtins.open", return_value=handle),
+            patch("pirate.lib.hid.select.poll", return_value=poller),
+        ):
+            HIDWriter("/tmp/fakehid", nonblocking=True).write(b"\x00" * 8)  # noqa: S108
+
+        self.assertEqual(handle.write.call_count, 2)
+        poller.poll.assert_called_once()
+
+    def test_nonblocking_times_out_when_host_stops_polling(self):
+        handle = MagicMock()
+        handle.write.return_value = None
+        poller = MagicMock()
+        poller.poll.return_value = []
+
+        with (
+            patch("builtins.open", return_value=handle),
+            patch("pirate.lib.hid.select.poll", return_value=poller),
+        ):
+            hid = HIDWriter("/tmp/fakehid", nonblocking=True)  # noqa: S108
+
+            with self.assertRaises(TimeoutError):
+                hid.write(b"\x00" * 8)
+
+    def test_missing_device_raises(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            hid = HIDWriter(os.path.join(tmp, "hidg0"))
+
+            with self.assertRaises(FileNotFoundError):
+                hid.write(b"\x00" * 8)
+
+
+class TestHIDWriterAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "hidg0")
+        os.mkfifo(self.path)
+        self.reader = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+
+    def tearDown(self):
+        os.close(self.reader)
+        self.tmp.cleanup()
+
+    async def test_write_async(self):
+        with HIDWriter(self.path) as hid:
+            await hid.write_async(b"\x02" * 8, b"\x00" * 8)
+
+        self.assertEqual(os.read(self.reader, 64), b"\x02" * 8 + b"\x00" * 8)
+
+    async def test_write_async_waits_for_reader(self):
+        with HIDWriter(self.path, nonblocking=True) as hid:
+            # Fill the FIFO until the "endpoint" stops accepting reports
+            while hid._hid.write(b"\x00" * 8) is not None:
+                pass
+
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, os.read, self.reader, 1 << 20)
+            await hid.write_async(b"\x04" * 8)
+
+        self.assertTrue(os.read(self.reader, 1 << 20).endswith(b"\x04" * 8))
+
+
+class TestLEDReader(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "hidg0")
+        os.mkfifo(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_records_output_reports(self):
+        leds = LEDReader(self.path)
+        leds.start()
+        host = os.open(self.path, os.O_WRONLY)
+
+        try:
+            since = leds.sequence
+            os.write(host, bytes([LEDReader.NUM_LOCK]))
+            os.write(host, bytes([LEDReader.NUM_LOCK | LEDReader.CAPS_LOCK]))
+
+            self.assertEqual(leds.wait(since, count=2, timeout=2.0), 0x03)
+            self.assertEqual(leds.sequence, since + 2)
+        finally:
+            os.close(host)
+            leds.stop()
+
+        self.assertFalse(leds.running)
+
+    def test_wait_times_out(self):
+        leds = LEDReader(self.path)
+        leds.start()
+
+        try:
+            self.assertIsNone(leds.wait(leds.sequence, timeout=0.05))
+        finally:
+            leds.stop()
+
+    def test_missing_device_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            LEDReader(os.path.join(self.tmp.name, "hidg1")).start()
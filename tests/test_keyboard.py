@@ -1,12 +1,40 @@
+import asyncio
 import os
+import re
+import shutil
+import subprocess
 import tempfile
 import textwrap
+import threading
+import time
+import tty
 import unittest
 from unittest.mock import mock_open, patch
 
 from pirate.lib.config import Config
-from pirate.lib.keyboard import HIDReportError, Keyboard, KeymapError
+from pirate.lib.keyboard import HIDReportError, Keyboard, KeymapError, TypingVerificationError
 from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+from pirate.lib.stream_cache import StreamCache
+from pirate.lib.upload import ENCODINGS
+
+
+def decode(stream, layout):
+    """Replay a report stream like a host would and return the typed text."""
+
+    chars = {codes: key for key, codes in layout.codes.items() if len(key) == 1}
+    previous = bytes(8)
+    typed = []
+
+    for i in range(len(stream)):
+        report = bytes(stream.data[i * 8 : (i + 1) * 8])
+        for code in report[2:]:
+            if code and code not in previous[2:]:
+                typed.append(chars[(report[0], code)])
+        previous = report
+
+    assert previous == bytes(8), "stream must end with all keys released"
+    return "".join(typed)
 
 
 class TestKeyboard(unittest.TestCase):
@@ -42,7 +70,7 @@ class TestKeyboard(unittest.TestCase):
             self.assertFalse(kb.log_keystrokes)
             self.assertFalse(kb.disable_keyboard)
 
-    @patch("pirate.lib.keyboard.time.sleep", return_value=None)
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
     def test_send_keystroke(self, _sleep):
         keymap = {"a": ["00", "04"]}  # a key
 
@@ -58,7 +86,7 @@ class TestKeyboard(unittest.TestCase):
             self.assertEqual(writes[0], bytearray([0x00, 0x00, 0x04, 0x00, 0x00, 0x00, 0x00, 0x00]))
             self.assertEqual(writes[1], bytearray([0x00] * 8))
 
-    @patch("pirate.lib.keyboard.time.sleep", return_value=None)
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
     def test_send_keystroke_combo(self, _sleep):
         keymap = {"WIN": ["08", "00"], "r": ["00", "15"]}  # WIN+r keys
 
@@ -74,7 +102,22 @@ class TestKeyboard(unittest.TestCase):
             self.assertEqual(writes[0], bytearray([0x08, 0x00, 0x15, 0x00, 0x00, 0x00, 0x00, 0x00]))
             self.assertEqual(writes[1], bytearray([0x00] * 8))
 
-    @patch("pirate.lib.keyboard.time.sleep", return_value=None)
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
+    def test_device_opened_once(self, _sleep):
+        keymap = {"a": ["00", "04"], "b": ["00", "05"]}
+
+        with (
+            patch.object(Keyboard, "_load_keymap", return_value=keymap),
+            patch("builtins.open", mock_open()) as mopen,
+        ):
+            with Keyboard() as kb:
+                kb.send("abab")
+
+            mopen.assert_called_once()
+            mopen().close.assert_called_once()
+            self.assertEqual(mopen().write.call_count, 8)
+
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
     def test_six_keystrokes(self, _sleep):
         keymap = {
             "K1": ["00", "01"],
@@ -88,7 +131,7 @@ class TestKeyboard(unittest.TestCase):
             kb = Keyboard(disable_keyboard=True)
             kb.send("{KEY:K1+K2+K3+K4+K5+K6}")
 
-    @patch("pirate.lib.keyboard.time.sleep", return_value=None)
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
     def test_mixed_plaintext_and_hotkey(self, _sleep):
         keymap = {
             "a": ["00", "04"],
@@ -110,8 +153,9 @@ class TestKeyboard(unittest.TestCase):
             self.assertEqual(writes[0], bytearray([0x00, 0x00, 0x04, 0x00, 0x00, 0x00, 0x00, 0x00]))
             self.assertEqual(writes[4], bytearray([0x08, 0x00, 0x15, 0x00, 0x00, 0x00, 0x00, 0x00]))
 
-    @patch("pirate.lib.keyboard.time.sleep", return_value=None)
-    def test_wpm_override_and_clamp(self, sleep_mock):
+    @patch("pirate.lib.pacing.time.monotonic_ns", return_value=0)  # Freeze the clock so the sleep is exact
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
+    def test_wpm_override_and_clamp(self, sleep_mock, _monotonic):
         keymap = {"a": ["00", "04"]}
 
         with (
@@ -120,9 +164,10 @@ class TestKeyboard(unittest.TestCase):
         ):
             kb = Keyboard()
             kb.send("a", wpm=1)  # Clamp to 10 wpm
-            sleep_mock.assert_called_with(1.2)  # 10wpm = 1.2s
+            self.assertAlmostEqual(kb.last_pace.scheduled, 1.2)  # 10wpm = 1.2s
+            self.assertAlmostEqual(sleep_mock.call_args[0][0], 1.2, places=2)
 
-    @patch("pirate.lib.keyboard.time.sleep", return_value=None)
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
     def test_disable_keyboard(self, _sleep):
         keymap = {"a": ["00", "04"]}  # a key
 
@@ -135,7 +180,7 @@ class TestKeyboard(unittest.TestCase):
 
             mopen.assert_not_called()
 
-    @patch("pirate.lib.keyboard.time.sleep", return_value=None)
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
     def test_log_keystrokes(self, _sleep):
         keymap = {"a": ["00", "04"]}
 
@@ -149,6 +194,96 @@ class TestKeyboard(unittest.TestCase):
             message = log_debug.call_args[0][0]
             self.assertEqual("00001  00 00 04 00 00 00 00 00  a", message)
 
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
+    def test_plus_character_is_typed(self, _sleep):
+        with patch("builtins.open", mock_open()) as mopen:
+            kb = Keyboard(layout="us")
+            kb.send("+")
+
+            writes = [args[0] for (args, _) in mopen().write.call_args_list]
+            self.assertEqual(writes[0], bytearray([0x02, 0x00, 0x2E, 0x00, 0x00, 0x00, 0x00, 0x00]))
+
+    @patch("pirate.lib.keyboard.Logger.debug")
+    def test_logs_achieved_rate(self, log_debug):
+        keymap = {"a": ["00", "04"]}
+
+        with patch.object(Keyboard, "_load_keymap", return_value=keymap):
+            kb = Keyboard(wpm=1000, log_keystrokes=False, disable_keyboard=True)
+            kb.send("aaaa")
+
+        self.assertEqual(kb.last_pace.steps, 4)
+        self.assertAlmostEqual(kb.last_pace.scheduled, 0.048)
+        self.assertIn("1000 WPM requested", log_debug.call_args[0][0])
+
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
+    def test_max_rate_ignores_wpm_delays(self, sleep_mock):
+        keymap = {"a": ["00", "04"]}
+
+        with (
+            patch.object(Keyboard, "_load_keymap", return_value=keymap),
+            patch("builtins.open", mock_open()) as mopen,
+            patch("pirate.lib.hid.select.poll"),
+        ):
+            mopen().write.return_value = 8
+            kb = Keyboard(wpm=10, max_rate=True)
+            kb.send("aa")
+
+            self.assertIn("opener", mopen.call_args.kwargs)
+            self.assertEqual(mopen().write.call_count, 4)
+            sleep_mock.assert_not_called()
+
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
+    def test_max_rate_min_interval(self, _sleep):
+        keymap = {"a": ["00", "04"]}
+
+        with (
+            patch.object(Keyboard, "_load_keymap", return_value=keymap),
+            patch("builtins.open", mock_open()) as mopen,
+            patch("pirate.lib.hid.select.poll"),
+        ):
+            mopen().write.return_value = 8
+            kb = Keyboard(wpm=10, max_rate=True, min_interval=0.002)
+            kb.send("aa")
+
+        self.assertAlmostEqual(kb.last_pace.scheduled, 0.008)
+
+    def test_compact_reports_decode_to_same_text(self):
+        kb = Keyboard(layout="us", wpm=500)
+        texts = [
+            "abc",
+            "aabbccc",
+            "Hello World",
+            "ABcdEEf",
+            "p=$(ls /dev/tty.usb* 2>/dev/null|head -n1)||exit;exec 3<>$p||exit;stty -f /dev/fd/3 115200 raw -echo",
+        ]
+
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(decode(kb.compile(text, compact=True), kb.layout), text)
+                self.assertEqual(decode(kb.compile(text, compact=False), kb.layout), text)
+
+    def test_compact_reports_count(self):
+        kb = Keyboard(layout="us", wpm=500)
+
+        self.assertEqual(len(kb.compile("abc", compact=True)), 4)
+        self.assertEqual(len(kb.compile("aa", compact=True)), 4)
+        self.assertEqual(len(kb.compile("aA", compact=True)), 4)  # Shift transition needs a release
+
+        stager = "p=$(ls /dev/tty.usb* 2>/dev/null|head -n1)||exit;exec 3<>$p||exit;stty -f /dev/fd/3 115200 raw -echo"
+        self.assertLess(len(kb.compile(stager, compact=True)), 0.7 * len(kb.compile(stager, compact=False)))
+
+    def test_compact_always_releases_hotkeys(self):
+        kb = Keyboard(layout="us", wpm=500)
+        stream = kb.compile("a{KEY:GUI+SPACE}b", compact=True)
+
+        self.assertEqual(stream.labels, ("a", "", "GUI + SPACE", "", "b", ""))
+        self.assertEqual(stream.data[24:32], bytes(8))
+
+    def test_compact_disabled_for_slow_typing(self):
+        kb = Keyboard(layout="us", wpm=20)
+
+        self.assertEqual(len(kb.compile("abc", compact=True)), 6)
+
     def test_unknown_key_raises(self):
         keymap = {"a": ["00", "04"]}
 
@@ -158,7 +293,67 @@ class TestKeyboard(unittest.TestCase):
             with self.assertRaises(KeymapError):
                 kb.send("b")
 
-    @patch("pirate.lib.keyboard.time.sleep", return_value=None)
+    def test_compile_builds_report_stream(self):
+        keymap = {"a": ["00", "04"], "WIN": ["08", "00"], "r": ["00", "15"]}
+
+        with patch.object(Keyboard, "_load_keymap", return_value=keymap):
+            kb = Keyboard(wpm=600)
+            stream = kb.compile("a{KEY:WIN+r}")
+
+        self.assertEqual(len(stream), 4)
+        self.assertEqual(stream.data[0:8], bytes([0x00, 0x00, 0x04, 0x00, 0x00, 0x00, 0x00, 0x00]))
+        self.assertEqual(stream.data[16:24], bytes([0x08, 0x00, 0x15, 0x00, 0x00, 0x00, 0x00, 0x00]))
+        self.assertEqual(stream.data[8:16], bytes(8))
+        self.assertEqual(stream.delays, (0.0, 0.02, 0.0, 0.02))
+        self.assertEqual(stream.labels, ("a", "", "WIN + r", ""))
+
+    def test_compile_fails_before_typing(self):
+        keymap = {"a": ["00", "04"]}
+
+        with (
+            patch.object(Keyboard, "_load_keymap", return_value=keymap),
+            patch("builtins.open", mock_open()) as mopen,
+        ):
+            kb = Keyboard()
+
+            with self.assertRaises(KeymapError):
+                kb.send("aaab")
+
+            mopen.assert_not_called()
+
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
+    def test_play_compiled_stream(self, _sleep):
+        keymap = {"a": ["00", "04"], "b": ["00", "05"]}
+
+        with (
+            patch.object(Keyboard, "_load_keymap", return_value=keymap),
+            patch("builtins.open", mock_open()) as mopen,
+        ):
+            kb = Keyboard()
+            stream = kb.compile("ab")
+            kb.play(stream)
+            kb.play(stream)
+
+            writes = b"".join(bytes(args[0]) for (args, _) in mopen().write.call_args_list)
+            self.assertEqual(writes, bytes(stream.data) * 2)
+            self.assertEqual(kb.keystroke_count, 4)
+
+    def test_compile_uses_stream_cache(self):
+        keymap = {"a": ["00", "04"], "b": ["00", "05"]}
+        text = "ab" * 40
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(Keyboard, "_load_keymap", return_value=keymap):
+            kb = Keyboard(cache=StreamCache(path=tmp))
+            first = kb.compile(text)
+
+            with patch.object(Keyboard, "_tokenize") as tokenize:
+                second = kb.compile(text)
+
+            tokenize.assert_not_called()
+            self.assertEqual(bytes(second.data), first.data)
+            self.assertEqual(list(second.labels), list(first.labels))
+
+    @patch("pirate.lib.pacing.time.sleep", return_value=None)
     def test_too_many_keystrokes_raises(self, _sleep):
         keymap = {
             "K1": ["00", "01"],
@@ -174,3 +369,283 @@ class TestKeyboard(unittest.TestCase):
 
             with self.assertRaises(HIDReportError):
                 kb.send("{KEY:K1+K2+K3+K4+K5+K6+K7}")
+
+    def test_sync_waits_for_led_echo(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hidg0")
+            os.mkfifo(path)
+            kb = Keyboard(path=path)
+
+            self.assertIsNone(kb.leds())
+            host = os.open(path, os.O_WRONLY)
+
+            def toggle_twice(*_args, **_kwargs):
+                os.write(host, b"\x02")
+                os.write(host, b"\x00")
+
+            try:
+                with patch.object(kb, "send", side_effect=toggle_twice) as send:
+                    self.assertTrue(kb.sync(timeout=2.0))
+
+                send.assert_called_once_with("{KEY:CAPS_LOCK}{KEY:CAPS_LOCK}", wpm=1000)
+                self.assertEqual(kb.leds(), 0x00)
+            finally:
+                os.close(host)
+                kb.close()
+
+    def test_sync_skipped_when_disabled(self):
+        kb = Keyboard(disable_keyboard=True)
+
+        with patch.object(kb, "send") as send:
+            self.assertFalse(kb.sync())
+
+        send.assert_not_called()
+
+
+class TestVerifiedTyping(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        # A pty pair stands in for /dev/ttyGS0; the master side echoes like the target
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.console = SerialConsole(path=os.ttyname(self.slave), disable_serial=False)
+        self.console.open()
+
+        self.kb = Keyboard(wpm=600)
+        self.typed = []
+        self.drops = 0  # Number of chunks that lose their last key
+        self.drop_after = 0  # Number of chunks echoed intact before drops start
+        self.output = b""  # Printed by the target after each newline, as a shell running the line would
+
+    def tearDown(self):
+        self.console.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _host(self, stream):
+        """Echo plain text back over serial, dropping the last key of some chunks."""
+
+        if any(len(label) > 1 for label in stream.labels):
+            self.typed.append(list(filter(None, stream.labels)))
+            return
+
+        text = decode(stream, self.kb.layout)
+        self.typed.append(text)
+        if self.drop_after:
+            self.drop_after -= 1
+        elif self.drops:
+            self.drops -= 1
+            text = text[:-1]
+        os.write(self.master, text.encode("utf-8"))
+        if text == "\n":
+            os.write(self.master, self.output)
+
+    def test_verified_send_grows_chunk(self):
+        with patch.object(self.kb, "play", side_effect=self._host):
+            self.kb.send("echo " + "a" * 40 + "{KEY:ENTER}", verify=self.console)
+
+        self.assertEqual(self.typed[:3], ["echo aaaaaaaaaaa", "a" * 20, "a" * 9])
+        self.assertEqual(self.typed[-1], ["ENTER"])
+        self.assertGreater(self.kb.verify_chunk, Keyboard.VERIFY_CHUNK)
+        self.assertEqual(self.kb.verify_wpm, 600)
+
+    def test_newline_is_sent_once_without_verifying_output(self):
+        self.output = b"remove x? \r\n$ "
+        with patch.object(self.kb, "play", side_effect=self._host):
+            self.kb.send("rm -i x\ny\n", verify=self.console)
+
+        self.assertEqual(self.typed, ["rm -i x", "\n", "y", "\n"])
+
+    @patch.object(Keyboard, "VERIFY_TIMEOUT", 0.05)
+    def test_mismatch_is_erased_and_retyped(self):
+        self.drops, self.drop_after = 1, 1
+        with patch.object(self.kb, "play", side_effect=self._host):
+            self.kb.send("x" * 16 + "hello world", verify=self.console)
+
+        self.assertEqual(self.typed[0], "x" * 16)
+        self.assertEqual(self.typed[1], "hello world")  # Dropped a key
+        self.assertEqual(self.typed[2], ["BACKSPACE"] * 10)  # Only what the target echoed
+        self.assertEqual(self.typed[3:], ["hello worl", "d"])  # Retyped in a halved chunk
+        self.assertEqual(self.kb.verify_wpm, 500)  # Backed off to 450, then recovered two steps
+
+    @patch.object(Keyboard, "VERIFY_TIMEOUT", 0.05)
+    @patch.object(Keyboard, "VERIFY_RETRIES", 2)
+    def test_gives_up_after_retries(self):
+        self.drops = 10
+        with patch.object(self.kb, "play", side_effect=self._host), self.assertRaises(TypingVerificationError):
+            self.kb.send("ls -la", verify=self.console)
+
+        self.assertEqual(self.typed[1], ["CTRL + u"])  # Nothing verified on the line; clear all of it
+        self.assertEqual(self.kb.verify_chunk, Keyboard.VERIFY_MIN_CHUNK)
+
+
+@unittest.skipUnless(all(shutil.which(t) for t in ("base32", "base64", "cksum", "tr")), "target tools not installed")
+class TestUpload(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        # A shell on a pty plays the target; what the keyboard types goes into its tty
+        self.master, self.slave = os.openpty()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.shell = subprocess.Popen(["sh"], stdin=self.slave, stdout=self.slave, stderr=self.slave, cwd=self.tmp.name)  # noqa: S603, S607
+        self.output = bytearray()
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+        self.local = os.path.join(self.tmp.name, "local.bin")
+        self.kb = Keyboard(wpm=600, compact_reports=True)
+        self.lines: list[str] = []
+        self.damage: set[int] = set()  # Typed lines (receiver first) that lose a key
+
+    def tearDown(self):
+        os.write(self.master, b"exit\n")
+        self.shell.wait(timeout=5)
+        os.close(self.master)
+        os.close(self.slave)
+        self.reader.join(timeout=5)
+        self.tmp.cleanup()
+
+    def _read(self):
+        """Collect the target's output until the pty closes."""
+
+        while True:
+            try:
+                data = os.read(self.master, 65536)
+            except OSError:
+                return
+            if not data:
+                return
+            self.output += data
+
+    def _host(self, stream):
+        """Type a played stream into the target's tty, dropping a key from damaged lines."""
+
+        text = decode(stream, self.kb.layout)
+        if len(self.lines) in self.damage:
+            text = text[:10] + text[11:]
+        self.lines.append(text)
+        os.write(self.master, text.encode("ascii"))
+
+    def _upload(self, data, remote, **kwargs):
+        with open(self.local, "wb") as f:
+            f.write(data)
+        with patch.object(self.kb, "play", side_effect=self._host):
+            report = self.kb.upload(self.local, remote, **kwargs)
+
+        # Wait for the receiver's verdict on this file (its own echoed source says "uploaded $1")
+        verdict = re.compile(rb"pirate: (uploaded |upload of )" + re.escape(remote.encode()) + rb".*\n")
+        for _ in range(100):
+            if verdict.search(self.output):
+                break
+            time.sleep(0.05)
+        return report
+
+    def test_upload_reconstructs_file(self):
+        data = os.urandom(3000)
+
+        for platform, encoding, lines in (("linux", "base32", 5), ("macos", "base64", 4)):
+            with self.subTest(platform=platform):
+                self.lines.clear()
+                report = self._upload(data, f"{platform}.bin", platform=platform)
+
+                with open(os.path.join(self.tmp.name, f"{platform}.bin"), "rb") as f:
+                    self.assertEqual(f.read(), data)
+                self.assertIn(f"pirate: uploaded {platform}.bin".encode(), self.output)
+                self.assertEqual((report.size, report.encoding, report.lines), (3000, encoding, lines))
+                self.assertEqual(len(self.lines), lines + 2)  # Receiver, lines, terminator
+                self.assertGreater(report.rate, 0)
+
+    def test_damaged_line_fails_upload(self):
+        self.damage = {2}
+        self._upload(os.urandom(2000), "remote.bin", decoder="base64")
+
+        self.assertIn(b"pirate: upload of remote.bin failed, bad lines: 1", self.output)
+        self.assertEqual(os.listdir(self.tmp.name), ["local.bin"])
+
+    def test_auto_picks_fewest_reports(self):
+        data = os.urandom(3000)
+
+        # Unshifted base32 wins once releases between keys are elided; otherwise shorter base64 does
+        self.assertEqual(self.kb._upload_encoding(data, "auto", None, "linux").name, "base32")
+        self.kb.compact_reports = False
+        self.assertEqual(self.kb._upload_encoding(data, "auto", None, "linux").name, "base64")
+
+        with self.assertRaises(ValueError):
+            self.kb._upload_encoding(data, "uuencode", None, "linux")
+
+    def test_lines_fit_macos_tty(self):
+        data = os.urandom(10_000)
+
+        # Longer lines are truncated by macOS's 1024-byte canonical input limit and fail their CRC
+        for encoding in ENCODINGS.values():
+            with self.subTest(encoding=encoding.name):
+                self.assertTrue(all(len(line) < 1024 for line in encoding.lines(data)))
+                self.assertGreater(len(encoding.lines(data)[0]), 1000)
+
+    def test_auto_only_picks_decoders_on_the_platform(self):
+        data = os.urandom(3000)
+
+        # macOS has no base32 binary, however few reports it would take
+        self.assertEqual(self.kb._upload_encoding(data, "auto", None, "macos").name, "base64")
+        self.assertEqual(self.kb._upload_encoding(data, "base32", None, "macos").name, "base32")
+
+        with self.assertRaises(ValueError):
+            self.kb._upload_encoding(data, "auto", None, "windows")
+
+
+class TestKeyboardAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "hidg0")
+        os.mkfifo(self.path)
+        self.reader = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+
+    def tearDown(self):
+        os.close(self.reader)
+        self.tmp.cleanup()
+
+    async def test_send_async_overlaps_other_work(self):
+        events = []
+
+        async def ticker():
+            while True:
+                if events and events[-1] != "t":
+                    events.append("t")
+                await asyncio.sleep(0)
+
+        with Keyboard(layout="us", wpm=1000, path=self.path, log_keystrokes=False) as kb:
+            write_async = kb._hid.write_async
+
+            async def record(*reports):
+                events.append("w")
+                await write_async(*reports)
+
+            with patch.object(kb._hid, "write_async", record):
+                task = asyncio.create_task(ticker())
+                await kb.send_async("abc")
+                task.cancel()
+
+        self.assertEqual(os.read(self.reader, 1024), bytes(kb.compile("abc").data))
+        # The ticker ran in every pause between keystrokes (press + release), not only after typing
+        self.assertEqual("".join(events)[:8], "wwtwwtww")
+        self.assertEqual(kb.last_pace.steps, 3)
+
+    async def test_cancel_releases_keys(self):
+        with Keyboard(layout="us", path=self.path, log_keystrokes=False, max_rate=True, min_interval=0.5) as kb:
+            task = asyncio.create_task(kb.send_async("a"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertEqual(os.read(self.reader, 1024), kb.layout.reports["a"] + bytes(8))
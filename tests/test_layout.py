@@ -0,0 +1,34 @@
+import unittest
+from unittest.mock import patch
+
+from pirate.lib.layout import CompiledLayout
+
+
+class TestCompiledLayout(unittest.TestCase):
+    def test_compiles_codes_and_reports(self):
+        layout = CompiledLayout({"a": ["0x00", "0x04"], "A": ["0x02", "0x04"], "WIN": ["08", "00"]})
+
+        self.assertEqual(layout.codes["a"], (0x00, 0x04))
+        self.assertEqual(layout.codes["WIN"], (0x08, 0x00))
+        self.assertEqual(layout.reports["A"], bytes([0x02, 0x00, 0x04, 0x00, 0x00, 0x00, 0x00, 0x00]))
+        self.assertIn("a", layout)
+        self.assertNotIn("b", layout)
+
+    def test_load_bundled_layout(self):
+        layout = CompiledLayout.load("us")
+
+        self.assertEqual(layout.codes["a"], (0x00, 0x04))
+        self.assertEqual(layout.reports["+"][0], 0x02)
+
+    def test_load_is_cached_per_name(self):
+        CompiledLayout.load("us")
+
+        with patch("pirate.lib.layout.files") as files:
+            layout = CompiledLayout.load("us")
+
+        files.assert_not_called()
+        self.assertIs(layout, CompiledLayout.load("us"))
+
+    def test_load_unknown_layout_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            CompiledLayout.load("does-not-exist")
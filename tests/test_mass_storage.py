@@ -0,0 +1,145 @@
+import os
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.mass_storage import MassStorage, build_image, image_size
+
+
+def read_image(path):
+    """Parse a FAT12/16 image like a host would and return its label, FAT type, and files."""
+
+    data = Path(path).read_bytes()
+    bps, spc, reserved, nfats, root_entries, total16, _, fat_sectors = struct.unpack_from("<HBHBHHBH", data, 11)
+    total = total16 or struct.unpack_from("<I", data, 32)[0]
+    assert data[510:512] == b"\x55\xaa"
+
+    root = (reserved + nfats * fat_sectors) * bps
+    first_data = root + root_entries * 32
+    clusters = (total - first_data // bps) // spc
+    bits = 12 if clusters < 4085 else 16
+    fat = data[reserved * bps : (reserved + fat_sectors) * bps]
+    assert data[(reserved + fat_sectors) * bps : (reserved + 2 * fat_sectors) * bps] == fat, "FAT copies differ"
+
+    def next_cluster(n):
+        if bits == 16:
+            return struct.unpack_from("<H", fat, n * 2)[0]
+        v = struct.unpack_from("<H", fat, n * 3 // 2)[0]
+        return v >> 4 if n % 2 else v & 0xFFF
+
+    label, files, lfn = None, {}, []
+    for off in range(root, first_data, 32):
+        entry = data[off : off + 32]
+        if entry[0] == 0:
+            break
+        if entry[11] == 0x0F:
+            lfn.insert(0, entry[1:11] + entry[14:26] + entry[28:32])
+            continue
+        if entry[11] & 0x08:
+            label = entry[:11].decode().rstrip()
+            continue
+
+        if lfn:
+            name = b"".join(lfn).decode("utf-16-le").split("\x00")[0]
+        else:
+            base, ext = entry[:8].decode().rstrip(), entry[8:11].decode().rstrip()
+            name = f"{base}.{ext}" if ext else base
+        lfn = []
+
+        size, cluster = struct.unpack_from("<I", entry, 28)[0], struct.unpack_from("<H", entry, 26)[0]
+        content = b""
+        while cluster and cluster < (0xFF8 if bits == 12 else 0xFFF8):
+            start = first_data + (cluster - 2) * spc * bps
+            content += data[start : start + spc * bps]
+            cluster = next_cluster(cluster)
+        files[name] = content[:size]
+
+    return label, bits, files
+
+
+class TestBuildImage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.image = os.path.join(self.tmp.name, "storage.img")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fat12_with_long_names(self):
+        files = {
+            "RUN.SH": b"#!/bin/sh\necho hi\n",
+            "payload-stage-two.sh": b"x" * 5000,
+            "Ünïcode name.txt": b"",
+            "payload-stage-three.sh": b"y" * 700,
+        }
+        size = build_image(self.image, files, label="pirate")
+
+        self.assertEqual(size, 1024 * 1024)
+        self.assertEqual(os.path.getsize(self.image), size)
+        self.assertEqual(read_image(self.image), ("PIRATE", 12, files))
+
+    def test_fat16_for_larger_images(self):
+        files = {"tool.bin": os.urandom(3 * 1024 * 1024 + 17)}
+        size = build_image(self.image, files)
+
+        self.assertGreaterEqual(size, len(files["tool.bin"]))
+        self.assertEqual(size, image_size([len(files["tool.bin"])]))
+        label, bits, parsed = read_image(self.image)
+        self.assertEqual(bits, 16)
+        self.assertEqual(parsed, files)
+
+    def test_files_must_fit(self):
+        with self.assertRaises(ValueError):
+            build_image(self.image, {"big.bin": b"x" * (2 * 1024 * 1024)}, size=1024 * 1024)
+
+        with self.assertRaises(ValueError):
+            build_image(self.image, {"dir/file": b""})
+
+
+class TestMassStorage(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.lun = root / "lun.0"
+        self.lun.mkdir()
+        (self.lun / "file").write_text("\n")
+        self.source = root / "payload"
+        self.source.mkdir()
+        (self.source / "run.sh").write_text("echo one\n")
+        (self.source / "subdir").mkdir()
+        self.storage = MassStorage(image=str(root / "img" / "storage.img"), lun=str(self.lun))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_swap_builds_and_attaches(self):
+        self.assertFalse(self.storage.attached)
+
+        image = self.storage.swap(self.source)
+        self.assertEqual((self.lun / "file").read_text(), str(image.resolve()))
+        self.assertEqual(read_image(image)[2], {"run.sh": b"echo one\n"})
+
+        (self.source / "run.sh").write_text("echo two\n")
+        (self.lun / "forced_eject").write_text("0")
+        self.storage.swap(self.source)
+
+        self.assertEqual((self.lun / "forced_eject").read_text(), "1")
+        self.assertEqual(read_image(image)[2], {"run.sh": b"echo two\n"})
+        self.assertEqual(list(image.parent.iterdir()), [image])
+
+    def test_run_command(self):
+        self.assertEqual(
+            self.storage.run_command("run.sh"),
+            'until [ -f "/Volumes/PIRATE/run.sh" ];do sleep .2;done;sh "/Volumes/PIRATE/run.sh"',
+        )
+        self.assertIn('findmnt -nro TARGET -S LABEL="PIRATE"', self.storage.run_command("run.sh", platform="linux"))
+
+        with self.assertRaises(ValueError):
+            self.storage.run_command("run.sh", platform="windows")
@@ -0,0 +1,101 @@
+import unittest
+
+from pirate.lib.matching import MarkerMatcher, PatternAutomaton
+
+
+class TestMarkerMatcher(unittest.TestCase):
+    def test_marker_within_chunk(self):
+        matcher = MarkerMatcher(b"DONE")
+
+        self.assertIsNone(matcher.feed(b"output\r\n"))
+        self.assertEqual(matcher.feed(b"xxDONE\r\n"), (b"DONE", 6))
+
+    def test_marker_split_across_chunks(self):
+        stream = b"abc__PIRATE_DONE__\r\n"
+
+        for size in range(1, len(stream) + 1):
+            matcher = MarkerMatcher(b"__PIRATE_DONE__")
+            chunks = [stream[i : i + size] for i in range(0, len(stream), size)]
+            ends = [(n, m) for n, c in enumerate(chunks) if (m := matcher.feed(c)) is not None]
+
+            # Exactly one match, ending at the same stream offset however it was chunked
+            self.assertEqual(len(ends), 1, size)
+            n, (marker, end) = ends[0]
+            self.assertEqual(marker, b"__PIRATE_DONE__")
+            self.assertEqual(n * size + end, 18, size)
+
+    def test_single_bytes(self):
+        matcher = MarkerMatcher(b"aab")
+        results = [matcher.feed(bytes([c])) for c in b"aaaab"]
+
+        self.assertEqual(results, [None, None, None, None, (b"aab", 1)])
+
+    def test_earliest_of_several_markers(self):
+        matcher = MarkerMatcher(b"__DONE__", b"$ ", b"ERR")
+
+        self.assertEqual(matcher.feed(b"ok ERR $ __DONE__"), (b"ERR", 6))
+        self.assertEqual(matcher.feed(b"__DO"), None)
+        self.assertEqual(matcher.feed(b"NE__ $ "), (b"__DONE__", 4))
+
+    def test_shorter_marker_beats_straddling_one(self):
+        matcher = MarkerMatcher(b"LONGMARK", b"X")
+
+        self.assertIsNone(matcher.feed(b"..LONG"))
+        self.assertEqual(matcher.feed(b"MARKX"), (b"LONGMARK", 4))
+        self.assertIsNone(matcher.feed(b"..LONG"))
+        self.assertEqual(matcher.feed(b"XMARK"), (b"X", 1))
+
+    def test_end_limits_search(self):
+        matcher = MarkerMatcher(b"DONE")
+        buf = bytearray(b"xxDOyyyyDONE")
+
+        self.assertIsNone(matcher.feed(buf, 4))
+        self.assertEqual(matcher.feed(bytearray(b"NEzzzz"), 2), (b"DONE", 2))
+
+    def test_reset(self):
+        matcher = MarkerMatcher(b"DONE")
+        matcher.feed(b"DO")
+        matcher.reset()
+
+        self.assertIsNone(matcher.feed(b"NE"))
+
+    def test_rejects_empty_markers(self):
+        with self.assertRaises(ValueError):
+            MarkerMatcher()
+        with self.assertRaises(ValueError):
+            MarkerMatcher(b"DONE", b"")
+
+
+class TestPatternAutomaton(unittest.TestCase):
+    def test_reports_every_occurrence_in_order(self):
+        automaton = PatternAutomaton([b"he", b"she", b"his", b"hers"])
+
+        hits = automaton.feed(b"ushers his")
+
+        self.assertEqual(
+            [(automaton.patterns[i], end) for i, end in hits],
+            [(b"she", 4), (b"he", 4), (b"hers", 6), (b"his", 10)],
+        )
+
+    def test_state_carries_across_chunks(self):
+        automaton = PatternAutomaton([b"Password:", b"$ "])
+        stream = b"login ok\r\n$ sudo -k\r\nPassword: "
+
+        for size in (1, 3, 7, len(stream)):
+            automaton.reset()
+            hits = []
+            for offset in range(0, len(stream), size):
+                hits += [(i, offset + end) for i, end in automaton.feed(stream[offset : offset + size])]
+
+            self.assertEqual(hits, [(1, 12), (0, 30)], size)
+
+    def test_overlapping_and_duplicate_patterns(self):
+        automaton = PatternAutomaton([b"aa", b"aa", b"a"])
+
+        self.assertEqual(automaton.feed(b"aaa"), [(2, 1), (0, 2), (1, 2), (2, 2), (0, 3), (1, 3), (2, 3)])
+
+    def test_empty(self):
+        self.assertEqual(PatternAutomaton([]).feed(b"anything"), [])
+
+        with self.assertRaises(ValueError):
+            PatternAutomaton([b"x", b""])
@@ -0,0 +1,175 @@
+import os
+import subprocess
+import sys
+import threading
+import tty
+import unittest
+from unittest.mock import patch
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.mux import CLOSE, DATA, OPEN, WINDOW, Frame, FrameDecoder, Mux, MuxError
+from pirate.lib.serial_console import SerialConsole
+
+
+class TestFrames(unittest.TestCase):
+    def test_round_trip(self):
+        frames = [
+            Frame(1, OPEN, b"exec cat"),
+            Frame(1, DATA, bytes(range(256)) * 4),
+            Frame(1, WINDOW, b"\0\0\x80\0"),
+            Frame(0, CLOSE),
+        ]
+        stream = b"".join(f.encode() for f in frames)
+
+        self.assertEqual(FrameDecoder(1024).feed(stream), frames)
+
+    def test_split_anywhere(self):
+        frames = [Frame(3, DATA, b"hello"), Frame(4, DATA, b"PX inside payload")]
+        stream = b"".join(f.encode() for f in frames)
+
+        for size in range(1, len(stream) + 1):
+            decoder = FrameDecoder(1024)
+            decoded = []
+            for i in range(0, len(stream), size):
+                decoded += decoder.feed(stream[i : i + size])
+            self.assertEqual(decoded, frames, size)
+
+    def test_skips_noise_and_corrupt_frames(self):
+        good = Frame(2, DATA, b"ok").encode()
+        corrupt = bytearray(Frame(2, DATA, b"lost").encode())
+        corrupt[8] ^= 0xFF
+        decoder = FrameDecoder(1024)
+
+        frames = decoder.feed(b"$ python3 - 3 <<EOF\r\nPX" + bytes(corrupt) + good)
+
+        self.assertEqual(frames, [Frame(2, DATA, b"ok")])
+        self.assertEqual(decoder.errors, 1)
+
+    def test_rejects_oversized_lengths(self):
+        decoder = FrameDecoder(16)
+
+        self.assertEqual(decoder.feed(Frame(1, DATA, b"x" * 17).encode() + Frame(1, DATA, b"y").encode()), [Frame(1, DATA, b"y")])
+
+
+class TestMux(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        # A pty pair stands in for the link; the shim runs on the master side, as the target would
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        console = SerialConsole(path=os.ttyname(self.slave), disable_serial=False)
+        console.open()
+
+        script = Mux.script(window=4096, max_payload=256, python=f"'{sys.executable}'")
+        self.target = subprocess.Popen(  # noqa: S603
+            ["/bin/sh", "-c", f"exec 3<&{self.master}; {script}"],  # noqa: S607
+            pass_fds=(self.master,),
+            env={**os.environ, "PS1": "$ ", "ENV": ""},
+        )
+
+        # Take the port over from the console, as a payload would after pushing the script
+        self.ser, buffered = console.take_port()
+        self.mux = Mux(self.ser, window=4096, max_payload=256, buffered=buffered)
+        self.mux.start()
+
+    def tearDown(self):
+        self.mux.close()
+        self.target.wait(timeout=5)
+        self.ser.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_exec_round_trip_beyond_window(self):
+        data = os.urandom(100_000)
+
+        status, output = self.mux.run("cat", data, timeout=10)
+
+        self.assertEqual(status, 0)
+        self.assertEqual(output, data)
+
+    def test_exit_status(self):
+        self.assertEqual(self.mux.run("echo oops; exit 3", timeout=5), (3, b"oops\n"))
+        self.assertEqual(self.mux.run("/nonexistent/cmd 2>/dev/null", timeout=5)[0], 127)
+
+    def test_shell_stays_responsive_during_transfer(self):
+        shell = self.mux.open("shell", "/bin/sh")
+        result = {}
+
+        transfer = threading.Thread(target=lambda: result.update(out=self.mux.run("cat", b"z" * 200_000, timeout=20)))
+        transfer.start()
+
+        shell.write(b"echo $((6 * 7))\n")
+        seen = b""
+        while b"42\r\n" not in seen:
+            seen += shell.read(timeout=5)
+
+        transfer.join(timeout=20)
+        self.assertEqual(result["out"], (0, b"z" * 200_000))
+
+        shell.send_eof()
+        self.assertIsNotNone(shell.wait(timeout=5))
+        self.assertTrue(shell.closed)
+
+    def test_close_ends_shim(self):
+        channel = self.mux.open("exec", "sleep 30")
+        self.mux.close()
+
+        self.assertEqual(self.target.wait(timeout=5), 0)
+        self.assertIsNone(channel.wait(timeout=1))
+        self.assertIn(SerialConsole.DONE_MARKER, os.read(self.ser.fileno(), 4096))
+
+    def test_rejects_unknown_service(self):
+        with self.assertRaises(ValueError):
+            self.mux.open("ftp")
+
+
+class TestMuxWithoutPython(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        console = SerialConsole(path=os.ttyname(self.slave), disable_serial=False)
+        console.open()
+
+        script = Mux.script(python="/nonexistent/python3")
+        self.target = subprocess.Popen(  # noqa: S603
+            ["/bin/sh", "-c", f"exec 3<&{self.master}; {script}"],  # noqa: S607
+            pass_fds=(self.master,),
+        )
+        self.assertEqual(self.target.wait(timeout=5), 0)
+
+        self.ser, buffered = console.take_port()
+        self.mux = Mux(self.ser, buffered=buffered)
+
+    def tearDown(self):
+        self.mux.close()
+        self.ser.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_fails_fast(self):
+        channel = self.mux.open("exec", "true")
+        self.mux.start()
+
+        # The channel opened before the refusal arrived ends instead of hanging
+        self.assertIsNone(channel.wait(timeout=5))
+        self.assertIsNotNone(self.mux.error)
+        with self.assertRaises(MuxError):
+            self.mux.run("true", timeout=5)
+
+    def test_send_times_out_on_full_link(self):
+        # Nothing reads the target side any more, so the link fills up
+        with patch.object(Mux, "WRITE_TIMEOUT", 0.05), self.assertRaises(MuxError):
+            for _ in range(100_000):
+                self.mux._send(Frame(1, DATA, bytes(256)))
+
+    def test_close_twice(self):
+        self.mux.close()
+        self.mux.close()
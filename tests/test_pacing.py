@@ -0,0 +1,44 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from pirate.lib.pacing import Pacer
+
+
+class TestPacer(unittest.TestCase):
+    def test_work_does_not_accumulate_drift(self):
+        pacer = Pacer()
+
+        for _ in range(20):
+            time.sleep(0.002)  # Simulated write/logging cost inside each interval
+            pacer.wait(0.005)
+
+        report = pacer.report()
+        self.assertEqual(report.steps, 20)
+        self.assertAlmostEqual(report.scheduled, 0.1)
+        self.assertLess(abs(report.drift), 0.01)
+
+    def test_spin_hits_deadline(self):
+        start = time.monotonic_ns()
+        pacer = Pacer(spin=0.002)
+        pacer.wait(0.003)
+
+        self.assertGreaterEqual(time.monotonic_ns() - start, 3_000_000)
+
+    def test_sleeps_remaining_time_minus_spin(self):
+        with patch("pirate.lib.pacing.time.sleep") as sleep:
+            pacer = Pacer(spin=0.001)
+            pacer.wait(1.0)
+
+        self.assertAlmostEqual(sleep.call_args[0][0], 0.999, places=2)
+
+    def test_rebases_when_far_behind(self):
+        pacer = Pacer(spin=0)
+        time.sleep(0.03)
+
+        with patch("pirate.lib.pacing.time.sleep") as sleep:
+            pacer.wait(0.01)  # Already 20ms late; skip instead of bursting
+            pacer.wait(0.01)
+
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args[0][0], 0.01, places=2)
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+import threading
+import tty
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from pirate.lib.config import Config
+from pirate.lib.hid import LEDReader
+from pirate.lib.logger import Logger
+from pirate.lib.readiness import Readiness
+from pirate.lib.serial_console import SerialConsole
+
+
+class TestReadiness(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_udc_configured(self):
+        state = Path(self.tmp.name) / "fe980000.usb" / "state"
+        state.parent.mkdir()
+        state.write_text("not attached\n")
+        threading.Timer(0.05, state.write_text, args=("configured\n",)).start()
+
+        with patch.object(Readiness, "UDC_ROOT", self.tmp.name):
+            self.assertTrue(Readiness.udc_configured(timeout=2.0))
+
+    def test_udc_configured_times_out(self):
+        state = Path(self.tmp.name) / "fe980000.usb" / "state"
+        state.parent.mkdir()
+        state.write_text("default\n")
+
+        with patch.object(Readiness, "UDC_ROOT", self.tmp.name):
+            self.assertFalse(Readiness.udc_configured(timeout=0.05))
+
+    def test_udc_missing_uses_fallback(self):
+        with (
+            patch.object(Readiness, "UDC_ROOT", self.tmp.name),
+            patch("pirate.lib.readiness.time.sleep") as sleep,
+        ):
+            self.assertFalse(Readiness.udc_configured(timeout=2.0, fallback=0.35))
+
+        sleep.assert_called_once_with(0.35)
+
+    def test_serial_data(self):
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        rl = SerialConsole(path=os.ttyname(slave), disable_serial=False)
+        rl.open()
+
+        try:
+            threading.Timer(0.05, os.write, args=(master, b"$ ")).start()
+            self.assertTrue(Readiness.serial_data(rl, timeout=2.0))
+        finally:
+            rl.close()
+            os.close(master)
+            os.close(slave)
+
+    def test_serial_data_unopened_uses_fallback(self):
+        rl = SerialConsole(disable_serial=False)
+
+        with patch("pirate.lib.readiness.time.sleep") as sleep:
+            self.assertFalse(Readiness.serial_data(rl, timeout=2.0, fallback=1.0))
+
+        sleep.assert_called_once_with(1.0)
+
+    def test_hid_output_report(self):
+        path = os.path.join(self.tmp.name, "hidg0")
+        os.mkfifo(path)
+        writer = os.open(path, os.O_RDWR)
+        leds = LEDReader(path)
+
+        try:
+            threading.Timer(0.05, os.write, args=(writer, b"\x02")).start()
+            self.assertEqual(Readiness.hid_output_report(leds, timeout=2.0), 0x02)
+            self.assertEqual(leds.sequence, 1)  # Seen by the shared reader, not taken from it
+            self.assertIsNone(Readiness.hid_output_report(leds, timeout=0.05))
+        finally:
+            leds.stop()
+            os.close(writer)
+
+    def test_hid_output_report_missing_uses_fallback(self):
+        leds = LEDReader(os.path.join(self.tmp.name, "hidg0"))
+
+        with patch("pirate.lib.readiness.time.sleep") as sleep:
+            result = Readiness.hid_output_report(leds, fallback=0.5)
+
+        self.assertIsNone(result)
+        sleep.assert_called_once_with(0.5)
+
+    def test_wait_async(self):
+        with patch.object(Readiness, "UDC_ROOT", self.tmp.name):
+            result = asyncio.run(Readiness.wait_async(Readiness.udc_configured, timeout=0.1))
+
+        self.assertFalse(result)
@@ -1,11 +1,19 @@
 import os
+import re
+import select
+import shutil
+import subprocess
 import tempfile
 import textwrap
+import threading
+import time
+import tty
 import unittest
 from contextlib import suppress
 from unittest.mock import MagicMock, patch
 
 from pirate.lib.config import Config
+from pirate.lib.logger import Logger
 from pirate.lib.serial_console import SerialConsole
 
 
@@ -263,3 +271,337 @@ class TestRelay(unittest.TestCase):
         self.assertTrue(tcset.called)
         args, _ = tcset.call_args
         self.assertEqual(args[2], ["old"])
+
+
+class TestPrebuffer(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        # A pty pair stands in for /dev/ttyGS0; the master side plays the target
+        self.master, slave = os.openpty()
+        self.path = os.ttyname(slave)
+        tty.setraw(slave)
+        self.slave = slave
+
+    def tearDown(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _relay(self, rl):
+        in_r, in_w = os.pipe()
+        out_r, out_w = os.pipe()
+        try:
+            rl.stdio(in_fd=in_r, out_fd=out_w, manage_tty=False, install_sigint_handler=False)
+            os.close(out_w)
+            out = b""
+            while chunk := os.read(out_r, 4096):
+                out += chunk
+            return out
+        finally:
+            for fd in (in_r, in_w, out_r):
+                os.close(fd)
+
+    def test_output_before_attach_is_replayed(self):
+        on_ready = MagicMock()
+        rl = SerialConsole(path=self.path, on_ready=on_ready, disable_serial=False)
+        rl.open()
+
+        os.write(self.master, b"early output\r\n")
+        self.assertTrue(rl.wait_for_data(timeout=2))
+
+        os.write(self.master, b"late output __PIRATE_DONE__")
+        out = self._relay(rl)
+
+        self.assertTrue(out.startswith(b"early output\r\nlate output"))
+        on_ready.assert_called_once()
+        self.assertIsNone(rl._ser)
+
+    def test_relays_more_than_one_read_buffer(self):
+        rl = SerialConsole(path=self.path, disable_serial=False)
+        rl.RELAY_BUFFER = 1000
+        rl.open(prebuffer=False)  # Opening flushes the link; open before the target writes
+        data = bytes(range(32, 127)) * 300
+
+        # Larger than the pty holds; the target keeps writing while the relay reads
+        thread = threading.Thread(target=os.write, args=(self.master, data + b"__PIRATE_DONE__"))
+        thread.start()
+        out = self._relay(rl)
+        thread.join()
+
+        self.assertEqual(out, data + b"__PIRATE_DONE__\r\n")
+
+    def test_large_paste_arrives_in_order(self):
+        rl = SerialConsole(path=self.path, disable_serial=False)
+        rl.open(prebuffer=False)
+        paste = bytes(range(32, 127)) * 3200  # No control bytes, which the relay would act on
+        in_r, in_w = os.pipe()
+        out_r, out_w = os.pipe()
+
+        def operator():
+            os.write(in_w, paste)
+            os.close(in_w)
+
+        def target():
+            received = b""
+            while len(received) < len(paste) + 1:
+                received += os.read(self.master, 65536)
+            received_all.append(received)
+            os.write(self.master, b"__PIRATE_DONE__")
+
+        received_all = []
+        threads = [threading.Thread(target=operator), threading.Thread(target=target)]
+        for thread in threads:
+            thread.start()
+        try:
+            rl.stdio(in_fd=in_r, out_fd=out_w, manage_tty=False, install_sigint_handler=False)
+        finally:
+            for thread in threads:
+                thread.join(timeout=5)
+            for fd in (in_r, out_r, out_w):
+                os.close(fd)
+
+        # Stdin EOF queues a Ctrl-D behind the paste
+        self.assertEqual(received_all, [paste + b"\x04"])
+        self.assertEqual((rl.outbound.queued, rl.outbound.written), (len(paste) + 1, len(paste) + 1))
+
+    def test_prebuffer_is_bounded(self):
+        rl = SerialConsole(path=self.path, disable_serial=False)
+        rl.PREBUFFER_SIZE = 16
+        rl.open()
+
+        os.write(self.master, b"x" * 64)
+        rl.wait_for_data(timeout=2)
+        time.sleep(0.2)
+
+        self.assertEqual(len(rl._buffer), 16)
+
+        # Nothing was dropped; the rest is still waiting on the link
+        self.assertEqual(rl.take_buffered(), b"x" * 16)
+        deadline = time.monotonic() + 2
+        while len(rl._buffer) < 16 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        rl.close()
+        self.assertEqual(len(rl._buffer), 16)
+
+    def test_wait_for_data_times_out(self):
+        rl = SerialConsole(path=self.path, disable_serial=False)
+        rl.open()
+        try:
+            self.assertFalse(rl.wait_for_data(timeout=0.05))
+        finally:
+            rl.close()
+
+    def test_read_until_leaves_rest_buffered(self):
+        rl = SerialConsole(path=self.path, disable_serial=False)
+        rl.open()
+        try:
+            os.write(self.master, b"banner\nB-marker A-marker tail")
+
+            self.assertEqual(rl.read_until((b"A-marker", b"B-marker"), timeout=2), b"banner\nB-marker")
+            self.assertEqual(rl.read_until(b"A-marker", timeout=2), b" A-marker")
+            self.assertIsNone(rl.read_until(b"missing", timeout=0.05))
+            self.assertEqual(rl.take_buffered(), b" tail")
+        finally:
+            rl.close()
+
+    def test_write_sends_everything(self):
+        rl = SerialConsole(path=self.path, disable_serial=False)
+        with self.assertRaises(RuntimeError):
+            rl.write(b"x")
+
+        rl.open()
+        try:
+            rl.write(b"y" * 3000, timeout=2)
+
+            data = b""
+            while len(data) < 3000:
+                data += os.read(self.master, 4096)
+            self.assertEqual(data, b"y" * 3000)
+        finally:
+            rl.close()
+
+    def test_take_port_hands_over_buffered_output(self):
+        rl = SerialConsole(path=self.path, disable_serial=False)
+        self.assertIsNone(rl.take_port())
+
+        rl.open()
+        os.write(self.master, b"early")
+        self.assertTrue(rl.wait_for_data(timeout=2))
+
+        ser, buffered = rl.take_port()
+        try:
+            self.assertEqual(buffered, b"early")
+            self.assertFalse(rl.buffering)
+            self.assertIsNone(rl._ser)
+
+            os.write(self.master, b"late")
+            select.select([ser.fileno()], [], [], 2)
+            self.assertEqual(ser.read(16), b"late")
+        finally:
+            ser.close()
+
+    def test_open_disabled(self):
+        with patch("pirate.lib.serial_console.Serial") as serial_ctor:
+            rl = SerialConsole(disable_serial=True)
+            rl.open()
+
+        serial_ctor.assert_not_called()
+
+
+class TestHooks(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.rl = SerialConsole(path=os.ttyname(self.slave), disable_serial=False)
+
+    def tearDown(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _relay(self):
+        in_r, in_w = os.pipe()
+        out_r, out_w = os.pipe()
+        try:
+            self.rl.stdio(in_fd=in_r, out_fd=out_w, manage_tty=False, install_sigint_handler=False)
+            os.close(out_w)
+            out = b""
+            while chunk := os.read(out_r, 4096):
+                out += chunk
+            return out
+        finally:
+            for fd in (in_r, in_w, out_r):
+                os.close(fd)
+
+    def _target(self, reply_to):
+        """Play the target: answer each expected input from the relay with the next output."""
+
+        def run():
+            received = b""
+            for expected, output in reply_to:
+                while expected not in received:
+                    received += os.read(self.master, 4096)
+                os.write(self.master, output)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_prompt_hooks_answer_and_detach(self):
+        self.rl.add_hook(b"Password:", lambda e: e.write(b"hunter2\n"), once=True)
+        self.rl.add_hook(b"$ ", lambda e: e.detach())
+
+        self.rl.open()
+        os.write(self.master, b"sudo -k\r\nPass")
+        thread = self._target([(b"", b"word: "), (b"hunter2\n", b"\r\nroot$ ignored")])
+
+        out = self._relay()
+        thread.join(timeout=2)
+
+        self.assertTrue(out.startswith(b"sudo -k\r\nPassword: \r\nroot$ "))
+        self.assertNotIn(b"__PIRATE_DONE__", out)
+        self.assertEqual(len(self.rl._hooks), 1)  # The once hook removed itself
+
+    def test_regex_hooks_and_hooks_added_mid_relay(self):
+        uids = []
+        self.rl.add_hook(re.compile(rb"uid=(\d+)"), lambda e: uids.append(int(e.groups[0])))
+
+        def arm(_e):
+            self.rl.add_hook(b"__PIRATE_", lambda e: e.detach())
+
+        self.rl.add_hook(b"armed", arm, once=True)
+
+        self.rl.open()
+        os.write(self.master, b"uid=501 uid=0 armed __PIRATE_")
+        time.sleep(0.1)
+        os.write(self.master, b"DONE__ uid=7\r\n")
+
+        self._relay()
+
+        self.assertEqual(uids[:2], [501, 0])
+
+    def test_remove_hook(self):
+        fired = []
+        hook = self.rl.add_hook(b"ping", fired.append)
+        self.rl.remove_hook(hook)
+
+        self.rl.open()
+        os.write(self.master, b"ping __PIRATE_DONE__")
+        self._relay()
+
+        self.assertEqual(fired, [])
+
+
+class TestScripted(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.rl = SerialConsole(path=os.ttyname(self.slave), disable_serial=False)
+        self.rl.open()
+
+    def tearDown(self):
+        self.rl.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_expect_literals_and_regexes(self):
+        os.write(self.master, b"Last login: today\r\nuser@host ~ % ")
+
+        found = self.rl.expect([b"Password:", re.compile(rb"[%$#] $")], timeout=2)
+
+        self.assertEqual(found, (1, b"Last login: today\r\nuser@host ~ % "))
+        self.assertIsNone(self.rl.expect(b"Password:", timeout=0.05))
+
+    def test_expect_timeout_keeps_output(self):
+        os.write(self.master, b"partial")
+        self.rl.wait_for_data(timeout=2)
+
+        self.assertIsNone(self.rl.expect(b"never", timeout=0.05))
+        self.assertEqual(self.rl.take_buffered(), b"partial")
+
+    def test_expect_beyond_prebuffer_size(self):
+        self.rl.PREBUFFER_SIZE = 64
+
+        def target():
+            os.write(self.master, b"x" * 1000 + b"END tail")
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        found = self.rl.expect(b"END", timeout=2)
+        thread.join()
+
+        self.assertEqual(found, (0, b"x" * 1000 + b"END"))
+
+    def test_send(self):
+        self.rl.send("uname -a")
+
+        self.assertEqual(os.read(self.master, 64), b"uname -a\n")
+
+    @unittest.skipUnless(shutil.which("sh"), "sh not installed")
+    def test_run_pipelines_commands_through_shell(self):
+        # A real shell on the master side plays the target; +i keeps it non-interactive on a tty
+        shell = subprocess.Popen(["sh", "+i"], stdin=self.master, stdout=self.master, stderr=self.master)  # noqa: S603, S607
+
+        try:
+            self.assertEqual(self.rl.run("echo $(( 6 * 7 ))", timeout=5), b"42\n")
+
+            outputs = self.rl.run_many(["printf one", "echo two; echo three >&2", "true", "echo __PIRATE_E"], timeout=5)
+            self.assertEqual(outputs, [b"one", b"two\nthree\n", b"", b"__PIRATE_E\n"])
+
+            self.rl.send("exit")
+            self.assertEqual(shell.wait(timeout=5), 0)
+        finally:
+            shell.kill()
+
+    def test_run_times_out(self):
+        with self.assertRaises(TimeoutError):
+            self.rl.run("true", timeout=0.05)
@@ -0,0 +1,273 @@
+import os
+import select
+import socket
+import tempfile
+import threading
+import time
+import tty
+import unittest
+from contextlib import suppress
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+from pirate.lib.session_daemon import Scrollback, SessionDaemon, SessionDaemonError, attach
+
+
+class TestScrollback(unittest.TestCase):
+    def test_keeps_most_recent_bytes(self):
+        ring = Scrollback(8)
+
+        ring.append(b"abc")
+        self.assertEqual(ring.snapshot(), b"abc")
+
+        ring.append(b"defgh")
+        self.assertEqual(ring.snapshot(), b"abcdefgh")
+
+        ring.append(b"ij")
+        self.assertEqual(ring.snapshot(), b"cdefghij")
+
+        ring.append(memoryview(b"0123456789XY"))
+        self.assertEqual(ring.snapshot(), b"456789XY")
+        self.assertEqual(len(ring), 8)
+
+        ring.clear()
+        self.assertEqual(ring.snapshot(), b"")
+
+    def test_size_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            Scrollback(0)
+
+
+class TestSessionDaemon(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        # A pty pair stands in for /dev/ttyGS0; the master side plays the target
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "run", "session.sock")
+
+        self._start()
+
+    def _start(self, **kwargs):
+        console = SerialConsole(path=os.ttyname(self.slave), disable_serial=False)
+        self.daemon = SessionDaemon(socket_path=self.socket_path, scrollback=32, console=console, **kwargs)
+
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self.daemon.serve, args=(ready,))
+        self.thread.start()
+        self.assertTrue(ready.wait(timeout=2))
+
+    def _restart(self, **kwargs):
+        self._stop()
+        self._start(**kwargs)
+
+    def _stop(self):
+        self.daemon.stop()
+        self.thread.join(timeout=5)
+        self.daemon.close()
+
+    def tearDown(self):
+        self._stop()
+        os.close(self.master)
+        os.close(self.slave)
+        self.tmp.cleanup()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.socket_path)
+        sock.settimeout(2)
+        return sock
+
+    def _recv_until(self, sock, expected):
+        data = b""
+        while expected not in data:
+            data += sock.recv(4096)
+        return data
+
+    def _wait_for_scrollback(self, expected):
+        deadline = time.monotonic() + 2
+        while expected not in self.daemon.scrollback.snapshot() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_replays_scrollback_and_forwards_input(self):
+        os.write(self.master, b"x" * 40 + b"\r\nuser@target % ")
+        self._wait_for_scrollback(b"% ")
+
+        with self._connect() as client:
+            self.assertEqual(self._recv_until(client, b"% "), b"x" * 16 + b"\r\nuser@target % ")
+
+            client.sendall(b"whoami\n")
+            self.assertEqual(os.read(self.master, 64), b"whoami\n")
+
+            os.write(self.master, b"user\r\n")
+            self.assertEqual(self._recv_until(client, b"user\r\n"), b"user\r\n")
+
+        # Detached; the daemon keeps reading, and a new client sees what it missed
+        os.write(self.master, b"while away\r\n")
+        self._wait_for_scrollback(b"while away")
+
+        with self._connect() as client:
+            self.assertTrue(self._recv_until(client, b"while away\r\n").endswith(b"user\r\nwhile away\r\n"))
+
+    def test_fans_out_to_every_client(self):
+        first = self._connect()
+        second = self._connect()
+        try:
+            os.write(self.master, b"hello\r\n")
+            self.assertEqual(self._recv_until(first, b"hello"), b"hello\r\n")
+            self.assertEqual(self._recv_until(second, b"hello"), b"hello\r\n")
+
+            # Either client may type
+            first.sendall(b"a")
+            self.assertEqual(os.read(self.master, 64), b"a")
+            second.sendall(b"b")
+            self.assertEqual(os.read(self.master, 64), b"b")
+
+            first.close()
+            os.write(self.master, b"still here\r\n")
+            self.assertEqual(self._recv_until(second, b"here\r\n"), b"still here\r\n")
+        finally:
+            first.close()
+            second.close()
+
+    def test_tcp_clients_are_read_only(self):
+        self._restart(listen="127.0.0.1", port=0)
+
+        with socket.create_connection(("127.0.0.1", self.daemon.port), timeout=2) as viewer, self._connect() as local:
+            self._wait_for_clients(2)
+            viewer.sendall(b"ignored")
+            local.sendall(b"typed")
+            self.assertEqual(os.read(self.master, 64), b"typed")
+
+            os.write(self.master, b"output\r\n")
+            self.assertEqual(self._recv_until(viewer, b"output\r\n"), b"output\r\n")
+
+    def _stream(self, size):
+        payload = bytes(32 + i % 95 for i in range(size))
+        threading.Thread(target=os.write, args=(self.master, payload), daemon=True).start()
+        return payload
+
+    def _slow_viewer(self):
+        return socket.create_connection(("127.0.0.1", self.daemon.port), timeout=2)
+
+    def _wait_for_clients(self, count):
+        deadline = time.monotonic() + 2
+        while len(self.daemon.clients) != count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.daemon.clients), count)
+
+    def test_slow_client_output_is_dropped(self):
+        self._restart(listen="127.0.0.1", port=0, client_buffer=8192, slow_client="drop")
+
+        with self._slow_viewer() as slow, self._connect() as fast:
+            self._wait_for_clients(2)
+            payload = self._stream(8 << 20)
+
+            # The fast client gets everything while the slow one is not reading
+            received = bytearray()
+            while len(received) < len(payload):
+                received += fast.recv(1 << 16)
+            self.assertEqual(received, payload)
+
+            # The slow client then gets what fit, and once caught up, a notice of what it missed
+            caught_up = bytearray()
+            slow.settimeout(0.2)
+            with suppress(TimeoutError):
+                while chunk := slow.recv(1 << 16):
+                    caught_up += chunk
+            self.assertLess(len(caught_up), len(payload))
+
+            slow.settimeout(2)
+            os.write(self.master, b"END")
+            self.assertRegex(self._recv_until(slow, b"END"), rb"^\r\n\[pirate: \d+ bytes dropped\]\r\nEND$")
+
+    def test_slow_client_is_disconnected(self):
+        self._restart(listen="127.0.0.1", port=0, client_buffer=8192, slow_client="disconnect")
+
+        with self._slow_viewer() as slow, self._connect() as fast:
+            self._wait_for_clients(2)
+            payload = self._stream(8 << 20)
+
+            received = bytearray()
+            while len(received) < len(payload):
+                received += fast.recv(1 << 16)
+            self.assertEqual(received, payload)
+            self.assertEqual(len(self.daemon.clients), 1)
+
+            # What the kernel already buffered may still arrive, then the stream ends
+            total = 0
+            with suppress(ConnectionResetError):
+                while chunk := slow.recv(1 << 16):
+                    total += len(chunk)
+            self.assertLess(total, len(payload))
+
+    def test_rejects_unknown_options(self):
+        with self.assertRaises(ValueError):
+            SessionDaemon(socket_path=self.socket_path, console=self.daemon.console, slow_client="block")
+        with self.assertRaises(ValueError):
+            SessionDaemon(socket_path=self.socket_path, console=self.daemon.console, tcp_access="admin")
+
+    def test_attach_relays_terminal(self):
+        in_r, in_w = os.pipe()
+        out_r, out_w = os.pipe()
+        os.write(self.master, b"banner\r\n")
+        self._wait_for_scrollback(b"banner")
+
+        def target():
+            self.assertEqual(os.read(self.master, 64), b"id\n")
+            os.write(self.master, b"uid=0\r\n__PIRATE_DONE__\r\n")
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        os.write(in_w, b"id\n")
+        try:
+            attach(self.socket_path, in_fd=in_r, out_fd=out_w, manage_tty=False)
+        finally:
+            thread.join(timeout=2)
+            os.close(out_w)
+
+        out = b""
+        while chunk := os.read(out_r, 4096):
+            out += chunk
+        for fd in (in_r, in_w, out_r):
+            os.close(fd)
+
+        self.assertTrue(out.startswith(b"banner\r\nuid=0\r\n__PIRATE_DONE__"))
+
+    def test_attach_skips_old_done_marker(self):
+        in_r, in_w = os.pipe()
+        out_r, out_w = os.pipe()
+        os.write(self.master, b"__PIRATE_DONE__\r\nbanner\r\n")
+        self._wait_for_scrollback(b"banner")
+
+        def target():
+            r, _, _ = select.select([self.master], [], [], 2)
+            if r and os.read(self.master, 64) == b"id\n":
+                os.write(self.master, b"uid=0\r\n__PIRATE_DONE__\r\n")
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        os.write(in_w, b"id\n")
+        try:
+            attach(self.socket_path, in_fd=in_r, out_fd=out_w, manage_tty=False)
+        finally:
+            thread.join(timeout=3)
+            os.close(out_w)
+
+        out = b""
+        while chunk := os.read(out_r, 4096):
+            out += chunk
+        for fd in (in_r, in_w, out_r):
+            os.close(fd)
+
+        # The replayed marker did not end the attach; the fresh one did
+        self.assertTrue(out.startswith(b"\r\nbanner\r\nuid=0\r\n__PIRATE_DONE__"))
+
+    def test_attach_without_daemon(self):
+        with self.assertRaises(SessionDaemonError):
+            attach(os.path.join(self.tmp.name, "missing.sock"))
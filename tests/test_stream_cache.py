@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from pirate.lib.hid import ReportStream
+from pirate.lib.layout import CompiledLayout
+from pirate.lib.logger import Logger
+from pirate.lib.stream_cache import StreamCache
+
+
+def make_stream(n=3):
+    data = b"".join(bytes([0, 0, 4 + i, 0, 0, 0, 0, 0]) + bytes(8) for i in range(n))
+    return ReportStream(data, (0.0, 0.05) * n, ("x", "") * n)
+
+
+class TestStreamCache(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = StreamCache(path=self.tmp.name, max_size=1024 * 1024)
+        self.layout = CompiledLayout({"a": ["00", "04"]})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        stream = make_stream()
+        key = self.cache.key("text", self.layout, 300)
+        self.cache.put(key, stream)
+
+        cached = self.cache.get(key)
+
+        self.assertIsNotNone(cached)
+        self.assertEqual(bytes(cached.data), stream.data)
+        self.assertEqual(list(cached.delays), list(stream.delays))
+        self.assertEqual(list(cached.labels), list(stream.labels))
+        self.assertEqual(len(cached), len(stream))
+
+    def test_miss_returns_none(self):
+        self.assertIsNone(self.cache.get(self.cache.key("text", self.layout, 300)))
+
+    def test_key_depends_on_inputs(self):
+        base = self.cache.key("text", self.layout, 300)
+
+        self.assertNotEqual(base, self.cache.key("text!", self.layout, 300))
+        self.assertNotEqual(base, self.cache.key("text", self.layout, 301))
+        self.assertNotEqual(base, self.cache.key("text", CompiledLayout({"a": ["00", "05"]}), 300))
+        self.assertEqual(base, self.cache.key("text", CompiledLayout({"a": ["00", "04"]}), 300))
+
+    def test_evicts_least_recently_used(self):
+        stream = make_stream(10)
+        keys = [self.cache.key(str(i), self.layout, 300) for i in range(3)]
+
+        for i, key in enumerate(keys):
+            self.cache.put(key, stream)
+            os.utime(self.cache._entry(key), ns=(i * 10**9, i * 10**9))
+
+        self.cache.get(keys[0])  # Most recently used now
+        self.cache.max_size = self.cache.stats().size * 2 // 3
+        removed = self.cache.evict()
+
+        self.assertEqual(removed, 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_clear_and_stats(self):
+        self.cache.put(self.cache.key("a", self.layout, 300), make_stream())
+        self.cache.put(self.cache.key("b", self.layout, 300), make_stream())
+
+        stats = self.cache.stats()
+        self.assertEqual(stats.entries, 2)
+        self.assertGreater(stats.size, 0)
+
+        self.assertEqual(self.cache.clear(), 2)
+        self.assertEqual(self.cache.stats().entries, 0)
+
+    def test_corrupt_entry_discarded(self):
+        key = self.cache.key("text", self.layout, 300)
+        Path(self.cache._entry(key)).write_bytes(b"garbage-garbage-garbage")
+
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(self.cache._entry(key).exists())
+
+    def test_unwritable_path_is_ignored(self):
+        blocker = Path(self.tmp.name) / "file"
+        blocker.write_text("x")
+        cache = StreamCache(path=str(blocker / "cache"))
+
+        cache.put("key", make_stream())
+
+        self.assertEqual(cache.stats().entries, 0)
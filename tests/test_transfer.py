@@ -0,0 +1,120 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import tty
+import unittest
+from unittest.mock import patch
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+from pirate.lib.transfer import Transfer, TransferError
+
+
+@unittest.skipUnless(all(shutil.which(t) for t in ("base64", "gzip", "cksum", "dd")), "target tools not installed")
+class TestTransfer(unittest.TestCase):
+    def setUp(self):
+        Logger.setup(Logger.INFO)
+        Logger._logger.handlers.clear()  # Silence std logs
+        Config.load("/nonexistent.cfg")
+
+        # A pty pair stands in for /dev/ttyGS0; a real shell on the master side plays the target
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.rl = SerialConsole(path=os.ttyname(self.slave), disable_serial=False)
+        self.rl.open()
+        self.shell = subprocess.Popen(["sh", "+i"], stdin=self.master, stdout=self.master, stderr=self.master)  # noqa: S603, S607
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.remote = os.path.join(self.tmp.name, "remote file.bin")
+
+    def tearDown(self):
+        self.rl.send("exit")
+        self.shell.wait(timeout=5)
+        self.rl.close()
+        os.close(self.master)
+        os.close(self.slave)
+        self.tmp.cleanup()
+
+    def test_push_and_pull(self):
+        data = os.urandom(10_000) + b"\0" * 20_000
+
+        for compress in (False, True):
+            transfer = Transfer(self.rl, chunk=4096, window=3, compress=compress, timeout=5)
+
+            report = transfer.push(data, self.remote)
+            with open(self.remote, "rb") as f:
+                self.assertEqual(f.read(), data)
+            self.assertEqual((report.size, report.chunks, report.retransmits), (len(data), 8, 0))
+            self.assertFalse(os.path.exists(self.remote + ".part"))
+
+            pulled, report = transfer.pull(self.remote)
+            self.assertEqual(pulled, data)
+            self.assertEqual((report.size, report.chunks, report.retransmits), (len(data), 8, 0))
+
+        # The zeroes compress; the random bytes don't
+        self.assertLess(report.wire, len(data))
+
+        # The shell is usable afterwards
+        self.assertEqual(self.rl.run("echo ok", timeout=5), b"ok\n")
+
+    def test_empty_file(self):
+        transfer = Transfer(self.rl, timeout=5)
+
+        self.assertEqual(transfer.push(b"", self.remote).chunks, 0)
+        self.assertEqual(transfer.pull(self.remote)[0], b"")
+
+    def test_corrupt_chunks_are_resent(self):
+        data = os.urandom(9000)
+        transfer = Transfer(self.rl, chunk=1024, window=4, timeout=5)
+        encode = transfer._encode
+        corrupted = set()
+
+        # Damage the first transmission of chunks 2 and 5 on the way to the target
+        def flaky_encode(i, raw):
+            line = encode(i, raw)
+            if i in (2, 5) and i not in corrupted:
+                corrupted.add(i)
+                return line[:-10] + b"AAAA" + line[-6:]
+            return line
+
+        with patch.object(transfer, "_encode", side_effect=flaky_encode):
+            report = transfer.push(data, self.remote)
+
+        with open(self.remote, "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(report.retransmits, 2)
+
+        # And on the way back
+        decode = transfer._decode
+        calls = iter(range(100))
+        with patch.object(transfer, "_decode", side_effect=lambda text: None if next(calls) == 3 else decode(text)):
+            pulled, report = transfer.pull(self.remote)
+
+        self.assertEqual(pulled, data)
+        self.assertEqual(report.retransmits, 1)
+
+    def test_gives_up_after_retries(self):
+        transfer = Transfer(self.rl, chunk=1024, retries=2, timeout=5)
+
+        with patch.object(transfer, "_encode", return_value=b"C 0 1 2 AAAA\n"), self.assertRaises(TransferError):
+            transfer.push(b"x" * 100, self.remote)
+
+        self.assertFalse(os.path.exists(self.remote))
+        self.assertFalse(os.path.exists(self.remote + ".part"))
+        self.assertEqual(self.rl.run("echo ok", timeout=5), b"ok\n")
+
+    def test_missing_paths(self):
+        transfer = Transfer(self.rl, timeout=5)
+
+        with self.assertRaises(TransferError):
+            transfer.pull(os.path.join(self.tmp.name, "missing"))
+        with self.assertRaises(TransferError):
+            transfer.push(b"x", os.path.join(self.tmp.name, "no", "such", "dir"))
+
+    def test_rejects_bad_sizes(self):
+        with self.assertRaises(ValueError):
+            Transfer(self.rl, chunk=0)
+        with self.assertRaises(ValueError):
+            Transfer(self.rl, window=0)
@@ -0,0 +1,109 @@
+import os
+import time
+import tty
+import unittest
+
+from pirate.lib.write_queue import WriteQueue
+
+
+class _Link:
+    """A link accepting `room` bytes until drained by the test."""
+
+    def __init__(self, room):
+        self.room = room
+        self.data = b""
+
+    def write(self, data):
+        n = min(len(data), self.room)
+        self.room -= n
+        self.data += data[:n]
+        return n
+
+
+class TestWriteQueue(unittest.TestCase):
+    def test_keeps_what_the_link_refuses(self):
+        link = _Link(room=5)
+        queue = WriteQueue(link.write, limit=8, chunk=4)
+
+        queue.put(b"hello ")
+        queue.put(b"world")
+
+        self.assertEqual(link.data, b"hello")
+        self.assertEqual(len(queue), 6)
+        self.assertFalse(queue.full)
+        self.assertEqual((queue.queued, queue.written, queue.stalled), (11, 5, 2))  # One refused byte per put
+
+        link.room = 100
+        self.assertEqual(queue.flush(), 6)
+        self.assertEqual(link.data, b"hello world")
+        self.assertIsNone(queue.delay())
+
+    def test_full_at_limit(self):
+        queue = WriteQueue(_Link(room=0).write, limit=8)
+
+        queue.put(b"1234567")
+        self.assertFalse(queue.full)
+        queue.put(b"89")
+        self.assertTrue(queue.full)
+
+        self.assertEqual(queue.clear(), 9)
+        self.assertFalse(queue.full)
+
+    def test_non_int_write_result_means_all_written(self):
+        sent = []
+        queue = WriteQueue(lambda data: sent.append(data), chunk=3)
+
+        queue.put(b"abcdefg")
+
+        self.assertEqual(sent, [b"abc", b"def", b"g"])
+        self.assertEqual(len(queue), 0)
+
+    def test_rate_paces_chunks(self):
+        link = _Link(room=1000)
+        queue = WriteQueue(link.write, chunk=100, rate=10_000)
+
+        queue.put(b"x" * 300)
+        self.assertEqual(link.data, b"x" * 100)
+        self.assertGreater(queue.delay(), 0)
+
+        master, slave = os.openpty()
+        try:
+            start = time.monotonic()
+            self.assertTrue(queue.drain(slave, timeout=2))
+            elapsed = time.monotonic() - start
+        finally:
+            os.close(master)
+            os.close(slave)
+
+        self.assertEqual(link.data, b"x" * 300)
+        self.assertGreaterEqual(elapsed, 0.015)
+
+    def test_drain_waits_for_writable_link(self):
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        os.set_blocking(slave, False)
+
+        def write(data):
+            try:
+                return os.write(slave, data)
+            except BlockingIOError:
+                return 0
+
+        try:
+            queue = WriteQueue(write)
+            queue.put(os.urandom(200_000))
+            self.assertGreater(len(queue), 0)  # More than the pty holds
+            self.assertFalse(queue.drain(slave, timeout=0.05))
+
+            received = b""
+            while len(queue):
+                received += os.read(master, 65536)
+                queue.drain(slave, timeout=0)
+            while len(received) < 200_000:
+                received += os.read(master, 65536)
+
+            self.assertEqual(len(received), 200_000)
+            self.assertGreater(queue.stalled, 0)
+        finally:
+            os.close(master)
+            os.close(slave)
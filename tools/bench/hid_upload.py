@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the keystroke cost of each `Keyboard.upload()` encoding.
+
+Compiles the lines each encoding would type for the same data into HID
+report streams, with and without compact reports, and prints reports per
+file byte and the upload rate they allow: at max rate, one report per host
+poll (``--interval``), and at the configured WPM. The fewest reports among
+the encodings a platform can decode wins; that is how ``decoder="auto"``
+chooses. Run from the repo root:
+
+    python tools/bench/hid_upload.py --kilobytes 16
+"""
+
+import argparse
+import os
+
+from pirate.lib.config import Config
+from pirate.lib.keyboard import Keyboard
+from pirate.lib.logger import Logger
+from pirate.lib.upload import ENCODINGS, PLATFORMS
+
+
+def _measure(keyboard: Keyboard, name: str, data: bytes, interval: float) -> int:
+    streams = [keyboard.compile(text, cache=False) for text in ENCODINGS[name].lines(data)]
+    reports = sum(map(len, streams))
+    paced = sum(sum(stream.delays) for stream in streams)
+
+    max_rate = len(data) / (reports * interval)
+    wpm_rate = len(data) / paced
+    platforms = ",".join(sorted(ENCODINGS[name].platforms))
+    print(
+        f"  {name:<8} {reports / len(data):6.2f} reports/B  {max_rate:8.1f} B/s max rate  "
+        f"{wpm_rate:6.1f} B/s at WPM  ({platforms})"
+    )
+    return reports
+
+
+def main() -> None:
+    """Compile each encoding of random, text, and sparse data and print its report cost."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kilobytes", type=int, default=16, help="KiB per data set")
+    parser.add_argument("--layout", default="us", help="Keyboard layout to compile for")
+    parser.add_argument("--interval", type=float, default=0.001, help="Seconds per report at max rate (host polling)")
+    args = parser.parse_args()
+
+    Logger.setup(Logger.INFO)
+    Config.load("/nonexistent.cfg")
+
+    size = args.kilobytes * 1024
+    data_sets = {
+        "random": os.urandom(size),
+        "text": b"".join(f"{i:08d} the quick brown fox\n".encode() for i in range(size // 30 + 1))[:size],
+        "sparse": bytes(size // 2) + os.urandom(size - size // 2),
+    }
+
+    for compact in (False, True):
+        keyboard = Keyboard(layout=args.layout, log_keystrokes=False, disable_keyboard=True, compact_reports=compact)
+        for kind, data in data_sets.items():
+            print(f"{kind}, compact reports {'on' if compact else 'off'}:")
+            costs = {name: _measure(keyboard, name, data, args.interval) for name in ENCODINGS}
+            for platform in PLATFORMS:
+                stock = [name for name in costs if platform in ENCODINGS[name].platforms]
+                print(f"  fewest reports on {platform}: {min(stock, key=costs.__getitem__)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark HID report throughput against a FIFO standing in for /dev/hidg0.
+
+Compares the legacy open/write/close-per-keystroke pattern with the persistent
+`HIDWriter` handle. Run from the repo root:
+
+    python tools/bench/hid_writer.py --keystrokes 20000
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+
+from pirate.lib.hid import HIDWriter
+from pirate.lib.logger import Logger
+
+PRESS = bytes([0x00, 0x00, 0x04, 0x00, 0x00, 0x00, 0x00, 0x00])
+RELEASE = bytes(8)
+
+
+def _drain(path: str, stop: threading.Event) -> None:
+    """Read and discard everything written to the FIFO until stopped."""
+
+    fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        while not stop.is_set():
+            try:
+                if not os.read(fd, 65536):
+                    time.sleep(0.0001)
+            except BlockingIOError:
+                time.sleep(0.0001)
+    finally:
+        os.close(fd)
+
+
+def _reopen_per_keystroke(path: str, keystrokes: int) -> None:
+    # Unbuffered, since a buffered "rb+" handle refuses a non-seekable FIFO
+    for _ in range(keystrokes):
+        with open(path, "rb+", buffering=0) as hid:
+            hid.write(PRESS)
+            hid.write(RELEASE)
+
+
+def _persistent(path: str, keystrokes: int) -> None:
+    with HIDWriter(path) as hid:
+        for _ in range(keystrokes):
+            hid.write(PRESS, RELEASE)
+
+
+def _measure(name: str, fn: Callable[[str, int], None], path: str, keystrokes: int) -> float:
+    start = time.perf_counter()
+    fn(path, keystrokes)
+    elapsed = time.perf_counter() - start
+    rate = (keystrokes * 2) / elapsed
+    print(f"{name:<24} {elapsed:8.3f}s  {rate:12,.0f} reports/s")
+    return rate
+
+
+def main() -> None:
+    """Run both write strategies against a FIFO and print reports per second."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keystrokes", type=int, default=20000, help="Keystrokes (press+release pairs) per run")
+    args = parser.parse_args()
+
+    Logger.setup(Logger.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hidg0")
+        os.mkfifo(path)
+
+        stop = threading.Event()
+        reader = threading.Thread(target=_drain, args=(path, stop), daemon=True)
+        reader.start()
+
+        try:
+            legacy = _measure("reopen per keystroke", _reopen_per_keystroke, path, args.keystrokes)
+            persistent = _measure("persistent HIDWriter", _persistent, path, args.keystrokes)
+        finally:
+            stop.set()
+            reader.join()
+
+    print(f"speedup: {persistent / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark done-marker detection over a chunked serial stream.
+
+Compares the legacy sliding bytearray (extend, trim, rescan ~1 KiB per read)
+with the incremental `MarkerMatcher`, across read sizes. Run from the repo root:
+
+    python tools/bench/marker_matcher.py --megabytes 16
+"""
+
+import argparse
+import os
+import time
+from collections.abc import Callable
+
+from pirate.lib.matching import MarkerMatcher
+from pirate.lib.serial_console import SerialConsole
+
+MARKER = SerialConsole.DONE_MARKER
+
+
+def _sliding_buffer(chunks: list[bytes]) -> bool:
+    buf = bytearray()
+    max_buf = len(MARKER) + 1024
+    for data in chunks:
+        buf.extend(data)
+        if len(buf) > max_buf:
+            del buf[: len(buf) - max_buf]
+        if MARKER in buf:
+            return True
+    return False
+
+
+def _matcher(chunks: list[bytes]) -> bool:
+    matcher = MarkerMatcher(MARKER)
+    return any(matcher.feed(data) is not None for data in chunks)
+
+
+def _measure(name: str, fn: Callable[[list[bytes]], bool], chunks: list[bytes]) -> float:
+    total = sum(len(c) for c in chunks)
+    start = time.perf_counter()
+    found = fn(chunks)
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed / 1e6
+    print(f"  {name:<20} {elapsed:8.3f}s  {rate:10,.1f} MB/s  found={found}")
+    return rate
+
+
+def main() -> None:
+    """Feed the same stream through both detectors at several read sizes and print throughput."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, default=16, help="Stream size per run in MiB")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1, 16, 64, 512, 4096], help="Read sizes to simulate")
+    args = parser.parse_args()
+
+    # Printable noise with the marker split across the final read boundary
+    body = bytes(0x21 + b % 94 for b in os.urandom(args.megabytes * 1024 * 1024))
+    stream = body + MARKER
+
+    for size in args.chunks:
+        # Cap byte-sized reads so the legacy path finishes in reasonable time
+        data = stream[-min(len(stream), size * 65536) :]
+        chunks = [data[i : i + size] for i in range(0, len(data), size)]
+        print(f"read size {size} ({len(data):,} bytes, {len(chunks):,} reads)")
+
+        legacy = _measure("sliding bytearray", _sliding_buffer, chunks)
+        incremental = _measure("MarkerMatcher", _matcher, chunks)
+        print(f"  speedup: {incremental / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark `SerialConsole.stdio()` serial-to-stdout throughput over a pty pair.
+
+The pty master plays the target, streaming output followed by the done
+marker; the slave stands in for /dev/ttyGS0 and stdout is a pipe. Compares
+the legacy fixed ``read(4096)`` per chunk, ``read()`` sized to the bytes
+waiting, and reads straight into the relay's reused buffer. Run from the repo
+root:
+
+    python tools/bench/serial_relay.py --megabytes 32
+"""
+
+import argparse
+import os
+import threading
+import time
+import tty
+from collections.abc import Callable
+
+from serial import Serial
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole, SerialLike
+
+
+class _Port:
+    """A serial port hidden behind the plain `read()` interface, optionally with a fixed read size."""
+
+    def __init__(self, ser: Serial, fixed: int | None = None):
+        self.ser = ser
+        self.fixed = fixed
+
+    def fileno(self) -> int:
+        return self.ser.fileno()
+
+    def read(self, size: int = 1) -> bytes:
+        return self.ser.read(self.fixed or size)
+
+    def write(self, data: bytes) -> int | None:
+        return self.ser.write(data)
+
+    def close(self) -> None:
+        self.ser.close()
+
+
+def _drain(fd: int) -> None:
+    """Read and discard the relay's stdout until it is closed."""
+
+    while os.read(fd, 1 << 16):
+        pass
+
+
+def _measure(name: str, wrap: Callable[[Serial], SerialLike], megabytes: int) -> float:
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    tty.setraw(master)
+    in_r, in_w = os.pipe()
+    out_r, out_w = os.pipe()
+
+    rl = SerialConsole(path=os.ttyname(slave), disable_serial=False)
+    ser = rl.open_serial(rl.baud)
+    payload = b"x" * (1 << 20)
+
+    def target() -> None:
+        for _ in range(megabytes):
+            os.write(master, payload)
+        os.write(master, SerialConsole.DONE_MARKER)
+
+    drainer = threading.Thread(target=_drain, args=(out_r,))
+    writer = threading.Thread(target=target)
+    drainer.start()
+
+    try:
+        start = time.perf_counter()
+        writer.start()
+        rl.stdio(ser=wrap(ser), in_fd=in_r, out_fd=out_w, manage_tty=False, install_sigint_handler=False)
+        elapsed = time.perf_counter() - start
+    finally:
+        writer.join()
+        os.close(out_w)
+        drainer.join()
+        ser.close()
+        for fd in (master, slave, in_r, in_w, out_r):
+            os.close(fd)
+
+    rate = megabytes / elapsed
+    print(f"{name:<24} {elapsed:8.3f}s  {rate:8.1f} MiB/s")
+    return rate
+
+
+def main() -> None:
+    """Relay the same stream with each read strategy and print MiB per second."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, default=32, help="MiB of target output per run")
+    args = parser.parse_args()
+
+    Logger.setup(Logger.INFO)
+    Config.load("/nonexistent.cfg")
+
+    legacy = _measure("read(4096)", lambda ser: _Port(ser, fixed=4096), args.megabytes)
+    _measure("read(waiting)", _Port, args.megabytes)
+    reused = _measure("reused buffer", lambda ser: ser, args.megabytes)
+
+    print(f"speedup: {reused / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark `Transfer` push/pull throughput over a pty loopback.
+
+The pty master runs a real ``sh`` playing the target, with the slave standing
+in for /dev/ttyGS0, so the measured rate includes the target-side shell
+helper (``base64``, ``cksum``, ``dd``). Compares stop-and-wait (a window of
+1) with a sliding window, default and larger chunks, and gzip on the wire. A
+pty has no latency, so the window matters less here than on a real link; the
+per-chunk helper cost dominates. Run from the repo root:
+
+    python tools/bench/serial_transfer.py --kilobytes 512
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+import tty
+
+from pirate.lib.config import Config
+from pirate.lib.logger import Logger
+from pirate.lib.serial_console import SerialConsole
+from pirate.lib.transfer import Transfer
+
+
+def _measure(console: SerialConsole, remote: str, data: bytes, chunk: int, window: int, compress: bool) -> float:
+    transfer = Transfer(console, chunk=chunk, window=window, compress=compress)
+
+    pushed = transfer.push(data, remote)
+    pulled_data, pulled = transfer.pull(remote)
+    if pulled_data != data:
+        raise RuntimeError("Pulled data does not match pushed data.")
+
+    name = f"{chunk // 1024}K x{window}{' gzip' if compress else ''}"
+    for action, report in (("push", pushed), ("pull", pulled)):
+        print(
+            f"{name:<14} {action}  {report.elapsed:7.2f}s  {report.rate / 1024:8.1f} KiB/s  "
+            f"wire {report.wire / max(report.size, 1):4.2f}x"
+        )
+
+    return pushed.rate + pulled.rate
+
+
+def main() -> None:
+    """Push and pull the same file with each window and compression setting and print KiB per second."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kilobytes", type=int, default=512, help="KiB per file")
+    parser.add_argument("--window", type=int, default=8, help="Sliding window to compare with stop-and-wait")
+    parser.add_argument("--chunk", type=int, default=16384, help="Larger chunk size to compare with the default")
+    args = parser.parse_args()
+
+    Logger.setup(Logger.INFO)
+    Config.load("/nonexistent.cfg")
+
+    # Half text (compresses well), half random (doesn't)
+    size = args.kilobytes * 1024
+    text = b"".join(f"{i:08d} the quick brown fox\n".encode() for i in range(size // 60 + 1))[: size // 2]
+    data = text + os.urandom(size - len(text))
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    console = SerialConsole(path=os.ttyname(slave), disable_serial=False)
+    console.open()
+    shell = subprocess.Popen(["sh", "+i"], stdin=master, stdout=master, stderr=master)  # noqa: S603, S607
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            remote = os.path.join(tmp, "bench.bin")
+            baseline = _measure(console, remote, data, 4096, 1, False)
+            _measure(console, remote, data, 4096, args.window, False)
+            best = _measure(console, remote, data, args.chunk, args.window, False)
+            _measure(console, remote, data, args.chunk, args.window, True)
+
+        print(f"speedup: {best / baseline:.1f}x")
+    finally:
+        console.send("exit")
+        shell.wait(timeout=5)
+        console.close()
+        os.close(master)
+        os.close(slave)
+
+
+if __name__ == "__main__":
+    main()